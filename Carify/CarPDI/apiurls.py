@@ -16,6 +16,9 @@ urlpatterns = [
     path('vehicle/create/', CreateVehicleAPI.as_view(), name='api-create-vehicle'),
     path('obd/create/', CreateOBDReadingAPI.as_view(), name='api-create-obd'),
     path('system-check/create/', CreateSystemCheckAPI.as_view(), name='api-create-system-check'),
+    path('master-data/', MasterDataAPI.as_view(), name='api-master-data'),
+    path('jobs/<uuid:job_id>/', JobStatusAPI.as_view(), name='api-job-status'),
+    path('search/', SearchAPI.as_view(), name='api-search'),
 
 
 ]
\ No newline at end of file
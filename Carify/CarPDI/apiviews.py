@@ -1,4 +1,3 @@
-import razorpay
 import uuid
 from django.conf import settings
 from rest_framework.views import APIView
@@ -9,9 +8,18 @@ from django.shortcuts import get_object_or_404
 from .models import *
 from .serializers import *
 from .permissions import IsStaffOrManager
-from User.models import UserRole
+from User.permission import user_is_staff_or_admin
 from django.db import transaction
 from django.utils import timezone
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.urls import reverse
+from . import masterdata, search
+from .payments import get_gateway
+from .orders import RETRY_AFTER, OrderInProgress, get_or_create_order, mark_paid
+from . import jobs
+from .verification import schedule_reconcile, verify_order_signature, verify_payment_link_signature
 
 
 # CREATE PAYMENT API 
@@ -29,11 +37,7 @@ class CreatePaymentAPI(APIView):
 
         # SECURITY CHECK: Ownership & Role Validation
         # 1. Check if user is Staff, Superuser, or has specific Admin roles
-        is_staff_or_admin = (
-            request.user.is_staff or 
-            request.user.is_superuser or 
-            UserRole.objects.filter(user=request.user, role__name__in=['Admin', 'Manager', 'Staff']).exists()
-        )
+        is_staff_or_admin = user_is_staff_or_admin(request.user)
 
         # 2. Check if the logged-in user is the owner of the vehicle
         # Assuming 'customer' field in Vehicle model links to the User
@@ -56,45 +60,26 @@ class CreatePaymentAPI(APIView):
 
         amount_paise = int(vehicle.payment_amount * 100) # Dynamic Amount
 
-        # --- MODE 1: DUMMY / MOCK MODE ---
+        # --- MODE 1: DUMMY / MOCK MODE --- (fake order id)
+        # --- MODE 2: LIVE MODE --- (real Razorpay order)
+        # Either way a live order for the same amount and mode is reused (CarPDI/orders.py),
+        # so reloading the payment page doesn't create a new order every time.
         if not getattr(settings, 'IS_RAZORPAY_LIVE', False):
-            # Generate Fake Order ID
-            fake_order_id = f"order_mock_{uuid.uuid4().hex[:10]}"
-            
-            # Update DB 
-            vehicle.transaction_id = fake_order_id
-            vehicle.payment_status = 'pending' 
-            vehicle.save()
-
-            return Response({
-                "status": "success",
-                "message": "Order Created (MOCK MODE)",
-                "data": PaymentOrderSerializer(vehicle).data
-            }, status=status.HTTP_201_CREATED)
+            create = lambda data: {"id": f"order_mock_{uuid.uuid4().hex[:10]}"}
+        else:
+            create = get_gateway().create_order  # shared pooled client (CarPDI/payments.py)
 
-        # --- MODE 2: LIVE MODE ---
         try:
-            client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-            
-            payment_data = {
-                "amount": amount_paise,
-                "currency": "INR",
-                "payment_capture": '1' # Auto capture
-            }
-            
-            # Real Razorpay Call
-            order = client.order.create(data=payment_data)
-
-            # DB Update
-            vehicle.transaction_id = order['id']
-            vehicle.payment_status = 'pending'
-            vehicle.save()
+            order, created = get_or_create_order(
+                vehicle, create, amount=amount_paise, user=request.user,
+                live=getattr(settings, 'IS_RAZORPAY_LIVE', False),
+            )
 
+        except OrderInProgress:
             return Response({
-                "status": "success",
-                "message": "Razorpay Order Created Successfully",
-                "data": PaymentOrderSerializer(vehicle).data
-            }, status=status.HTTP_201_CREATED)
+                "status": "error",
+                "message": "An order for this vehicle is already being created. Please retry."
+            }, status=status.HTTP_409_CONFLICT, headers={'Retry-After': str(RETRY_AFTER)})
 
         except Exception as e:
             return Response({
@@ -103,6 +88,13 @@ class CreatePaymentAPI(APIView):
                 "details": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        mock = "" if getattr(settings, 'IS_RAZORPAY_LIVE', False) else " (MOCK MODE)"
+        return Response({
+            "status": "success",
+            "message": ("Razorpay Order Created Successfully" if created else "Existing Order Reused") + mock,
+            "data": PaymentOrderSerializer(vehicle).data
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
 class VerifyPaymentAPI(APIView):
     """
     Verifies the payment signature returned by the payment gateway.
@@ -120,17 +112,13 @@ class VerifyPaymentAPI(APIView):
             payment_id = serializer.validated_data['razorpay_payment_id']
             signature = serializer.validated_data['razorpay_signature']
 
-            vehicle = get_object_or_404(Vehicle, id=vehicle_id)
+            # Customer is needed for the ownership check below - fetch it in the same query
+            vehicle = get_object_or_404(Vehicle.objects.select_related('customer'), id=vehicle_id)
 
             # SECURITY CHECK: Ownership (Email Matching) & Role Validation
             
             # 1. Check if the user is Staff or Superuser
-            is_staff_or_admin = (
-                request.user.is_staff or 
-                request.user.is_superuser or 
-                # Check UserRole model if it exists (remove this line if UserRole is not imported)
-                UserRole.objects.filter(user=request.user, role__name__in=['Admin', 'Manager', 'Staff']).exists()
-            )
+            is_staff_or_admin = user_is_staff_or_admin(request.user)
 
             # 2. Check if the logged-in User's email matches the Vehicle Customer's email
             try:
@@ -172,6 +160,7 @@ class VerifyPaymentAPI(APIView):
                     }, status=status.HTTP_400_BAD_REQUEST)
 
                 # Default Success Logic
+                mark_paid(order_id, payment_id)
                 vehicle.payment_status = 'success'
                 vehicle.transaction_id = payment_id 
                 vehicle.save()
@@ -186,19 +175,9 @@ class VerifyPaymentAPI(APIView):
                 }, status=status.HTTP_200_OK)
 
             # --- MODE 2: LIVE MODE (Real Razorpay Check) ---
-            client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-            
-            try:
-                # Razorpay Verification
-                params_dict = {
-                    'razorpay_order_id': order_id,
-                    'razorpay_payment_id': payment_id,
-                    'razorpay_signature': signature
-                }
-                
-                client.utility.verify_payment_signature(params_dict)
-
-                # If successful
+            # Local HMAC check with the key secret - no call to Razorpay
+            if verify_order_signature(order_id, payment_id, signature):
+                mark_paid(order_id, payment_id)
                 vehicle.payment_status = 'success'
                 vehicle.transaction_id = payment_id 
                 vehicle.save()
@@ -208,15 +187,14 @@ class VerifyPaymentAPI(APIView):
                     "message": "Payment Verified Successfully",
                 }, status=status.HTTP_200_OK)
 
-            except razorpay.errors.SignatureVerificationError:
-                # If signature invalid
-                vehicle.payment_status = 'failed'
-                vehicle.save()
-                
-                return Response({
-                    "status": "failed",
-                    "message": "Payment Verification Failed. Invalid Signature."
-                }, status=status.HTTP_400_BAD_REQUEST)
+            # If signature invalid
+            vehicle.payment_status = 'failed'
+            vehicle.save()
+
+            return Response({
+                "status": "failed",
+                "message": "Payment Verification Failed. Invalid Signature."
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 class GetPaymentStatusAPI(APIView):
@@ -225,6 +203,7 @@ class GetPaymentStatusAPI(APIView):
     Security: Customers can only see THEIR OWN vehicle (matched via Email). Staff can see ALL.
     Used by the frontend client to determine whether to display the 
     'Payment Success' or 'Payment Failed' screen.
+    Instead of polling this, clients can listen on ws/payment/status/<vehicle_id>/.
     """
     permission_classes = [IsAuthenticated]
 
@@ -235,12 +214,7 @@ class GetPaymentStatusAPI(APIView):
         # SECURITY CHECK: Ownership (Email Matching) & Role Validation
         
         # 1. Check if user is Staff, Superuser, or Admin/Manager
-        is_staff_or_admin = (
-            request.user.is_staff or 
-            request.user.is_superuser or 
-            # Remove the line below if UserRole is not imported or needed
-            UserRole.objects.filter(user=request.user, role__name__in=['Admin', 'Manager', 'Staff']).exists()
-        )
+        is_staff_or_admin = user_is_staff_or_admin(request.user)
 
         # 2. Check if the logged-in User's email matches the Vehicle Customer's email
         try:
@@ -313,57 +287,28 @@ class SendPaymentLinkAPI(APIView):
             }, status=status.HTTP_201_CREATED)
 
         # MODE 2: LIVE / PRODUCTION MODE
-        client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-
-        try:
-            payment_data = {
-                "amount": amount_paise,
-                "currency": "INR",
-                "accept_partial": False,
-                "description": f"Payment for Vehicle #{vehicle.id} - {vehicle.model}",
-                "customer": {
-                    "name": customer.name,
-                    "contact": customer.phone, # Ensure this field exists in Customer model
-                    "email": customer.email    # Ensure this field exists in Customer model
-                },
-                "notify": {
-                    "sms": True,
-                    "email": True
-                },
-                "reminder_enable": True,
+        # The Razorpay call runs on the job worker (CarPDI/tasks.py), not in this request.
+        # Repeated clicks for the same link reuse the queued job.
+        job = jobs.enqueue(
+            'payments.send_payment_link',
+            {
+                'vehicle_id': vehicle.id,
                 # Ideally, this callback should be your frontend success page or backend verify API
-                "callback_url": "http://localhost:8000/api/pdi/payment/callback/", 
-                "callback_method": "get"
-            }
-
-            # Call Razorpay API
-            response = client.payment_link.create(payment_data)
-
-            # Update DB with real data
-            vehicle.payment_link_id = response['id']
-            vehicle.payment_status = response['status']
-            vehicle.save()
-
-            return Response({
-                "status": "success",
-                "message": "Payment Link Sent Successfully",
-                "data": PaymentLinkResponseSerializer(vehicle, context={'short_url': response['short_url']}).data
-            }, status=status.HTTP_201_CREATED)
-
-        except Exception as e:
-            return Response({
-                "status": "error",
-                "message": "Failed to generate payment link.",
-                "details": str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+                'callback_url': "http://localhost:8000/api/pdi/payment/callback/",
+            },
+            priority=10,
+            idempotency_key=f"send-payment-link:{vehicle.id}:{vehicle.payment_link_id or ''}",
+            user=request.user,
+        )
+        return job_accepted_response(request, job, "Payment link is being generated.")
 
 
 class RazorpayCallbackAPI(APIView):
     """
     Handles the callback from Razorpay after a Payment Link transaction.
     Security: STRICT. Validates ownership via Email Matching or Staff role.
-    Verifies payment status directly with Razorpay (Live Mode) to prevent URL tampering.
+    Verifies Razorpay's callback signature locally (Live Mode) to prevent URL tampering;
+    the link is reconciled with Razorpay in the background.
     """
     permission_classes = [IsAuthenticated]
 
@@ -382,7 +327,7 @@ class RazorpayCallbackAPI(APIView):
 
         # 2. Find Vehicle by Link ID
         # Note: Ensure your model field name matches (previous code used 'payment_link_id')
-        vehicle = Vehicle.objects.filter(payment_link_id=link_id).first()
+        vehicle = Vehicle.objects.select_related('customer').filter(payment_link_id=link_id).first()
 
         if not vehicle:
             return Response({
@@ -392,11 +337,7 @@ class RazorpayCallbackAPI(APIView):
 
         
         # SECURITY CHECK: Ownership (Email Matching) & Role Validation
-        is_staff_or_admin = (
-            request.user.is_staff or 
-            request.user.is_superuser or 
-            UserRole.objects.filter(user=request.user, role__name__in=['Admin', 'Manager', 'Staff']).exists()
-        )
+        is_staff_or_admin = user_is_staff_or_admin(request.user)
 
         try:
             customer_email = vehicle.customer.email
@@ -436,49 +377,42 @@ class RazorpayCallbackAPI(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
         # --- MODE 2: LIVE MODE (Secure Verification) ---
-        client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+        # SECURITY: Don't trust 'link_status' from URL unless Razorpay signed it.
+        # The signature is checked locally; the link itself is re-checked with
+        # Razorpay in the background (CarPDI/verification.py), not in this request.
+        reference_id = request.GET.get('razorpay_payment_link_reference_id')
+        signature = request.GET.get('razorpay_signature')
 
-        try:
-            # SECURITY: Don't trust 'link_status' from URL. Fetch actual status from Razorpay.
-            fetched_link = client.payment_link.fetch(link_id)
-            
-            real_status = fetched_link.get('status') # paid, expired, cancelled
-            
-            if real_status == "paid":
-                # Get the latest payment ID associated with this link
-                # Razorpay sends a list of payments for a link, we take the last one
-                payments = fetched_link.get('payments', [])
-                real_payment_id = payments[-1]['payment_id'] if payments else payment_id
-
-                vehicle.payment_status = "success"
-                vehicle.transaction_id = real_payment_id
-                vehicle.save()
+        if not verify_payment_link_signature(link_id, reference_id, link_status, payment_id, signature):
+            return Response({
+                "status": "failed",
+                "message": "Payment Verification Failed. Invalid Signature."
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-                return Response({
-                    "status": "success",
-                    "message": "Payment Verified & Updated Successfully",
-                    "data": {
-                        "vehicle_id": vehicle.id,
-                        "payment_status": "success",
-                        "transaction_id": real_payment_id
-                    }
-                }, status=status.HTTP_200_OK)
-            
-            else:
-                vehicle.payment_status = "failed"
-                vehicle.save()
-                return Response({
-                    "status": "failed",
-                    "message": f"Payment not completed. Current status: {real_status}",
-                }, status=status.HTTP_400_BAD_REQUEST)
+        if link_status == "paid":
+            vehicle.payment_status = "success"
+            vehicle.transaction_id = payment_id
+            vehicle.save()
+            schedule_reconcile(vehicle.id, link_id, link_status)
 
-        except Exception as e:
             return Response({
-                "status": "error",
-                "message": "Error verifying payment with Razorpay.",
-                "details": str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+                "status": "success",
+                "message": "Payment Verified & Updated Successfully",
+                "data": {
+                    "vehicle_id": vehicle.id,
+                    "payment_status": "success",
+                    "transaction_id": payment_id
+                }
+            }, status=status.HTTP_200_OK)
+
+        vehicle.payment_status = "failed"
+        vehicle.save()
+        schedule_reconcile(vehicle.id, link_id, link_status)
+        return Response({
+            "status": "failed",
+            "message": f"Payment not completed. Current status: {link_status}",
+        }, status=status.HTTP_400_BAD_REQUEST)
+
 
 class CreateCustomerAPI(APIView):
     """
@@ -753,3 +687,119 @@ class CreateSystemCheckAPI(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# MASTER DATA API
+def _accepts_gzip(accept_encoding):
+    """
+    True if an Accept-Encoding header allows gzip. q-values count:
+    'gzip;q=0' refuses it, and '*' covers it unless gzip is listed itself.
+    """
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+class MasterDataAPI(APIView):
+    """
+    All dropdown / lookup tables (statuses, systems, areas, ...) in one payload.
+    Clients keep the response and send its ETag back in If-None-Match;
+    while nothing has changed they get an empty 304 instead of the data again.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        bundle = masterdata.get_bundle()
+
+        # Weak comparison: the same ETag covers the plain and gzipped body
+        client_etags = [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]
+        if bundle.etag in client_etags or '*' in client_etags:
+            response = HttpResponseNotModified()
+        elif _accepts_gzip(request.headers.get('Accept-Encoding', '')):
+            response = HttpResponse(bundle.gzipped, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(bundle.body, content_type='application/json')
+
+        response['ETag'] = f'W/{bundle.etag}'
+        # Store, but always revalidate - a 304 costs a few bytes
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+class SearchAPI(APIView):
+    """
+    Ranked search over vehicles (model, VIN, customer) and customers (name,
+    phone, email). Every word is a prefix match and phone numbers match on
+    any part, so ?q=swift, ?q=MA3F or ?q=4321 all work.
+    Optional: ?type=vehicle|customer, ?limit= (max 50).
+    """
+    permission_classes = [IsAuthenticated, IsStaffOrManager]
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type') or None
+        if kind not in (None, *search.KINDS):
+            return Response({"status": "error", "message": "type must be 'vehicle' or 'customer'"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), self.max_limit)
+        except ValueError:
+            return Response({"status": "error", "message": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = search.search(query, kind=kind, limit=limit) if query else []
+        return Response({
+            "status": "success",
+            "message": f"{len(results)} results",
+            "data": results,
+        }, status=status.HTTP_200_OK)
+
+
+def job_accepted_response(request, job, message):
+    """202 response for work handed to the job queue; poll `status_url` for the result."""
+    status_url = request.build_absolute_uri(reverse('api-job-status', args=[job.id]))
+    return Response({
+        "status": "accepted",
+        "message": message,
+        "data": {
+            "job_id": str(job.id),
+            "job_status": job.status,
+            "status_url": status_url,
+        }
+    }, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
+
+
+class JobStatusAPI(APIView):
+    """
+    Status (and result, once finished) of a background job.
+    Security: only the user who started the job, or Staff.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(BackgroundJob, id=job_id)
+
+        if job.created_by_id != request.user.id and not user_is_staff_or_admin(request.user):
+            return Response({
+                "status": "error",
+                "message": "Permission Denied: You did not start this job."
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        return Response({
+            "status": "success",
+            "data": BackgroundJobSerializer(job).data
+        }, status=status.HTTP_200_OK)
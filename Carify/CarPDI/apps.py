@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CarpdiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'CarPDI'
+
+    def ready(self):
+        import CarPDI.signals
+        import CarPDI.tasks
@@ -0,0 +1,49 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from User.permission import user_is_staff_or_admin
+from .models import Vehicle
+from .payment_events import payment_group, payment_status_message
+
+
+class PaymentStatusConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/payment/status/<vehicle_id>/ - pushes the vehicle's payment status
+    every time it changes, instead of clients polling GetPaymentStatusAPI.
+    Same access rule as the API: staff see all, customers only their own vehicle.
+    Auth: session cookie or ?token=<api token>.
+    """
+
+    @database_sync_to_async
+    def _load_vehicle(self, vehicle_id, user):
+        vehicle = Vehicle.objects.select_related('customer').filter(id=vehicle_id).first()
+        if vehicle is None:
+            return None
+        is_owner = bool(user.email) and vehicle.customer.email == user.email
+        if not user_is_staff_or_admin(user) and not is_owner:
+            return None
+        return vehicle
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        vehicle = await self._load_vehicle(self.scope['url_route']['kwargs']['vehicle_id'], user)
+        if vehicle is None:
+            await self.close(code=4403)
+            return
+
+        self.group_name = payment_group(vehicle.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        # Current status first, so the client doesn't need a separate GET
+        await self.send_json({"status": "success", "data": payment_status_message(vehicle)})
+
+    async def disconnect(self, code):
+        if getattr(self, 'group_name', None):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def payment_status(self, event):
+        await self.send_json({"status": "success", "data": event["data"]})
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import pdf, pdf_worker
+from .jobs import PermanentError
+from .models import ReportExport, Vehicle
+
+
+EXPORT_DIR = getattr(settings, 'REPORT_EXPORT_DIR', os.path.join(settings.MEDIA_ROOT, 'reports', 'exports'))
+
+# Biggest bundle one export may contain - bigger requests are refused, never cut short
+MAX_VEHICLES = getattr(settings, 'REPORT_EXPORT_MAX_VEHICLES', 2000)
+
+WORKERS = getattr(settings, 'REPORT_EXPORT_WORKERS', max(1, min(4, (os.cpu_count() or 2) - 1)))
+
+# Seconds between progress writes
+PROGRESS_INTERVAL = 1.0
+
+
+def export_vehicles(filters):
+    """Vehicles an export with these filters contains (same filters as AllInspectedVehiclesAPI)."""
+    return Vehicle.objects.matching(model=filters.get('model'), date=filters.get('date')).order_by('-inspection_date', 'id')
+
+
+def too_many_vehicles_message(count):
+    return (f"{count} vehicles match these filters, but an export holds at most {MAX_VEHICLES}. "
+            "Narrow the filters (model / date) and export in parts.")
+
+
+def _add_pdf(bundle, path, vehicle_id):
+    arcname = f'inspection-report-{vehicle_id}.pdf'
+    try:
+        bundle.write(path, arcname=arcname)
+    except FileNotFoundError:
+        # A newer version replaced the cached file after the worker rendered it
+        pdf_file, _ = pdf.open_report_pdf(vehicle_id)
+        with pdf_file, bundle.open(arcname, 'w') as dest:
+            shutil.copyfileobj(pdf_file, dest)
+
+
+def build_export(export_id):
+    """
+    Render every vehicle of the export in a process pool (PDFs already in
+    the report cache are reused) and write them into one zip on disk.
+    Workers are spawned, not forked, so they never share this process'
+    DB connections or threads.
+    """
+    export = ReportExport.objects.get(id=export_id)
+    vehicle_ids = list(export_vehicles(export.filters).values_list('id', flat=True)[:MAX_VEHICLES + 1])
+    if len(vehicle_ids) > MAX_VEHICLES:
+        # More vehicles matched since ReportExportAPI checked - an incomplete zip would look complete
+        error = too_many_vehicles_message(export_vehicles(export.filters).count())
+        ReportExport.objects.filter(id=export.id).update(status='failed', error=error, finished_at=timezone.now())
+        raise PermanentError(error)
+    ReportExport.objects.filter(id=export.id).update(status='running', total=len(vehicle_ids), done=0, failed_vehicles=[], error='')
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, f'reports-{export.id}.zip')
+    fd, tmp_path = tempfile.mkstemp(dir=EXPORT_DIR, suffix='.tmp')
+    os.close(fd)
+
+    done, failed = 0, []
+    last_progress = time.monotonic()
+    try:
+        # PDF streams are already compressed, so ZIP_STORED
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_STORED) as bundle, \
+                ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                                    initializer=pdf_worker.init) as pool:
+            futures = {pool.submit(pdf_worker.render, vehicle_id): vehicle_id for vehicle_id in vehicle_ids}
+            for future in as_completed(futures):
+                vehicle_id = futures[future]
+                try:
+                    _add_pdf(bundle, future.result(), vehicle_id)
+                except Exception as e:
+                    failed.append({'vehicle_id': vehicle_id, 'error': f"{type(e).__name__}: {e}"})
+                done += 1
+                if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                    ReportExport.objects.filter(id=export.id).update(done=done, failed_vehicles=failed)
+                    last_progress = time.monotonic()
+        os.replace(tmp_path, path)
+    except BaseException as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        ReportExport.objects.filter(id=export.id).update(
+            status='failed', done=done, failed_vehicles=failed, error=f"{type(e).__name__}: {e}", finished_at=timezone.now(),
+        )
+        raise
+
+    ReportExport.objects.filter(id=export.id).update(
+        status='done', done=done, failed_vehicles=failed, file_path=path, finished_at=timezone.now(),
+    )
+    return {'export_id': str(export.id), 'vehicles': done, 'failed': len(failed)}
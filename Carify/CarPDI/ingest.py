@@ -0,0 +1,153 @@
+from functools import reduce
+import operator
+
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404
+
+
+CUSTOM = '__custom__'
+
+
+class LookupRef:
+    """Placeholder for a lookup row that is resolved when the batch is saved."""
+    __slots__ = ('resolver', 'pk', 'name')
+
+    def __init__(self, resolver, pk=None, name=None):
+        self.resolver = resolver
+        self.pk = pk
+        self.name = name
+
+    def __repr__(self):
+        return f"<{self.resolver.model.__name__} ref pk={self.pk!r} name={self.name!r}>"
+
+
+class LookupResolver:
+    """
+    Collects references to one lookup table (Status, FluidArea, ...) and
+    resolves all of them together: one `in_bulk` for the IDs, one query for
+    the custom names, and a create only for names that don't exist yet.
+    """
+
+    def __init__(self, model, name_field='name', iexact=False, defaults=None):
+        self.model = model
+        self.name_field = name_field
+        self.iexact = iexact
+        self.defaults = defaults or {}
+        self._refs = []
+        self._by_pk = {}
+        self._by_name = {}
+
+    def _key(self, name):
+        return name.lower() if self.iexact else name
+
+    def ref(self, value, custom=None):
+        """
+        Reference from a form field: either an ID, or '__custom__' together
+        with the custom text the technician typed in.
+        """
+        custom = (custom or '').strip()
+        if value == CUSTOM and custom:
+            return self.named(custom)
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            pk = None
+        ref = LookupRef(self, pk=pk)
+        self._refs.append(ref)
+        return ref
+
+    def named(self, name):
+        """Reference by name; the row is created if it doesn't exist."""
+        ref = LookupRef(self, name=name.strip())
+        self._refs.append(ref)
+        return ref
+
+    def resolve(self):
+        ids = {ref.pk for ref in self._refs if ref.pk is not None}
+        names = {ref.name for ref in self._refs if ref.name}
+
+        if ids:
+            self._by_pk = self.model.objects.in_bulk(ids)
+
+        if names:
+            if self.iexact:
+                condition = reduce(operator.or_, (Q(**{f'{self.name_field}__iexact': name}) for name in names))
+            else:
+                condition = Q(**{f'{self.name_field}__in': names})
+            # Oldest row wins when a name exists twice
+            for obj in self.model.objects.filter(condition).order_by('-pk'):
+                self._by_name[self._key(getattr(obj, self.name_field))] = obj
+
+            for name in names:
+                if self._key(name) not in self._by_name:
+                    # Regular create() so post_save listeners still run
+                    obj = self.model.objects.create(**{self.name_field: name}, **self.defaults)
+                    self._by_name[self._key(name)] = obj
+
+    def get(self, ref):
+        if ref.name:
+            return self._by_name.get(self._key(ref.name))
+        return self._by_pk.get(ref.pk)
+
+
+class SectionBatch:
+    """
+    Batched writer for one inspection step.
+
+        batch = SectionBatch(SystemCheck, vehicle)
+        statuses = batch.lookup(Status)
+        for ...:
+            batch.add(system=system, status=statuses.ref(status_id, custom_status))
+        batch.save()
+
+    `save()` resolves every lookup, then writes all rows with a single
+    `bulk_create`, all inside one transaction. Rows pointing at an unknown
+    lookup ID either raise Http404 (same as get_object_or_404 did) or are
+    dropped when `skip_unresolved=True`.
+    """
+
+    def __init__(self, model, vehicle, skip_unresolved=False):
+        self.model = model
+        self.vehicle = vehicle
+        self.skip_unresolved = skip_unresolved
+        self._resolvers = {}
+        self._rows = []
+
+    def lookup(self, model, name_field='name', iexact=False, defaults=None):
+        key = (model, name_field)
+        if key not in self._resolvers:
+            self._resolvers[key] = LookupResolver(model, name_field, iexact, defaults)
+        return self._resolvers[key]
+
+    def add(self, **fields):
+        self._rows.append(fields)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _build(self, row_number, fields):
+        values = {}
+        for name, value in fields.items():
+            if isinstance(value, LookupRef):
+                obj = value.resolver.get(value)
+                if obj is None:
+                    if self.skip_unresolved:
+                        return None
+                    raise Http404(f"Row {row_number}: no {value.resolver.model.__name__} matches the given query.")
+                value = obj
+            values[name] = value
+        return self.model(vehicle=self.vehicle, **values)
+
+    def save(self):
+        with transaction.atomic():
+            for resolver in self._resolvers.values():
+                resolver.resolve()
+
+            objs = []
+            for row_number, fields in enumerate(self._rows, start=1):
+                obj = self._build(row_number, fields)
+                if obj is not None:
+                    objs.append(obj)
+
+            return self.model.objects.bulk_create(objs)
@@ -0,0 +1,176 @@
+import logging
+import os
+import random
+import socket
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentError(Exception):
+    """Raise from a task when retrying can't help (bad input, 4xx from the API...)."""
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: object
+    max_attempts: int
+    timeout: int      # seconds a worker may hold the job before it is handed to another worker
+    retry_delay: int  # base of the exponential backoff between attempts, in seconds
+
+
+# name -> Task. Filled by @task in <app>/tasks.py (imported from AppConfig.ready)
+TASKS = {}
+
+
+def task(name, max_attempts=3, timeout=60, retry_delay=10):
+    """
+    Register a function as a background task:
+
+        @task('bank.verify_details', max_attempts=3, timeout=30)
+        def verify_details(user_id):
+            ...
+            return {...}   # stored in BackgroundJob.result (must be JSON-serializable)
+
+    The function is called with the job payload as keyword arguments.
+    Payloads are stored as-is, so pass row ids - never secrets or personal data.
+    """
+    def register(func):
+        TASKS[name] = Task(name, func, max_attempts, timeout, retry_delay)
+        return func
+    return register
+
+
+def enqueue(name, payload=None, *, priority=0, idempotency_key=None, user=None, delay=0):
+    """
+    Queue a job and return it. With an `idempotency_key`, enqueueing the same
+    work twice returns the existing job instead (a failed one is queued again).
+    The job becomes visible to workers when the current transaction commits.
+    """
+    registered = TASKS[name]
+    fields = {
+        'name': name,
+        'payload': payload or {},
+        'priority': priority,
+        'max_attempts': registered.max_attempts,
+        'run_after': timezone.now() + timedelta(seconds=delay),
+        'created_by': user if user is not None and user.is_authenticated else None,
+    }
+    if idempotency_key is None:
+        return BackgroundJob.objects.create(**fields)
+
+    try:
+        with transaction.atomic():
+            return BackgroundJob.objects.create(idempotency_key=idempotency_key, **fields)
+    except IntegrityError:
+        job = BackgroundJob.objects.get(idempotency_key=idempotency_key)
+
+    if job.status == 'failed':
+        BackgroundJob.objects.filter(pk=job.pk, status='failed').update(
+            status='queued', attempts=0, error='', result=None, finished_at=None,
+            payload=fields['payload'], run_after=fields['run_after'],
+        )
+        job.refresh_from_db()
+    return job
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claimable(now):
+    # Queued and due, or "running" on a worker that died (visibility timeout passed)
+    return Q(status='queued', run_after__lte=now) | Q(status='running', locked_until__lt=now)
+
+
+def claim(worker, limit=1):
+    """
+    Take up to `limit` due jobs for `worker`. Each job is claimed with a
+    conditional UPDATE, so two workers never get the same job - no
+    SELECT ... FOR UPDATE needed, works on SQLite too.
+    The lease starts now: jobs that wait behind others may lose it before
+    they run (run() checks), so run_pending() claims one job at a time.
+    """
+    now = timezone.now()
+    # Jobs that keep timing out (e.g. they crash the worker) give up after max_attempts
+    BackgroundJob.objects.filter(status='running', locked_until__lt=now, attempts__gte=F('max_attempts')).update(
+        status='failed', error='Timed out', locked_until=None, finished_at=now,
+    )
+    candidates = BackgroundJob.objects.filter(_claimable(now)).order_by('-priority', 'run_after')
+    claimed = []
+    for job in candidates[:limit]:
+        timeout = TASKS[job.name].timeout if job.name in TASKS else 60
+        won = BackgroundJob.objects.filter(_claimable(now), pk=job.pk, attempts=job.attempts).update(
+            status='running',
+            attempts=job.attempts + 1,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=timeout),
+        )
+        if won:
+            job.refresh_from_db()
+            claimed.append(job)
+    return claimed
+
+
+def _finish(job, **fields):
+    # Only the worker still holding the job may record its outcome
+    return BackgroundJob.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by, attempts=job.attempts).update(
+        locked_until=None, **fields
+    )
+
+
+def _start(job, timeout):
+    """
+    Renew the lease right before the task runs. False if it already ran
+    out and the job may belong to another worker now - then it must not run.
+    """
+    now = timezone.now()
+    return bool(BackgroundJob.objects.filter(
+        pk=job.pk, status='running', locked_by=job.locked_by, attempts=job.attempts, locked_until__gte=now,
+    ).update(locked_until=now + timedelta(seconds=timeout)))
+
+
+def run(job):
+    """Run one claimed job and record the outcome (success, retry or failure). Returns 0 if the lease was lost."""
+    registered = TASKS.get(job.name)
+    if registered is None:
+        return _finish(job, status='failed', error=f"Unknown task: {job.name}", finished_at=timezone.now())
+
+    if not _start(job, registered.timeout):
+        logger.warning("Job %s (%s) lost its lease before it ran, skipped", job.id, job.name)
+        return 0
+
+    try:
+        result = registered.func(**job.payload)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.name, job.attempts)
+        error = f"{type(e).__name__}: {e}"
+        if isinstance(e, PermanentError) or job.attempts >= job.max_attempts:
+            return _finish(job, status='failed', error=error, finished_at=timezone.now())
+        # Exponential backoff with jitter
+        delay = registered.retry_delay * (2 ** (job.attempts - 1)) * random.uniform(0.5, 1.5)
+        return _finish(job, status='queued', error=error, run_after=timezone.now() + timedelta(seconds=delay))
+
+    return _finish(job, status='succeeded', result=result, error='', finished_at=timezone.now())
+
+
+def run_pending(worker=None, limit=10):
+    """Claim and run up to `limit` due jobs, one at a time. Returns how many were run."""
+    worker = worker or worker_name()
+    ran = 0
+    for _ in range(limit):
+        jobs = claim(worker, 1)
+        if not jobs:
+            break
+        if run(jobs[0]):
+            ran += 1
+    return ran
@@ -0,0 +1,115 @@
+import csv
+import io
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from CarPDI import masterdata
+from CarPDI.models import (
+    DocumentType, FlushArea, FluidArea, FluidRange, GlassArea, InteriorArea, InteriorCategory,
+    NetworkArea, Operations, PaintArea, Parameters, Performance, RubberArea, System,
+    VehicleEngineType, VehicleFuelType, VehicleTransmission, VoltageInference,
+)
+
+
+# CSV file -> (model, model fields in CSV column order)
+CSV_TABLES = {
+    'doc_name.csv': (DocumentType, ('name',)),
+    'engine_name.csv': (VehicleEngineType, ('name',)),
+    'fluid_area_name.csv': (FluidArea, ('name',)),
+    'fluid_range_name.csv': (FluidRange, ('name',)),
+    'flush_name.csv': (FlushArea, ('name',)),
+    'fuel_name.csv': (VehicleFuelType, ('name',)),
+    'glass_name.csv': (GlassArea, ('name',)),
+    'int_cat_name.csv': (InteriorCategory, ('name',)),
+    'interior_area_name.csv': (InteriorArea, ('name',)),
+    'network_name.csv': (NetworkArea, ('name',)),
+    'operation_name.csv': (Operations, ('name',)),
+    'paint_name.csv': (PaintArea, ('name',)),
+    'parameter_name.csv': (Parameters, ('name',)),
+    'performance_name.csv': (Performance, ('name',)),
+    'rubber_name.csv': (RubberArea, ('name',)),
+    'system_check.csv': (System, ('name',)),
+    'transmission_name.csv': (VehicleTransmission, ('name',)),
+    'voltage_interence.csv': (VoltageInference, ('voltage', 'engine_state', 'interence', 'recommendation')),
+}
+
+
+def _clean(value):
+    # The CSVs are hand-made: padded cells, doubled spaces
+    return ' '.join((value or '').split())
+
+
+def _key(values):
+    """Compare rows ignoring case and spacing, so 'Rear WindScreen ' matches 'Rear Windscreen'."""
+    return tuple(_clean(value).casefold() for value in values)
+
+
+def read_rows(path, width):
+    """Data rows of a CSV (header skipped, blank lines dropped), each cut to `width` cleaned cells."""
+    raw = path.read_bytes()
+    try:
+        text = raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        # voltage_interence.csv was saved from Excel (en dashes in cp1252)
+        text = raw.decode('cp1252')
+    rows = list(csv.reader(io.StringIO(text)))[1:]
+    return [tuple(_clean(cell) for cell in row[:width]) for row in rows if any(cell.strip() for cell in row)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load every master-data CSV (CSV/*.csv) in one pass: rows are diffed in memory against "
+        "the existing tables and only missing ones are inserted, with bulk_create, in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=str(Path(settings.BASE_DIR) / 'CSV'), help="Folder with the CSV files.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be inserted.")
+
+    def handle(self, *args, **options):
+        folder = Path(options['dir'])
+        if not folder.is_dir():
+            raise CommandError(f"{folder} is not a directory.")
+
+        plan = []
+        for filename, (model, fields) in CSV_TABLES.items():
+            path = folder / filename
+            if not path.exists():
+                self.stderr.write(self.style.WARNING(f"{filename}: missing, skipped"))
+                continue
+            rows = read_rows(path, len(fields))
+            bad = [row for row in rows if len(row) < len(fields) or not all(row)]
+            if bad:
+                raise CommandError(f"{filename}: {len(bad)} incomplete rows, e.g. {bad[0]!r}")
+
+            # One query per table for what already exists
+            existing = {_key(values) for values in model.objects.values_list(*fields)}
+            new_rows, seen = [], set()
+            for row in rows:
+                key = _key(row)
+                if key in existing or key in seen:
+                    continue
+                seen.add(key)
+                new_rows.append(row)
+            plan.append((filename, model, fields, len(rows), new_rows))
+
+        with transaction.atomic():
+            for filename, model, fields, total, new_rows in plan:
+                if new_rows and not options['dry_run']:
+                    model.objects.bulk_create([model(**dict(zip(fields, row))) for row in new_rows])
+                    # bulk_create sends no post_save, so drop the cached copies here
+                    masterdata.invalidate_on_commit(model)
+
+                self.stdout.write(f"{model.__name__:<20} {filename:<24} {total:>3} rows, {len(new_rows):>3} new")
+                if options['verbosity'] >= 2:
+                    for row in new_rows:
+                        self.stdout.write(f"    + {' | '.join(row)}")
+
+        inserted = sum(len(new_rows) for *_, new_rows in plan)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry run: {inserted} rows not inserted."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Inserted {inserted} rows into {sum(1 for *_, n in plan if n)} tables."))
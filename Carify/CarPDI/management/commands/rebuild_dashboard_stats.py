@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from CarPDI import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DashboardDailyStat rollup table from Vehicle and Customer."
+
+    def handle(self, *args, **options):
+        rows = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt dashboard stats: {rows} rows."))
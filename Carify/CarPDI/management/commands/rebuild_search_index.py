@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from CarPDI.search import get_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-index every vehicle and customer for /api/car/search/. Signals keep the index "
+        "in sync with save()/delete(); run this after bulk_create / update() / raw SQL imports."
+    )
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{type(backend).__name__}: indexed {count} rows."))
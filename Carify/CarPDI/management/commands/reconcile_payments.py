@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from CarPDI.models import Vehicle
+from CarPDI.payments import get_gateway
+from CarPDI.reconciliation import Reconciler
+
+
+class Command(BaseCommand):
+    help = "Check pending/created vehicle payments against Razorpay and settle the ones that changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change.")
+        parser.add_argument('--workers', type=int, default=8, help="Concurrent gateway requests.")
+        parser.add_argument('--rate', type=float, default=10, help="Max gateway requests per second (0 = no limit).")
+        parser.add_argument('--batch-size', type=int, default=200, help="Vehicles per page / bulk update.")
+        parser.add_argument('--vehicle', type=int, action='append', dest='vehicle_ids', help="Only these vehicle ids (repeatable).")
+
+    def handle(self, *args, **options):
+        queryset = Vehicle.objects.all()
+        if options['vehicle_ids']:
+            queryset = queryset.filter(id__in=options['vehicle_ids'])
+
+        reconciler = Reconciler(get_gateway(), workers=options['workers'], rate=options['rate'], batch_size=options['batch_size'])
+        report = reconciler.run(queryset, dry_run=options['dry_run'])
+
+        for t in report.transitions:
+            self.stdout.write(f"Vehicle #{t.vehicle_id}: {t.old_status} -> {t.new_status} ({t.reason}, {t.transaction_id})")
+        for vehicle_id, error in report.errors:
+            self.stderr.write(f"Vehicle #{vehicle_id}: {error}")
+
+        self.stdout.write(
+            f"Checked {report.checked}, unchanged {report.unchanged}, skipped {report.skipped}, "
+            f"errors {len(report.errors)}."
+        )
+        for change, count in sorted(report.summary().items()):
+            self.stdout.write(f"  {change}: {count}")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry run: {len(report.transitions)} changes not applied."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Applied {report.applied} of {len(report.transitions)} changes."))
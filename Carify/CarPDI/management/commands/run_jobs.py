@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from CarPDI import jobs
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (BackgroundJob) - Razorpay links, reconciliation, bank verification."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run the jobs that are due now, then exit.")
+        parser.add_argument('--batch', type=int, default=10, help="Jobs run per round (claimed one at a time).")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        worker = jobs.worker_name()
+        self.stdout.write(f"Job worker {worker} started.")
+        total = 0
+        try:
+            while True:
+                close_old_connections()
+                ran = jobs.run_pending(worker, options['batch'])
+                total += ran
+                if not ran:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Job worker {worker} stopped after {total} jobs."))
@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import *
+
+
+# Dropdown / lookup tables used by the inspection form wizard
+MASTER_MODELS = (
+    Status, VehicleFuelType, VehicleTransmission, VehicleEngineType,
+    System, NetworkArea, FluidArea, FluidRange, Parameters, VoltageInference,
+    Performance, PaintArea, TyrePosition, FlushArea, Operations, RubberArea,
+    GlassArea, InteriorArea, InteriorCategory, DocumentType,
+)
+
+# Payload of /api/car/master-data/ : key -> (model, fields)
+BUNDLE_TABLES = {
+    'statuses': (Status, ('id', 'name')),
+    'fuel_types': (VehicleFuelType, ('id', 'name')),
+    'transmissions': (VehicleTransmission, ('id', 'name')),
+    'engine_types': (VehicleEngineType, ('id', 'name')),
+    'systems': (System, ('id', 'name')),
+    'network_areas': (NetworkArea, ('id', 'name')),
+    'fluid_areas': (FluidArea, ('id', 'name')),
+    'fluid_ranges': (FluidRange, ('id', 'name')),
+    'parameters': (Parameters, ('id', 'name')),
+    'inferences': (VoltageInference, ('id', 'voltage', 'engine_state', 'interence', 'recommendation')),
+    'performance_systems': (Performance, ('id', 'name')),
+    'paint_areas': (PaintArea, ('id', 'name')),
+    'tyre_positions': (TyrePosition, ('id', 'name')),
+    'flush_areas': (FlushArea, ('id', 'name')),
+    'operations': (Operations, ('id', 'name')),
+    'rubber_areas': (RubberArea, ('id', 'name')),
+    'glass_areas': (GlassArea, ('id', 'name')),
+    'interior_areas': (InteriorArea, ('id', 'name')),
+    'interior_categories': (InteriorCategory, ('id', 'name')),
+    'document_types': (DocumentType, ('id', 'name')),
+}
+
+# Safety net for setups where the Django cache is not shared between workers
+# (LocMemCache): a worker never serves a table older than this.
+LOCAL_TTL = getattr(settings, 'MASTER_DATA_LOCAL_TTL', 300)
+
+_entries = {}
+_bundle = None
+_lock = threading.Lock()
+
+
+class _Entry:
+    __slots__ = ('version', 'loaded_at', 'rows', 'blobs')
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.rows = rows
+        self.blobs = {}
+
+
+def _version_key(model):
+    return f'masterdata:{model._meta.label_lower}:version'
+
+
+def get_version(model):
+    """Current version token of a table (shared through the Django cache)."""
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(models):
+    """Version tokens of several tables with a single cache round trip."""
+    keys = {_version_key(model): model for model in models}
+    found = cache.get_many(list(keys))
+    if len(found) < len(keys):
+        return [get_version(model) for model in models]
+    return [found[key] for key in keys]
+
+
+def _entry(model):
+    version = get_version(model)
+    entry = _entries.get(model)
+    if entry is None or entry.version != version or time.monotonic() - entry.loaded_at > LOCAL_TTL:
+        entry = _Entry(version, tuple(model.objects.order_by('pk')))
+        with _lock:
+            _entries[model] = entry
+    return entry
+
+
+def _serialize(rows, fields):
+    return [{field: getattr(row, field) for field in fields} for row in rows]
+
+
+def get_rows(model):
+    """All rows of a lookup table, ordered by id. Returns a new list on each call."""
+    return list(_entry(model).rows)
+
+
+def get_json(model, fields=('id', 'name')):
+    """Pre-serialized JSON list of `fields` for every row, e.g. for `statuses_json`."""
+    entry = _entry(model)
+    blob = entry.blobs.get(fields)
+    if blob is None:
+        blob = json.dumps(_serialize(entry.rows, fields))
+        entry.blobs[fields] = blob
+    return blob
+
+
+class Bundle:
+    """All lookup tables as one compact JSON document, plus a gzipped copy and its ETag."""
+    __slots__ = ('versions', 'loaded_at', 'body', 'gzipped', 'etag')
+
+    def __init__(self, versions, body):
+        self.versions = versions
+        self.loaded_at = time.monotonic()
+        self.body = body
+        self.gzipped = gzip.compress(body, mtime=0)
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def get_bundle():
+    """
+    Master-data bundle for API clients. Rebuilt only when one of the tables
+    changes (or LOCAL_TTL passes); the ETag is a hash of the content, so it
+    stays the same across workers and restarts as long as the data does.
+    """
+    global _bundle
+    versions = tuple(get_versions([model for model, _ in BUNDLE_TABLES.values()]))
+    bundle = _bundle
+    if bundle is None or bundle.versions != versions or time.monotonic() - bundle.loaded_at > LOCAL_TTL:
+        payload = {
+            key: _serialize(_entry(model).rows, fields)
+            for key, (model, fields) in BUNDLE_TABLES.items()
+        }
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        bundle = Bundle(versions, body)
+        with _lock:
+            _bundle = bundle
+    return bundle
+
+
+def invalidate(model):
+    """Drop the cached copy of a table here and, via a new version, in every other worker."""
+    cache.set(_version_key(model), uuid.uuid4().hex, None)
+    with _lock:
+        _entries.pop(model, None)
+
+
+def invalidate_on_commit(model):
+    # Once now, and once more after commit so nobody caches a snapshot
+    # taken before the transaction that changed the table was committed.
+    invalidate(model)
+    transaction.on_commit(lambda: invalidate(model))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 06:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+
+def fill_dashboard_stats(apps, schema_editor):
+    Vehicle = apps.get_model('CarPDI', 'Vehicle')
+    Customer = apps.get_model('CarPDI', 'Customer')
+    DashboardDailyStat = apps.get_model('CarPDI', 'DashboardDailyStat')
+    rows = [
+        DashboardDailyStat(
+            date=row['inspection_date'],
+            inspector_id=row['inspected_by_id'],
+            vehicles=row['vehicles'],
+            health_score_total=row['health'] or 0,
+        )
+        for row in Vehicle.objects.order_by().values('inspection_date', 'inspected_by_id').annotate(
+            vehicles=Count('id'), health=Sum('health_score'),
+        )
+    ]
+    customers = Customer.objects.count()
+    if customers:
+        rows.append(DashboardDailyStat(date=timezone.localdate(), inspector=None, customers=customers))
+    DashboardDailyStat.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarPDI', '0015_alter_vehicle_num_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('vehicles', models.IntegerField(default=0)),
+                ('health_score_total', models.FloatField(default=0)),
+                ('customers', models.IntegerField(default=0)),
+                ('inspector', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('inspector__isnull', False)), fields=('date', 'inspector'), name='dailystat_unique_inspector_day'), models.UniqueConstraint(condition=models.Q(('inspector__isnull', True)), fields=('date',), name='dailystat_unique_day')],
+            },
+        ),
+        migrations.RunPython(fill_dashboard_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 06:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarPDI', '0017_backgroundjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('amount', models.PositiveIntegerField()),
+                ('currency', models.CharField(default='INR', max_length=3)),
+                ('state', models.CharField(choices=[('creating', 'Creating'), ('created', 'Created'), ('paid', 'Paid'), ('expired', 'Expired'), ('superseded', 'Superseded'), ('error', 'Error')], default='creating', max_length=10)),
+                ('payment_id', models.CharField(blank=True, max_length=100)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_orders', to='CarPDI.vehicle')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('state__in', ['creating', 'created'])), fields=('vehicle',), name='paymentorder_one_live_per_vehicle')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 09:10
+
+import re
+
+from django.db import migrations
+
+
+TABLE = 'CarPDI_search'
+
+
+def _phones(phone):
+    digits = re.sub(r'\D', '', phone or '')
+    return ' '.join(digits[i:] for i in range(len(digits) - 2))
+
+
+def create_index(apps, schema_editor):
+    # FTS5 is SQLite only - other databases use search.BasicBackend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Customer = apps.get_model('CarPDI', 'Customer')
+    Vehicle = apps.get_model('CarPDI', 'Vehicle')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{TABLE}" USING fts5('
+            "title, body, phones, prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        )
+        # Same documents and rowids as search.FTS5Backend
+        for customer in Customer.objects.iterator(chunk_size=2000):
+            cursor.execute(
+                f'INSERT INTO "{TABLE}" (rowid, title, body, phones) VALUES (%s, %s, %s, %s)',
+                [customer.pk * 2 + 1, customer.name, customer.email, _phones(customer.phone)],
+            )
+        for vehicle in Vehicle.objects.select_related('customer').iterator(chunk_size=2000):
+            customer = vehicle.customer
+            cursor.execute(
+                f'INSERT INTO "{TABLE}" (rowid, title, body, phones) VALUES (%s, %s, %s, %s)',
+                [vehicle.pk * 2, f"{vehicle.model} {vehicle.vin}", f"{customer.name} {customer.email}", _phones(customer.phone)],
+            )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{TABLE}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarPDI', '0020_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 11:30
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def scrub_payloads(apps, schema_editor):
+    # Older bank.verify_details jobs carried the account number in their payload
+    BackgroundJob = apps.get_model('CarPDI', 'BackgroundJob')
+    jobs = BackgroundJob.objects.filter(name='bank.verify_details').exclude(payload__has_key='user_id')
+    jobs.filter(status__in=['queued', 'running']).update(
+        status='failed', error='Cancelled: please submit the bank details again.', locked_until=None, finished_at=timezone.now(),
+    )
+    jobs.update(payload={}, result=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarPDI', '0021_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(scrub_payloads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+def mark_mock_orders(apps, schema_editor):
+    PaymentOrder = apps.get_model('CarPDI', 'PaymentOrder')
+    PaymentOrder.objects.filter(order_id__startswith='order_mock_').update(live=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarPDI', '0022_scrub_bank_job_payloads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentorder',
+            name='live',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(mark_mock_orders, migrations.RunPython.noop),
+    ]
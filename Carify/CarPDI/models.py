@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from User.models import CustomUser
 
 class Customer(models.Model):
@@ -6,6 +9,12 @@ class Customer(models.Model):
     phone=models.CharField(max_length=10)
     email=models.EmailField(max_length=254)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['phone'], name='customer_phone_idx'),
+            models.Index(fields=['email'], name='customer_email_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.email} - {self.phone}"
     
@@ -30,6 +39,17 @@ class VehicleEngineType(models.Model):
     def __str__(self):
         return self.name
 
+class VehicleQuerySet(models.QuerySet):
+    def matching(self, model=None, date=None):
+        """Filters of the inspected-vehicles list: model (contains, any case) and inspection date."""
+        qs = self
+        if model:
+            qs = qs.filter(model__icontains=model)
+        if date:
+            qs = qs.filter(inspection_date=date)
+        return qs
+
+
 class Vehicle(models.Model):
 
     payment_status = models.CharField(max_length=20, choices=[
@@ -59,6 +79,23 @@ class Vehicle(models.Model):
     health_score = models.FloatField()
     is_completed = models.BooleanField(default=False) 
 
+    objects = VehicleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Lists / dashboard feed: ORDER BY inspection_date, id (either direction) and date filters
+            models.Index(fields=['inspection_date', 'id'], name='vehicle_date_idx'),
+            # Per-inspector lists (UserInspectedVehiclesAPI, daily counts)
+            models.Index(fields=['inspected_by', 'inspection_date', 'id'], name='vehicle_inspector_date_idx'),
+            # Latest incomplete vehicle of an inspector (CustomUser.current_open_vehicle)
+            models.Index(fields=['inspected_by', 'inspection_date', 'id'], condition=models.Q(is_completed=False), name='vehicle_open_idx'),
+            # Reconciliation pages through one payment status at a time by id
+            models.Index(fields=['payment_status', 'id'], name='vehicle_payment_status_idx'),
+            # Payment callback / verify lookups
+            models.Index(fields=['payment_link_id'], name='vehicle_payment_link_idx'),
+            models.Index(fields=['transaction_id'], name='vehicle_transaction_idx'),
+        ]
+
 
     def __str__(self):
         return f"{self.model} - {self.model} - {self.vin}"
@@ -249,3 +286,133 @@ class Documentation(models.Model):
     document = models.ForeignKey(DocumentType, on_delete=models.CASCADE)
     status = models.ForeignKey(Status, on_delete=models.CASCADE)
     remark = models.CharField(max_length=200)
+
+
+class DashboardDailyStat(models.Model):
+    """
+    Pre-aggregated dashboard numbers, one row per (day, inspector).
+    Vehicle counts live on the inspector rows; customer counts (net
+    created - deleted that day) on the row with inspector=None.
+    Kept up to date by CarPDI/rollups.py, rebuilt by `rebuild_dashboard_stats`.
+    """
+    date = models.DateField()
+    inspector = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_stats')
+    vehicles = models.IntegerField(default=0)
+    health_score_total = models.FloatField(default=0)
+    customers = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'inspector'], condition=models.Q(inspector__isnull=False), name='dailystat_unique_inspector_day'),
+            models.UniqueConstraint(fields=['date'], condition=models.Q(inspector__isnull=True), name='dailystat_unique_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} | {self.inspector_id or 'all'} | {self.vehicles} vehicles"
+
+
+class BackgroundJob(models.Model):
+    """
+    A unit of work for the `run_jobs` worker (see CarPDI/jobs.py).
+    Used for outbound calls (Razorpay, bank verification) so they don't
+    run inside a request.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    priority = models.SmallIntegerField(default=0)  # higher runs first
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)  # visibility timeout of a running job
+    locked_by = models.CharField(max_length=100, blank=True)
+
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-priority', 'run_after'], condition=models.Q(status__in=['queued', 'running']), name='backgroundjob_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.status}] {self.id}"
+
+
+class PaymentOrder(models.Model):
+    """
+    Every gateway order created for a vehicle (see CarPDI/orders.py).
+    A vehicle has at most one live order ('creating' or 'created') at a time;
+    reloading the payment page reuses it instead of creating another one.
+    Vehicle.transaction_id still holds the current order id (then payment id).
+    """
+    STATE_CHOICES = [
+        ('creating', 'Creating'),      # placeholder while the gateway call is in flight
+        ('created', 'Created'),        # live, can be paid
+        ('paid', 'Paid'),
+        ('expired', 'Expired'),
+        ('superseded', 'Superseded'),  # amount or live/mock mode changed, a new order replaced it
+        ('error', 'Error'),            # gateway call failed
+    ]
+
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='payment_orders')
+    order_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    amount = models.PositiveIntegerField()  # paise
+    currency = models.CharField(max_length=3, default='INR')
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default='creating')
+    # False for the made-up 'order_mock_*' orders of mock mode (IS_RAZORPAY_LIVE off)
+    live = models.BooleanField(default=True)
+    payment_id = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vehicle'], condition=models.Q(state__in=['creating', 'created']), name='paymentorder_one_live_per_vehicle'),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id or '-'} | vehicle {self.vehicle_id} | {self.state}"
+
+
+class ReportExport(models.Model):
+    """
+    A zip of PDF reports for many vehicles (see CarPDI/exports.py),
+    built by the job worker. `done`/`total` is the progress.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    total = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+    failed_vehicles = models.JSONField(default=list, blank=True)
+    file_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Export {self.id} [{self.status}] {self.done}/{self.total}"
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import PaymentOrder
+
+
+# Seconds a client should wait before retrying after OrderInProgress
+RETRY_AFTER = 2
+
+# How long a created order is offered again before a fresh one is made (seconds)
+ORDER_TTL = getattr(settings, 'PAYMENT_ORDER_TTL', 30 * 60)
+
+# A 'creating' placeholder older than this belongs to a request that died
+CREATING_TIMEOUT = 60
+
+LIVE_STATES = ('creating', 'created')
+
+
+class OrderInProgress(Exception):
+    """Another request is creating the order for this vehicle right now."""
+
+
+def _retire(order, now):
+    if order.state == 'creating':
+        new_state = 'error'
+    elif order.expires_at <= now:
+        new_state = 'expired'
+    else:
+        new_state = 'superseded'
+    PaymentOrder.objects.filter(pk=order.pk, state=order.state).update(state=new_state)
+
+
+def get_or_create_order(vehicle, create, amount=None, currency='INR', user=None, live=True):
+    """
+    The vehicle's live order, or a new one. Returns (PaymentOrder, created).
+
+    `create(data)` makes the order at the gateway (e.g. get_gateway().create_order)
+    and is only called when there is no reusable order: same amount, same
+    mode (`live=False` for mock orders), not expired. Concurrent requests for the same vehicle are serialized by the
+    one-live-order-per-vehicle constraint - the loser raises OrderInProgress
+    right away (views answer 409 + Retry-After) instead of holding a worker
+    while the winner talks to the gateway.
+    Every attempt, including failed gateway calls, stays in PaymentOrder.
+    """
+    if amount is None:
+        amount = int(vehicle.payment_amount * 100)
+
+    for _ in range(3):
+        now = timezone.now()
+        order = PaymentOrder.objects.filter(vehicle=vehicle, state__in=LIVE_STATES).first()
+
+        if order is not None:
+            if (order.state == 'created' and order.amount == amount and order.currency == currency
+                    and order.live == live and order.expires_at > now):
+                # Also after a failed attempt at the same order - the customer is paying again
+                if vehicle.transaction_id != order.order_id or vehicle.payment_status != 'pending':
+                    vehicle.transaction_id = order.order_id
+                    vehicle.payment_status = 'pending'
+                    vehicle.save()
+                return order, False
+            if order.state == 'creating' and order.created_at > now - timedelta(seconds=CREATING_TIMEOUT):
+                raise OrderInProgress(f"Order for vehicle {vehicle.id} is being created.")
+            _retire(order, now)
+
+        try:
+            with transaction.atomic():
+                placeholder = PaymentOrder.objects.create(
+                    vehicle=vehicle, amount=amount, currency=currency, state='creating', live=live,
+                    created_by=user if user is not None and user.is_authenticated else None,
+                    expires_at=now + timedelta(seconds=ORDER_TTL),
+                )
+            break
+        except IntegrityError:
+            # Lost the race: the next round reads the winner's row
+            continue
+    else:
+        raise OrderInProgress(f"Order for vehicle {vehicle.id} is being created.")
+
+    # Gateway call outside any transaction / row lock
+    try:
+        data = create({
+            "amount": amount,
+            "currency": currency,
+            "receipt": f"vehicle-{vehicle.id}-{placeholder.pk}",
+            "payment_capture": '1'  # Auto capture
+        })
+    except Exception as e:
+        PaymentOrder.objects.filter(pk=placeholder.pk).update(state='error', error=f"{type(e).__name__}: {e}")
+        raise
+
+    placeholder.order_id = data['id']
+    placeholder.state = 'created'
+    placeholder.expires_at = timezone.now() + timedelta(seconds=ORDER_TTL)
+    placeholder.save(update_fields=['order_id', 'state', 'expires_at'])
+
+    vehicle.transaction_id = placeholder.order_id
+    vehicle.payment_status = 'pending'
+    vehicle.save()
+    return placeholder, True
+
+
+def mark_paid(order_id, payment_id):
+    """Record a verified payment against its order."""
+    return PaymentOrder.objects.filter(order_id=order_id).exclude(state='paid').update(state='paid', payment_id=payment_id)
@@ -0,0 +1,169 @@
+import base64
+import hashlib
+import json
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# Seconds a counted total is reused for the same filters (?count=estimate)
+COUNT_CACHE_TTL = getattr(settings, 'VEHICLE_COUNT_CACHE_TTL', 300)
+
+
+def estimated_count(queryset):
+    """
+    Total rows of `queryset`, cheap but possibly a little stale: the planner's
+    row estimate for a whole table on PostgreSQL, otherwise a COUNT(*) that
+    is cached for COUNT_CACHE_TTL per distinct query.
+    """
+    model = queryset.model
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = 'rowcount:' + hashlib.sha256(f'{sql}|{params!r}'.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.order_by().count()
+        cache.set(key, count, COUNT_CACHE_TTL)
+    return count
+
+
+class VehicleKeysetPagination(BasePagination):
+    """
+    Seek pagination over vehicles, newest inspection first, ordered by
+    (inspection_date, id). The cursor holds the last row's (date, id), so
+    every page is an index range - no OFFSET, no matter how deep - and rows
+    sharing a date (a whole day of inspections) never cost an offset either,
+    unlike DRF's CursorPagination, which only keys on the first field.
+
+    Query params: `cursor` (opaque, from `next` / `previous`), `page_size`,
+    `count` = 'none' (default) | 'estimate' | 'exact'.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    default_count = 'none'
+
+    @classmethod
+    def requested(cls, request):
+        """True when the client asked for cursor pages (?pagination=cursor or a cursor)."""
+        return request.query_params.get('pagination') == 'cursor' or cls.cursor_query_param in request.query_params
+
+    # --- cursors ---
+
+    def encode_cursor(self, vehicle, reverse):
+        payload = {'d': vehicle.inspection_date.isoformat(), 'i': vehicle.id}
+        if reverse:
+            payload['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            return date.fromisoformat(payload['d']), int(payload['i']), bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound("Invalid cursor")
+
+    # --- paging ---
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor[2])
+
+        count_mode = request.query_params.get(self.count_query_param, self.default_count)
+        self.count = None
+        self.count_is_estimate = False
+        if count_mode == 'exact':
+            self.count = queryset.order_by().count()
+        elif count_mode == 'estimate':
+            self.count = estimated_count(queryset)
+            self.count_is_estimate = True
+
+        if cursor is None:
+            qs = queryset.order_by('-inspection_date', '-id')
+        elif not self.reverse:
+            day, pk, _ = cursor
+            qs = queryset.filter(Q(inspection_date__lt=day) | Q(inspection_date=day, id__lt=pk)).order_by('-inspection_date', '-id')
+        else:
+            day, pk, _ = cursor
+            qs = queryset.filter(Q(inspection_date__gt=day) | Q(inspection_date=day, id__gt=pk)).order_by('inspection_date', 'id')
+
+        # One extra row tells whether there is another page in this direction
+        rows = list(qs[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+        self.page = rows
+
+        if self.reverse:
+            self.has_next, self.has_previous = bool(rows), more
+        else:
+            self.has_next, self.has_previous = more, cursor is not None and bool(rows)
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def page_data(self, results):
+        return {
+            "count": self.count,
+            "count_is_estimate": self.count_is_estimate,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": results,
+        }
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+
+def page_data(paginator, results):
+    """The "data" block of a paginated vehicle list, for either pagination mode."""
+    if isinstance(paginator, VehicleKeysetPagination):
+        return paginator.page_data(results)
+    return {
+        "count": paginator.page.paginator.count,
+        "next": paginator.get_next_link(),
+        "previous": paginator.get_previous_link(),
+        "results": results,
+    }
@@ -0,0 +1,31 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+def payment_group(vehicle_id):
+    return f'payment_status_{vehicle_id}'
+
+
+def payment_status_message(vehicle):
+    return {
+        "vehicle_id": vehicle.id,
+        "payment_status": vehicle.payment_status,
+        "transaction_id": vehicle.transaction_id,
+        "payment_amount": vehicle.payment_amount,
+    }
+
+
+def publish_payment_status(vehicle, previous_status=None):
+    """Push the vehicle's payment status to everyone subscribed to it (after commit)."""
+    message = payment_status_message(vehicle)
+    message["previous_status"] = previous_status
+
+    def send():
+        channel_layer = get_channel_layer()
+        if channel_layer is not None:
+            async_to_sync(channel_layer.group_send)(
+                payment_group(vehicle.id), {"type": "payment.status", "data": message}
+            )
+
+    transaction.on_commit(send)
@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+import uuid
+
+import razorpay
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .verification import order_signature, verify_order_signature
+
+
+# (connect, read) seconds for every Razorpay call
+DEFAULT_TIMEOUT = (3.05, 10)
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of normal traffic, so a Razorpay outage
+    doesn't turn into a retry storm: every call earns `ratio` of a retry,
+    every retry spends one, and at most `max_tokens` can be saved up.
+    """
+
+    def __init__(self, ratio=0.2, max_tokens=10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def spend(self):
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class RazorpayGateway:
+    """
+    Process-wide Razorpay adapter: one pooled keep-alive session (no new
+    TLS handshake per request), a timeout on every call, and bounded
+    retries with jitter for calls that are safe to repeat (fetches).
+    Creates are never retried - a retried create can charge twice.
+    """
+
+    RETRYABLE = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, razorpay.errors.ServerError)
+
+    def __init__(self, key_id, key_secret, timeout=DEFAULT_TIMEOUT, max_retries=2, backoff=0.2, pool_size=10):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        self.client = razorpay.Client(session=session, auth=(key_id, key_secret))
+        self.key_id = key_id
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.budget = RetryBudget()
+
+    def _call(self, method, *args, idempotent=False):
+        attempt = 0
+        while True:
+            try:
+                result = method(*args, timeout=self.timeout)
+                self.budget.earn()
+                return result
+            except self.RETRYABLE:
+                if not idempotent or attempt >= self.max_retries or not self.budget.spend():
+                    raise
+                # Exponential backoff with full jitter
+                time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+                attempt += 1
+
+    # --- Orders / payments ---
+
+    def create_order(self, data):
+        return self._call(self.client.order.create, data)
+
+    def fetch_order(self, order_id):
+        return self._call(self.client.order.fetch, order_id, idempotent=True)
+
+    def fetch_payment(self, payment_id):
+        return self._call(self.client.payment.fetch, payment_id, idempotent=True)
+
+    def fetch_order_payments(self, order_id):
+        return self._call(self.client.order.payments, order_id, idempotent=True)
+
+    # --- Payment links ---
+
+    def create_payment_link(self, data):
+        return self._call(self.client.payment_link.create, data)
+
+    def fetch_payment_link(self, link_id):
+        return self._call(self.client.payment_link.fetch, link_id, idempotent=True)
+
+    # --- Signatures (local HMAC, no HTTP) ---
+
+    def verify_payment_signature(self, params):
+        """Raises razorpay.errors.SignatureVerificationError if it doesn't match."""
+        return self.client.utility.verify_payment_signature(params)
+
+
+class FakeGateway:
+    """
+    In-memory stand-in for RazorpayGateway (PAYMENT_GATEWAY = 'fake').
+    Same methods and return shapes, no network. Signatures are real HMACs
+    with the configured secret, so sign_payment() output passes verification.
+    """
+
+    def __init__(self, key_id, key_secret, **kwargs):
+        self.key_id = key_id
+        self.key_secret = key_secret
+        self.orders = {}
+        self.payment_links = {}
+        self.payments = {}
+
+    def _id(self, prefix):
+        return f'{prefix}_fake{uuid.uuid4().hex[:14]}'
+
+    def create_order(self, data):
+        order = dict(data, id=self._id('order'), status='created', entity='order')
+        self.orders[order['id']] = order
+        return order
+
+    def fetch_order(self, order_id):
+        return self.orders[order_id]
+
+    def fetch_payment(self, payment_id):
+        return self.payments[payment_id]
+
+    def fetch_order_payments(self, order_id):
+        items = [payment for payment in self.payments.values() if payment['order_id'] == order_id]
+        return {'entity': 'collection', 'count': len(items), 'items': items}
+
+    def create_payment_link(self, data):
+        link_id = self._id('plink')
+        link = dict(data, id=link_id, status='created', short_url=f'https://rzp.io/i/{link_id}')
+        self.payment_links[link_id] = link
+        return link
+
+    def fetch_payment_link(self, link_id):
+        return self.payment_links[link_id]
+
+    def sign_payment(self, order_id, payment_id):
+        return order_signature(order_id, payment_id, self.key_secret)
+
+    def pay(self, order_id):
+        """Simulate the customer paying an order; returns the checkout callback params."""
+        payment_id = self._id('pay')
+        self.orders[order_id]['status'] = 'paid'
+        self.payments[payment_id] = {'id': payment_id, 'order_id': order_id, 'status': 'captured'}
+        return {
+            'razorpay_order_id': order_id,
+            'razorpay_payment_id': payment_id,
+            'razorpay_signature': self.sign_payment(order_id, payment_id),
+        }
+
+    def verify_payment_signature(self, params):
+        if not verify_order_signature(params['razorpay_order_id'], params['razorpay_payment_id'],
+                                      params.get('razorpay_signature'), self.key_secret):
+            raise razorpay.errors.SignatureVerificationError('Razorpay Signature Verification Failed')
+        return True
+
+
+GATEWAYS = {
+    'razorpay': RazorpayGateway,
+    'fake': FakeGateway,
+}
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """The shared gateway for this process (class picked by settings.PAYMENT_GATEWAY)."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                gateway_class = GATEWAYS[getattr(settings, 'PAYMENT_GATEWAY', 'razorpay')]
+                _gateway = gateway_class(
+                    settings.RAZORPAY_KEY_ID,
+                    settings.RAZORPAY_KEY_SECRET,
+                    timeout=getattr(settings, 'PAYMENT_GATEWAY_TIMEOUT', DEFAULT_TIMEOUT),
+                )
+    return _gateway
+
+
+def reset_gateway():
+    """Drop the shared gateway, e.g. after changing settings in tests."""
+    global _gateway
+    with _gateway_lock:
+        _gateway = None
@@ -0,0 +1,185 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .reports import REPORT_SECTIONS, load_vehicle_report
+
+
+# Bump when the layout below changes, so every cached PDF is rendered again
+LAYOUT_VERSION = 1
+
+CACHE_DIR = getattr(settings, 'REPORT_PDF_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'reports', 'pdf'))
+
+
+def _text(value):
+    if value is None:
+        return '-'
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    return str(value)
+
+
+def _rows(objs):
+    """(headers, rows) for a report section: every field except id/vehicle, lookups by name."""
+    if not objs:
+        return [], []
+    fields = [f for f in objs[0]._meta.concrete_fields if f.name not in ('id', 'vehicle')]
+    headers = [f.verbose_name.title() for f in fields]
+    rows = [[_text(getattr(obj, f.name)) for f in fields] for obj in objs]
+    return headers, rows
+
+
+def report_content(report):
+    """
+    Everything that ends up in the PDF, as plain strings. Its hash is the
+    cache key, so any change to the vehicle, customer, OBD reading, a section
+    row or a lookup name gives a new PDF - no signal bookkeeping needed
+    (SectionBatch uses bulk_create, which sends no post_save anyway).
+    """
+    vehicle, customer, obd = report.vehicle, report.customer, report.obd
+    content = {
+        'layout': LAYOUT_VERSION,
+        'title': f"Inspection Report - {vehicle.model}",
+        'details': [
+            ['Customer', _text(customer.name), 'Phone', _text(customer.phone)],
+            ['Email', _text(customer.email), 'Inspection Date', _text(vehicle.inspection_date)],
+            ['Model', _text(vehicle.model), 'VIN', _text(vehicle.vin)],
+            ['Fuel', _text(vehicle.fuel_type), 'Transmission', _text(vehicle.transmission)],
+            ['Engine', f"{_text(vehicle.engine_type)} / {_text(vehicle.engine_cc)} cc", 'BHP', _text(vehicle.bhp)],
+            ['Health Score', _text(vehicle.health_score), 'Inspected By', _text(vehicle.inspected_by)],
+        ],
+        'sections': [],
+    }
+    if obd is not None:
+        headers, rows = _rows([obd])
+        content['sections'].append(['OBD Readings', headers, rows])
+    for key, _, _ in REPORT_SECTIONS:
+        headers, rows = _rows(report.sections[key])
+        content['sections'].append([key.replace('_', ' ').title(), headers, rows])
+    return content
+
+
+def content_hash(content):
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def render(content, out):
+    """Write the PDF for `content` (see report_content) to the file object `out`."""
+    styles = getSampleStyleSheet()
+    cell = styles['BodyText'].clone('cell', fontSize=8, leading=10)
+    head = cell.clone('head', fontName='Helvetica-Bold', textColor=colors.white)
+
+    def table(headers, rows, widths=None):
+        data = ([[Paragraph(escape(h), head) for h in headers]] if headers else []) + [[Paragraph(escape(c), cell) for c in row] for row in rows]
+        t = Table(data, colWidths=widths, repeatRows=1 if headers else 0)
+        commands = [
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]
+        if headers:
+            commands.append(('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f3b57')))
+        t.setStyle(TableStyle(commands))
+        return t
+
+    story = [
+        Paragraph(escape(content['title']), styles['Title']),
+        table([], content['details'], widths=[30 * mm, 55 * mm, 30 * mm, 55 * mm]),
+    ]
+    for title, headers, rows in content['sections']:
+        story.append(Spacer(1, 6 * mm))
+        story.append(Paragraph(title, styles['Heading3']))
+        story.append(table(headers, rows) if rows else Paragraph('No data recorded.', cell))
+
+    doc = SimpleDocTemplate(out, pagesize=A4, leftMargin=15 * mm, rightMargin=15 * mm,
+                            topMargin=15 * mm, bottomMargin=15 * mm, title=content['title'])
+    doc.build(story)
+
+
+def _pattern(vehicle_id):
+    return os.path.join(CACHE_DIR, f'vehicle-{vehicle_id}-*.pdf')
+
+
+def discard(vehicle_id, keep=None):
+    """Delete every cached PDF of a vehicle (except the file `keep`)."""
+    for path in glob.glob(_pattern(vehicle_id)):
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def get_report_pdf(vehicle_id):
+    """
+    (path, version) of the vehicle's PDF report, rendered only if the
+    report content changed since the cached copy. Raises Http404 for an
+    unknown vehicle.
+    """
+    report = load_vehicle_report(vehicle_id)
+    content = report_content(report)
+    version = content_hash(content)
+    path = os.path.join(CACHE_DIR, f'vehicle-{vehicle_id}-{version[:20]}.pdf')
+    if os.path.exists(path):
+        return path, version
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Render to a temp file and rename, so nobody ever reads a half-written PDF
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            render(content, out)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    # Only older versions go - `path` may be open in a concurrent request
+    discard(vehicle_id, keep=path)
+    return path, version
+
+
+def open_report_pdf(vehicle_id):
+    """
+    (file, version) of the vehicle's PDF, opened for reading. If the cached
+    file disappears between the check and open() (a newer version replaced
+    it meanwhile), it is treated as a cache miss and rendered again.
+    """
+    for attempt in range(3):
+        path, version = get_report_pdf(vehicle_id)
+        try:
+            return open(path, 'rb'), version
+        except FileNotFoundError:
+            if attempt == 2:
+                raise
+
+
+def report_pdf_response(request, vehicle_id):
+    """FileResponse streaming the cached PDF (?download=1 for an attachment), 304 if unchanged."""
+    pdf_file, version = open_report_pdf(vehicle_id)
+    etag = f'"{version[:32]}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        pdf_file.close()
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            pdf_file,
+            content_type='application/pdf',
+            as_attachment=request.GET.get('download') == '1',
+            filename=f'inspection-report-{vehicle_id}.pdf',
+        )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
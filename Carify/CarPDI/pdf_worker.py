@@ -0,0 +1,14 @@
+# Entry points of the report-rendering worker processes (CarPDI/exports.py).
+# No Django imports at module level: a spawned worker imports this module
+# before django.setup() has run.
+
+
+def init():
+    import django
+    django.setup()
+
+
+def render(vehicle_id):
+    from .pdf import get_report_pdf
+    path, _ = get_report_pdf(vehicle_id)
+    return path
@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from User.models import UserRole  # User app se UserRole model import karo
+from User.permission import has_any_role  # cached roles (request memo + shared cache)
 
 class IsStaffOrManager(permissions.BasePermission):
     """
@@ -16,12 +16,6 @@ class IsStaffOrManager(permissions.BasePermission):
             return True
 
         # 3. Check karo ki user ke paas 'Manager' ya 'Staff' role hai ya nahi
-        # Hum check kar rahe hain ki UserRole table mein entry hai ya nahi
         allowed_roles = ['Admin', 'Manager', 'Staff', 'Superuser']
-        
-        has_role = UserRole.objects.filter(
-            user=request.user, 
-            role__name__in=allowed_roles
-        ).exists()
 
-        return has_role
\ No newline at end of file
+        return has_any_role(request.user, allowed_roles)
\ No newline at end of file
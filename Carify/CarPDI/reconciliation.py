@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from .models import Vehicle
+from .orders import mark_paid
+from .payment_events import publish_payment_status
+
+
+# Vehicles whose payment isn't settled yet ('created' = payment link sent)
+OPEN_STATUSES = ('pending', 'created')
+
+# Razorpay payment link status -> our payment_status
+LINK_STATUS_MAP = {
+    'paid': 'success',
+    'expired': 'failed',
+    'cancelled': 'failed',
+}
+
+
+@dataclass(frozen=True)
+class Transition:
+    vehicle_id: int
+    old_status: str
+    new_status: str
+    transaction_id: str
+    reason: str              # for the report only - never branch on it
+    order_paid: bool = False  # a captured payment on our Razorpay order: mark the PaymentOrder paid
+
+
+@dataclass
+class Report:
+    checked: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    applied: int = 0
+    transitions: list = field(default_factory=list)
+    errors: list = field(default_factory=list)  # (vehicle_id, message)
+
+    def summary(self):
+        """{'pending -> success': 3, ...}"""
+        return Counter(f'{t.old_status} -> {t.new_status}' for t in self.transitions)
+
+
+class RateLimiter:
+    """Spaces calls out to at most `rate` per second across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def link_transition(link):
+    """(new_status, payment_id) for a fetched payment link, or (None, None) if still open."""
+    new_status = LINK_STATUS_MAP.get(link.get('status'))
+    payments = link.get('payments') or []
+    payment_id = payments[-1]['payment_id'] if payments else None
+    return new_status, payment_id
+
+
+def _is_mock(value):
+    return bool(value) and '_mock_' in value
+
+
+class Reconciler:
+    """
+    Checks open vehicle payments against the gateway and settles them:
+
+        report = Reconciler(get_gateway(), workers=8, rate=10).run(dry_run=True)
+
+    Vehicles are read in pages of `batch_size` (keyset on id); each page is
+    checked with `workers` concurrent gateway calls (at most `rate` per
+    second in total) and its transitions are written with one bulk_update.
+    """
+
+    def __init__(self, gateway, workers=8, rate=10, batch_size=200):
+        self.gateway = gateway
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.batch_size = batch_size
+
+    def pages(self, queryset=None):
+        queryset = queryset if queryset is not None else Vehicle.objects.all()
+        queryset = queryset.order_by('id').only('id', 'payment_status', 'transaction_id', 'payment_link_id')
+        # One status at a time: (payment_status = X AND id > last) is a range on vehicle_payment_status_idx
+        for payment_status in OPEN_STATUSES:
+            last_id = 0
+            while True:
+                page = list(queryset.filter(payment_status=payment_status, id__gt=last_id)[:self.batch_size])
+                if not page:
+                    break
+                yield page
+                last_id = page[-1].id
+
+    def _fetch(self, func, *args):
+        self.limiter.wait()
+        return func(*args)
+
+    def check(self, vehicle):
+        """Transition for one vehicle, or None if the gateway agrees it's still open."""
+        if vehicle.payment_link_id:
+            link = self._fetch(self.gateway.fetch_payment_link, vehicle.payment_link_id)
+            new_status, payment_id = link_transition(link)
+            if new_status is None:
+                return None
+            return Transition(vehicle.id, vehicle.payment_status, new_status,
+                              payment_id or vehicle.transaction_id, f"link {link.get('status')}")
+
+        order_id = vehicle.transaction_id
+        order = self._fetch(self.gateway.fetch_order, order_id)
+        if order.get('status') != 'paid':
+            return None
+        payments = self._fetch(self.gateway.fetch_order_payments, order_id).get('items', [])
+        captured = [payment['id'] for payment in payments if payment.get('status') == 'captured']
+        if not captured:
+            return None
+        return Transition(vehicle.id, vehicle.payment_status, 'success', captured[-1], "order paid", order_paid=True)
+
+    def _check_page(self, page, pool, report):
+        checkable = []
+        for vehicle in page:
+            # Mock-mode ids and vehicles with nothing to look up can't be checked
+            if _is_mock(vehicle.payment_link_id) or (
+                not vehicle.payment_link_id
+                and (_is_mock(vehicle.transaction_id) or not (vehicle.transaction_id or '').startswith('order_'))
+            ):
+                report.skipped += 1
+            else:
+                checkable.append(vehicle)
+
+        futures = [(vehicle, pool.submit(self.check, vehicle)) for vehicle in checkable]
+        transitions = []
+        for vehicle, future in futures:
+            report.checked += 1
+            try:
+                transition = future.result()
+            except Exception as e:
+                report.errors.append((vehicle.id, f"{type(e).__name__}: {e}"))
+                continue
+            if transition is None:
+                report.unchanged += 1
+            else:
+                transitions.append(transition)
+        return transitions
+
+    def apply(self, transitions):
+        """Write transitions with one bulk_update. Vehicles that changed meanwhile are left alone."""
+        if not transitions:
+            return 0
+        by_id = {t.vehicle_id: t for t in transitions}
+        with transaction.atomic():
+            vehicles = list(
+                Vehicle.objects.select_for_update()
+                .filter(id__in=by_id, payment_status__in=OPEN_STATUSES)
+                .only('id', 'payment_status', 'transaction_id', 'payment_amount')
+            )
+            vehicles = [v for v in vehicles if v.payment_status == by_id[v.id].old_status]
+            for vehicle in vehicles:
+                transition = by_id[vehicle.id]
+                if transition.order_paid:
+                    mark_paid(vehicle.transaction_id, transition.transaction_id)
+                vehicle.payment_status = transition.new_status
+                vehicle.transaction_id = transition.transaction_id
+            Vehicle.objects.bulk_update(vehicles, ['payment_status', 'transaction_id'])
+            # bulk_update skips post_save, so push the websocket updates here
+            for vehicle in vehicles:
+                publish_payment_status(vehicle, by_id[vehicle.id].old_status)
+        return len(vehicles)
+
+    def run(self, queryset=None, dry_run=False):
+        report = Report()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='reconcile') as pool:
+            for page in self.pages(queryset):
+                transitions = self._check_page(page, pool, report)
+                report.transitions.extend(transitions)
+                if not dry_run:
+                    report.applied += self.apply(transitions)
+        return report
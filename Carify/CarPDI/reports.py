@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+
+from .models import *
+
+
+# --- Report sections ---
+# (context key, child model, lookup FKs to select_related)
+# Order here is the order the sections appear on the printed report.
+REPORT_SECTIONS = (
+    ('system_checks', SystemCheck, ('system', 'status')),
+    ('network_systems', NetworkSystem, ('area', 'status')),
+    ('fluid_levels', FluidLevel, ('area', 'in_range', 'contamination')),
+    ('live_parameters', LiveParameters, ('system', 'interence')),
+    ('performance_checks', PerformanceCheck, ('system', 'status')),
+    ('paint_finishes', PaintFinish, ('area', 'condition')),
+    ('tyre_conditions', TyreCondition, ('position', 'condition')),
+    ('flush_gaps', FlushGap, ('area', 'operation')),
+    ('rubber_components', RubberComponent, ('area', 'condition')),
+    ('glass_components', GlassComponent, ('area', 'condition')),
+    ('interior_components', InteriorComponent, ('category', 'area', 'condition')),
+    ('documentations', Documentation, ('document', 'status')),
+)
+
+
+def _row_to_dict(obj):
+    """
+    Same keys as `.values()` (e.g. 'status_id'), plus a '<fk>_name' entry for
+    every lookup FK so API clients don't need a second round trip for labels.
+    """
+    data = {field.attname: getattr(obj, field.attname) for field in obj._meta.concrete_fields}
+    for field in obj._meta.concrete_fields:
+        if field.is_relation and field.name != 'vehicle':
+            related = getattr(obj, field.name)
+            data[f'{field.name}_name'] = str(related) if related is not None else None
+    return data
+
+
+@dataclass(frozen=True)
+class VehicleReport:
+    """
+    Fully loaded inspection report for one vehicle.
+    Sections are tuples, so the report can be shared safely between the
+    HTML print view and the JSON API without anyone mutating it.
+    """
+    vehicle: Vehicle
+    customer: Customer
+    obd: OBDReading
+    sections: MappingProxyType
+
+    def __getattr__(self, name):
+        # report.system_checks, report.flush_gaps ...
+        try:
+            return self.__dict__['sections'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def as_context(self):
+        """Template context for car/print.html"""
+        context = {
+            'vehicle': self.vehicle,
+            'customer': self.customer,
+            'obd': self.obd,
+        }
+        context.update(self.sections)
+        return context
+
+    def as_dict(self):
+        """JSON-ready payload for VehicleReportAPI"""
+        vehicle = self.vehicle
+        data = {
+            "vehicle_details": {
+                "id": vehicle.id,
+                "model": vehicle.model,
+                "inspection_date": vehicle.inspection_date,
+                "vin": vehicle.vin,
+            },
+            "obd_readings": [_row_to_dict(self.obd)] if self.obd else [],
+        }
+        for key, rows in self.sections.items():
+            data[key] = [_row_to_dict(row) for row in rows]
+        return data
+
+
+def vehicle_report_queryset():
+    """
+    Vehicle queryset with every report section prefetched.
+    1 query for the vehicle (+ customer, lookups, OBD) and 1 per section,
+    no matter how many rows each section has.
+    """
+    prefetches = [
+        Prefetch(
+            f'{model._meta.model_name}_set',
+            queryset=model.objects.select_related(*lookups).order_by('id'),
+            to_attr=f'_report_{key}',
+        )
+        for key, model, lookups in REPORT_SECTIONS
+    ]
+    return Vehicle.objects.select_related(
+        'customer', 'fuel_type', 'transmission', 'engine_type', 'inspected_by', 'obdreading'
+    ).prefetch_related(*prefetches)
+
+
+def build_report(vehicle):
+    """Wrap a vehicle loaded through vehicle_report_queryset() in a VehicleReport."""
+    try:
+        obd = vehicle.obdreading
+    except OBDReading.DoesNotExist:
+        obd = None
+
+    sections = {
+        key: tuple(getattr(vehicle, f'_report_{key}'))
+        for key, _, _ in REPORT_SECTIONS
+    }
+    return VehicleReport(
+        vehicle=vehicle,
+        customer=vehicle.customer,
+        obd=obd,
+        sections=MappingProxyType(sections),
+    )
+
+
+def load_vehicle_report(vehicle_id):
+    """Fetch a vehicle and all its inspection sections, or raise Http404."""
+    vehicle = get_object_or_404(vehicle_report_queryset(), id=vehicle_id)
+    return build_report(vehicle)
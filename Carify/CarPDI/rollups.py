@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Customer, DashboardDailyStat, Vehicle
+
+
+def _bump(date, inspector_id, **deltas):
+    """Add `deltas` to one rollup row, creating it if needed (never for a pure decrement)."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas or date is None:
+        return
+    rows = DashboardDailyStat.objects.filter(date=date, inspector_id=inspector_id)
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if rows.update(**updates):
+        return
+    if all(delta < 0 for delta in deltas.values()):
+        # Row already gone (e.g. the inspector was deleted) - nothing to take away from
+        return
+    try:
+        with transaction.atomic():
+            DashboardDailyStat.objects.create(date=date, inspector_id=inspector_id, **deltas)
+    except IntegrityError:
+        # Created concurrently by another request
+        rows.update(**updates)
+
+
+# --- Vehicle ---
+
+def vehicle_snapshot(vehicle):
+    """(day, inspector, health score) the vehicle currently counts towards."""
+    # __dict__ so deferred fields never trigger a query from post_init
+    data = vehicle.__dict__
+    return (data.get('inspection_date'), data.get('inspected_by_id'), data.get('health_score') or 0)
+
+
+def vehicle_saved(vehicle, created):
+    old = getattr(vehicle, '_stat_snapshot', None)
+    new = vehicle_snapshot(vehicle)
+    if created or old is None:
+        _bump(new[0], new[1], vehicles=1, health_score_total=new[2])
+    elif old != new:
+        _bump(old[0], old[1], vehicles=-1, health_score_total=-old[2])
+        _bump(new[0], new[1], vehicles=1, health_score_total=new[2])
+    vehicle._stat_snapshot = new
+
+
+def vehicle_deleted(vehicle):
+    old = getattr(vehicle, '_stat_snapshot', None) or vehicle_snapshot(vehicle)
+    _bump(old[0], old[1], vehicles=-1, health_score_total=-old[2])
+
+
+# --- Customer ---
+
+def customer_created():
+    _bump(timezone.localdate(), None, customers=1)
+
+
+def customer_deleted():
+    _bump(timezone.localdate(), None, customers=-1)
+
+
+# --- Reading ---
+
+def dashboard_totals(recent_days=7):
+    """
+    Totals for the dashboard cards from the rollup table - O(days x inspectors)
+    rows, independent of how many vehicles exist.
+    """
+    since = timezone.localdate() - timedelta(days=recent_days)
+    totals = DashboardDailyStat.objects.aggregate(
+        total_vehicles=Sum('vehicles'),
+        health=Sum('health_score_total'),
+        total_customers=Sum('customers'),
+        recent=Sum('vehicles', filter=Q(date__gte=since)),
+    )
+    vehicles = totals['total_vehicles'] or 0
+    return {
+        'total_vehicles': vehicles,
+        'total_customers': totals['total_customers'] or 0,
+        'avg_health_score': (totals['health'] or 0) / vehicles if vehicles else 0,
+        'recent_inspections': totals['recent'] or 0,
+    }
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute the whole table from Vehicle and Customer. Returns the number of rows written."""
+    DashboardDailyStat.objects.all().delete()
+    rows = [
+        DashboardDailyStat(
+            date=row['inspection_date'],
+            inspector_id=row['inspected_by_id'],
+            vehicles=row['vehicles'],
+            health_score_total=row['health'] or 0,
+        )
+        for row in Vehicle.objects.order_by().values('inspection_date', 'inspected_by_id').annotate(
+            vehicles=Count('id'), health=Sum('health_score'),
+        )
+    ]
+    # Customers have no created date - the current total is booked on today
+    customers = Customer.objects.count()
+    if customers:
+        rows.append(DashboardDailyStat(date=timezone.localdate(), inspector=None, customers=customers))
+    DashboardDailyStat.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .consumers import PaymentStatusConsumer
+
+websocket_urlpatterns = [
+    path('ws/payment/status/<int:vehicle_id>/', PaymentStatusConsumer.as_asgi()),
+]
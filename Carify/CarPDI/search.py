@@ -0,0 +1,222 @@
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Customer, Vehicle
+
+
+# FTS5 table, created by migration 0021_search_index (SQLite only)
+FTS_TABLE = 'CarPDI_search'
+
+# Shortest run of digits that counts as a partial phone number
+MIN_PHONE_DIGITS = 3
+
+# Words of a query that are used, the rest is ignored
+MAX_TERMS = 8
+
+KINDS = ('vehicle', 'customer')
+
+
+@dataclass(frozen=True)
+class Hit:
+    kind: str
+    id: int
+    score: float
+
+
+def terms(query):
+    """Lower-cased words of a search query (letters/digits only, so safe in an FTS query)."""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def phone_suffixes(phone):
+    """
+    Every tail of the phone's digits, e.g. '98765' -> '98765 8765 765'.
+    A prefix query on these tokens matches any part of the number, so
+    "4321" or "6543" both find 9876543210.
+    """
+    digits = re.sub(r'\D', '', phone or '')
+    return ' '.join(digits[i:] for i in range(len(digits) - MIN_PHONE_DIGITS + 1))
+
+
+def vehicle_document(vehicle):
+    customer = vehicle.customer
+    return {
+        'title': f"{vehicle.model} {vehicle.vin}",
+        'body': f"{customer.name} {customer.email}",
+        'phones': phone_suffixes(customer.phone),
+    }
+
+
+def customer_document(customer):
+    return {
+        'title': customer.name,
+        'body': customer.email,
+        'phones': phone_suffixes(customer.phone),
+    }
+
+
+# Snapshots of the indexed fields, so saves that don't touch them skip the index
+def vehicle_key(vehicle):
+    return tuple(vehicle.__dict__.get(name) for name in ('model', 'vin', 'customer_id'))
+
+
+def customer_key(customer):
+    return tuple(customer.__dict__.get(name) for name in ('name', 'phone', 'email'))
+
+
+class BasicBackend:
+    """
+    Fallback for databases without FTS5: icontains lookups, exact / leading
+    matches ranked first. Nothing to keep in sync.
+    """
+
+    def index_vehicle(self, vehicle):
+        pass
+
+    def index_customer(self, customer):
+        pass
+
+    def remove(self, kind, object_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def _search(self, queryset, fields, words, limit):
+        match = Q()
+        for word in words:
+            match &= Q(*[Q(**{f'{field}__icontains': word}) for field in fields], _connector=Q.OR)
+        first = words[0]
+        queryset = queryset.filter(match).annotate(score=Case(
+            *[When(**{f'{field}__iexact': first}, then=Value(0)) for field in fields],
+            *[When(**{f'{field}__istartswith': first}, then=Value(1)) for field in fields],
+            default=Value(2), output_field=IntegerField(),
+        ))
+        return list(queryset.order_by('score', '-id').values_list('id', 'score')[:limit])
+
+    def search(self, query, kind=None, limit=20):
+        words = terms(query)
+        if not words:
+            return []
+        hits = []
+        if kind in (None, 'vehicle'):
+            fields = ['model', 'vin', 'customer__name', 'customer__phone', 'customer__email']
+            hits += [Hit('vehicle', pk, score) for pk, score in self._search(Vehicle.objects.all(), fields, words, limit)]
+        if kind in (None, 'customer'):
+            fields = ['name', 'phone', 'email']
+            hits += [Hit('customer', pk, score) for pk, score in self._search(Customer.objects.all(), fields, words, limit)]
+        return sorted(hits, key=lambda hit: hit.score)[:limit]
+
+
+class FTS5Backend:
+    """
+    SQLite FTS5 index with one row per vehicle and per customer. The rowid
+    encodes both (id * 2, +1 for customers), so updates and deletes are
+    rowid lookups. Columns: title (model + VIN / customer name), body
+    (customer name + email / email) and phones (see phone_suffixes).
+    Results are ranked by bm25, title matches weighing most.
+    """
+    weights = (10.0, 3.0, 2.0)
+
+    @staticmethod
+    def rowid(kind, object_id):
+        return object_id * 2 + KINDS.index(kind)
+
+    def _write(self, cursor, kind, object_id, document):
+        rowid = self.rowid(kind, object_id)
+        cursor.execute(f'DELETE FROM "{FTS_TABLE}" WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO "{FTS_TABLE}" (rowid, title, body, phones) VALUES (%s, %s, %s, %s)',
+            [rowid, document['title'], document['body'], document['phones']],
+        )
+
+    def index_vehicle(self, vehicle):
+        with connection.cursor() as cursor:
+            self._write(cursor, 'vehicle', vehicle.pk, vehicle_document(vehicle))
+
+    def index_customer(self, customer):
+        with connection.cursor() as cursor:
+            self._write(cursor, 'customer', customer.pk, customer_document(customer))
+
+    def remove(self, kind, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{FTS_TABLE}" WHERE rowid = %s', [self.rowid(kind, object_id)])
+
+    def rebuild(self):
+        """Re-index every vehicle and customer. Returns the number of rows indexed."""
+        count = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{FTS_TABLE}"')
+            for customer in Customer.objects.iterator(chunk_size=2000):
+                self._write(cursor, 'customer', customer.pk, customer_document(customer))
+                count += 1
+            for vehicle in Vehicle.objects.select_related('customer').only(
+                    'id', 'model', 'vin', 'customer__name', 'customer__phone', 'customer__email').iterator(chunk_size=2000):
+                self._write(cursor, 'vehicle', vehicle.pk, vehicle_document(vehicle))
+                count += 1
+            cursor.execute(f'INSERT INTO "{FTS_TABLE}" ("{FTS_TABLE}") VALUES (\'optimize\')')
+        return count
+
+    def search(self, query, kind=None, limit=20):
+        words = terms(query)
+        if not words:
+            return []
+        # Every word must match, each as a prefix ("swi" -> Swift)
+        match = ' '.join(f'"{word}"*' for word in words)
+        sql = f'SELECT rowid, bm25("{FTS_TABLE}", %s, %s, %s) AS score FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s'
+        params = [*self.weights, match]
+        if kind is not None:
+            sql += ' AND rowid %% 2 = %s'
+            params.append(KINDS.index(kind))
+        sql += ' ORDER BY score LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [Hit(KINDS[rowid % 2], rowid // 2, score) for rowid, score in cursor.fetchall()]
+
+
+BACKENDS = {
+    'fts5': FTS5Backend,
+    'basic': BasicBackend,
+}
+
+
+def get_backend():
+    """Backend picked by settings.SEARCH_BACKEND; FTS5 on SQLite by default."""
+    name = getattr(settings, 'SEARCH_BACKEND', None) or ('fts5' if connection.vendor == 'sqlite' else 'basic')
+    return BACKENDS[name]()
+
+
+def search(query, kind=None, limit=20):
+    """
+    Ranked vehicles and customers for `query`, best first:
+    [{'type': 'vehicle', 'id': ..., 'score': ..., ...fields}, ...]
+    """
+    hits = get_backend().search(query, kind=kind, limit=limit)
+    vehicles = Vehicle.objects.select_related('customer').only(
+        'id', 'model', 'vin', 'inspection_date', 'payment_status', 'is_completed',
+        'customer__id', 'customer__name', 'customer__phone',
+    ).in_bulk([hit.id for hit in hits if hit.kind == 'vehicle'])
+    customers = Customer.objects.in_bulk([hit.id for hit in hits if hit.kind == 'customer'])
+
+    results = []
+    for hit in hits:
+        if hit.kind == 'vehicle' and hit.id in vehicles:
+            vehicle = vehicles[hit.id]
+            results.append({
+                'type': 'vehicle', 'id': vehicle.id, 'score': hit.score,
+                'model': vehicle.model, 'vin': vehicle.vin, 'inspection_date': vehicle.inspection_date,
+                'payment_status': vehicle.payment_status, 'is_completed': vehicle.is_completed,
+                'customer': {'id': vehicle.customer.id, 'name': vehicle.customer.name, 'phone': vehicle.customer.phone},
+            })
+        elif hit.kind == 'customer' and hit.id in customers:
+            customer = customers[hit.id]
+            results.append({
+                'type': 'customer', 'id': customer.id, 'score': hit.score,
+                'name': customer.name, 'phone': customer.phone, 'email': customer.email,
+            })
+    return results
@@ -46,6 +46,29 @@ class VehicleSerializer(serializers.ModelSerializer):
         ]
 
 
+# --- Dashboard list row (flat, read-only) ---
+class DashboardVehicleSerializer(serializers.ModelSerializer):
+    # Sirf naam bhejo, nested objects nahi - list bahut lambi ho sakti hai
+    customer_name = serializers.CharField(source='customer.name', read_only=True)
+    customer_phone = serializers.CharField(source='customer.phone', read_only=True)
+    fuel_type_name = serializers.CharField(source='fuel_type.name', read_only=True)
+    transmission_name = serializers.CharField(source='transmission.name', read_only=True)
+    engine_type_name = serializers.CharField(source='engine_type.name', read_only=True)
+    inspected_by_email = serializers.CharField(source='inspected_by.email', read_only=True)
+
+    class Meta:
+        model = Vehicle
+        fields = [
+            'id', 'model', 'vin',
+            'customer', 'customer_name', 'customer_phone',
+            'fuel_type_name', 'transmission_name', 'engine_type_name',
+            'inspected_by', 'inspected_by_email',
+            'inspection_date', 'health_score', 'is_completed', 'payment_status',
+            'image'
+        ]
+        read_only_fields = fields
+
+
 class PaymentOrderSerializer(serializers.ModelSerializer):
     # Yeh fields frontend ko chahiye hongi payment kholne ke liye
     order_id = serializers.CharField(source='transaction_id')
@@ -136,9 +159,24 @@ class SystemCheckSerializer(serializers.ModelSerializer):
         
 
 
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    """Public view of a BackgroundJob for the job status endpoint (no payload)."""
+    class Meta:
+        model = BackgroundJob
+        fields = ['id', 'name', 'status', 'attempts', 'max_attempts', 'result', 'error', 'created_at', 'finished_at']
 
 
+class ReportExportSerializer(serializers.ModelSerializer):
+    """Progress of a bulk PDF export; `download_url` is set once the zip is ready."""
+    download_url = serializers.SerializerMethodField()
 
-
-
-
+    class Meta:
+        model = ReportExport
+        fields = ['id', 'filters', 'status', 'total', 'done', 'failed_vehicles', 'error', 'created_at', 'finished_at', 'download_url']
+
+    def get_download_url(self, obj):
+        request = self.context.get('request')
+        if obj.status != 'done' or request is None:
+            return None
+        from django.urls import reverse
+        return request.build_absolute_uri(reverse('api-report-export-download', args=[obj.id]))
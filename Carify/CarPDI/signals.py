@@ -0,0 +1,155 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.db.models import OuterRef, Subquery
+
+from . import masterdata, pdf, rollups, search
+from .payment_events import publish_payment_status
+from .models import Customer, Vehicle
+from User.models import CustomUser
+
+
+def invalidate_master_data(sender, **kwargs):
+    masterdata.invalidate_on_commit(sender)
+
+
+for model in masterdata.MASTER_MODELS:
+    post_save.connect(invalidate_master_data, sender=model, dispatch_uid=f'masterdata_save_{model.__name__}')
+    post_delete.connect(invalidate_master_data, sender=model, dispatch_uid=f'masterdata_delete_{model.__name__}')
+
+
+# --- Dashboard rollups (DashboardDailyStat) ---
+
+@receiver(post_init, sender=Vehicle, dispatch_uid='rollup_vehicle_init')
+def remember_vehicle_stat(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._stat_snapshot = rollups.vehicle_snapshot(instance)
+
+
+@receiver(post_save, sender=Vehicle, dispatch_uid='rollup_vehicle_save')
+def update_vehicle_stat(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        rollups.vehicle_saved(instance, created)
+
+
+@receiver(post_delete, sender=Vehicle, dispatch_uid='rollup_vehicle_delete')
+def remove_vehicle_stat(sender, instance, **kwargs):
+    rollups.vehicle_deleted(instance)
+
+
+@receiver(post_save, sender=Customer, dispatch_uid='rollup_customer_save')
+def update_customer_stat(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.customer_created()
+
+
+@receiver(post_delete, sender=Customer, dispatch_uid='rollup_customer_delete')
+def remove_customer_stat(sender, instance, **kwargs):
+    rollups.customer_deleted()
+
+
+# --- CustomUser.current_open_vehicle (used by CustomUser.status) ---
+
+def _reset_open_vehicle(inspector_id, **current):
+    # Point the inspector at their latest incomplete vehicle (or None)
+    latest_open = Vehicle.objects.filter(inspected_by=OuterRef('pk'), is_completed=False).order_by('-inspection_date', '-id')
+    CustomUser.objects.filter(pk=inspector_id, **current).update(current_open_vehicle=Subquery(latest_open.values('id')[:1]))
+
+
+def _open_vehicle_key(vehicle):
+    # __dict__ so deferred fields never trigger a query from post_init
+    data = vehicle.__dict__
+    return (data.get('inspected_by_id'), data.get('is_completed'), data.get('inspection_date'))
+
+
+@receiver(post_init, sender=Vehicle, dispatch_uid='open_vehicle_init')
+def remember_open_vehicle_key(sender, instance, **kwargs):
+    instance._open_vehicle_snapshot = _open_vehicle_key(instance)
+
+
+@receiver(post_save, sender=Vehicle, dispatch_uid='open_vehicle_save')
+def update_open_vehicle(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_inspector, *_ = previous = instance._open_vehicle_snapshot
+    instance._open_vehicle_snapshot = _open_vehicle_key(instance)
+    # Only inspector / completion / date decide which vehicle is the open one
+    if not created and previous == instance._open_vehicle_snapshot:
+        return
+    _reset_open_vehicle(instance.inspected_by_id)
+    if old_inspector is not None and old_inspector != instance.inspected_by_id:
+        _reset_open_vehicle(old_inspector)
+
+
+@receiver(post_delete, sender=Vehicle, dispatch_uid='open_vehicle_delete')
+def remove_open_vehicle(sender, instance, **kwargs):
+    # The FK was already SET_NULL by the delete; pick the next open vehicle, if any
+    _reset_open_vehicle(instance.inspected_by_id, current_open_vehicle__isnull=True)
+
+
+# --- Cached report PDFs (CarPDI/pdf.py) ---
+
+@receiver(post_delete, sender=Vehicle, dispatch_uid='report_pdf_delete')
+def remove_report_pdf(sender, instance, **kwargs):
+    pdf.discard(instance.pk)
+
+
+# --- Payment status push (CarPDI/consumers.py) ---
+
+@receiver(post_init, sender=Vehicle, dispatch_uid='payment_status_init')
+def remember_payment_status(sender, instance, **kwargs):
+    instance._payment_status_snapshot = instance.__dict__.get('payment_status')
+
+
+@receiver(post_save, sender=Vehicle, dispatch_uid='payment_status_save')
+def push_payment_status(sender, instance, created, raw=False, **kwargs):
+    previous = instance._payment_status_snapshot
+    if not raw and not created and instance.payment_status != previous:
+        publish_payment_status(instance, previous)
+    instance._payment_status_snapshot = instance.payment_status
+
+
+# --- Search index (CarPDI/search.py) ---
+# bulk_create / update() send no signals - run rebuild_search_index after those
+
+@receiver(post_init, sender=Vehicle, dispatch_uid='search_vehicle_init')
+def remember_vehicle_search_key(sender, instance, **kwargs):
+    instance._search_snapshot = search.vehicle_key(instance)
+
+
+@receiver(post_save, sender=Vehicle, dispatch_uid='search_vehicle_save')
+def index_vehicle(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or search.vehicle_key(instance) != instance._search_snapshot:
+        search.get_backend().index_vehicle(instance)
+    instance._search_snapshot = search.vehicle_key(instance)
+
+
+@receiver(post_delete, sender=Vehicle, dispatch_uid='search_vehicle_delete')
+def unindex_vehicle(sender, instance, **kwargs):
+    search.get_backend().remove('vehicle', instance.pk)
+
+
+@receiver(post_init, sender=Customer, dispatch_uid='search_customer_init')
+def remember_customer_search_key(sender, instance, **kwargs):
+    instance._search_snapshot = search.customer_key(instance)
+
+
+@receiver(post_save, sender=Customer, dispatch_uid='search_customer_save')
+def index_customer(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or search.customer_key(instance) != instance._search_snapshot:
+        backend = search.get_backend()
+        backend.index_customer(instance)
+        # Vehicle rows carry the customer's name / email / phone too
+        if not created:
+            for vehicle in Vehicle.objects.filter(customer=instance).only('id', 'model', 'vin', 'customer_id'):
+                vehicle.customer = instance
+                backend.index_vehicle(vehicle)
+    instance._search_snapshot = search.customer_key(instance)
+
+
+@receiver(post_delete, sender=Customer, dispatch_uid='search_customer_delete')
+def unindex_customer(sender, instance, **kwargs):
+    search.get_backend().remove('customer', instance.pk)
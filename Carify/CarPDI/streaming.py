@@ -0,0 +1,104 @@
+import csv
+import json
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .models import Vehicle
+from .reports import REPORT_SECTIONS, _row_to_dict
+
+
+# Rows fetched from the database per round trip
+CHUNK_SIZE = 2000
+
+# (column, lookup) of a vehicle export row - read with values_list, no model instances
+VEHICLE_COLUMNS = (
+    ('id', 'id'),
+    ('inspection_date', 'inspection_date'),
+    ('model', 'model'),
+    ('vin', 'vin'),
+    ('customer_name', 'customer__name'),
+    ('customer_phone', 'customer__phone'),
+    ('customer_email', 'customer__email'),
+    ('fuel_type', 'fuel_type__name'),
+    ('transmission', 'transmission__name'),
+    ('engine_type', 'engine_type__name'),
+    ('engine_cc', 'engine_cc'),
+    ('bhp', 'bhp'),
+    ('airbags', 'airbags'),
+    ('mileage_kmpl', 'mileage_kmpl'),
+    ('ncap_rating', 'ncap_rating'),
+    ('num_keys', 'num_keys'),
+    ('health_score', 'health_score'),
+    ('inspected_by', 'inspected_by__email'),
+    ('is_completed', 'is_completed'),
+    ('payment_status', 'payment_status'),
+    ('payment_amount', 'payment_amount'),
+    ('transaction_id', 'transaction_id'),
+)
+
+SECTIONS = {key: (model, lookups) for key, model, lookups in REPORT_SECTIONS}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def vehicle_rows(filters):
+    """(columns, row iterator) of the vehicles matching the AllInspectedVehiclesAPI filters."""
+    queryset = Vehicle.objects.matching(model=filters.get('model'), date=filters.get('date')) \
+        .order_by('-inspection_date', '-id') \
+        .values_list(*[lookup for _, lookup in VEHICLE_COLUMNS])
+    return [column for column, _ in VEHICLE_COLUMNS], queryset.iterator(chunk_size=CHUNK_SIZE)
+
+
+def section_rows(section, filters):
+    """
+    (columns, row iterator) of one inspection section table, limited to the
+    vehicles matching `filters`. Same columns as the report API: every field
+    plus '<fk>_name' labels.
+    """
+    model, lookups = SECTIONS[section]
+    vehicles = Vehicle.objects.matching(model=filters.get('model'), date=filters.get('date'))
+    queryset = model.objects.filter(vehicle__in=vehicles.values('id')).select_related(*lookups).order_by('vehicle_id', 'id')
+
+    fields = model._meta.concrete_fields
+    columns = [field.attname for field in fields] + [f'{field.name}_name' for field in fields if field.is_relation and field.name != 'vehicle']
+    rows = (tuple(_row_to_dict(obj).get(column) for column in columns) for obj in queryset.iterator(chunk_size=CHUNK_SIZE))
+    return columns, rows
+
+
+def _csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _jsonl_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_response(columns, rows, fmt, filename):
+    """
+    StreamingHttpResponse writing `rows` as CSV or JSON Lines while they're
+    read, one database chunk at a time - memory stays flat however many
+    rows there are.
+    """
+    lines = _csv_lines(columns, rows) if fmt == 'csv' else _jsonl_lines(columns, rows)
+    response = StreamingHttpResponse(lines, content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{date.today().isoformat()}.{fmt}"'
+    response['Cache-Control'] = 'no-store'
+    # Tell nginx not to buffer the whole body before sending it on
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,76 @@
+from .exports import build_export
+from .jobs import PermanentError, task
+from .models import Vehicle
+from .payments import get_gateway
+from .reconciliation import OPEN_STATUSES, link_transition
+from .serializers import PaymentLinkResponseSerializer
+
+
+# Creates are not retried: a retried create can make a second link (see payments.py)
+@task('payments.send_payment_link', max_attempts=1, timeout=60)
+def send_payment_link(vehicle_id, callback_url):
+    """Create a Razorpay Payment Link for a vehicle; Razorpay sends it by SMS/Email."""
+    vehicle = Vehicle.objects.select_related('customer').filter(id=vehicle_id).first()
+    if vehicle is None:
+        raise PermanentError(f"Vehicle {vehicle_id} not found.")
+
+    customer = vehicle.customer
+    payment_data = {
+        "amount": int(vehicle.payment_amount * 100),
+        "currency": "INR",
+        "accept_partial": False,
+        "description": f"Payment for Vehicle #{vehicle.id} - {vehicle.model}",
+        "customer": {
+            "name": customer.name,
+            "contact": customer.phone,
+            "email": customer.email
+        },
+        "notify": {
+            "sms": True,
+            "email": True
+        },
+        "reminder_enable": True,
+        "callback_url": callback_url,
+        "callback_method": "get"
+    }
+    response = get_gateway().create_payment_link(payment_data)
+
+    vehicle.payment_link_id = response['id']
+    vehicle.payment_status = response['status']
+    vehicle.save()
+
+    return PaymentLinkResponseSerializer(vehicle, context={'short_url': response['short_url']}).data
+
+
+@task('payments.reconcile_payment_link', max_attempts=5, timeout=60, retry_delay=30)
+def reconcile_payment_link(vehicle_id, link_id):
+    """
+    Compare a vehicle's payment with the payment link at Razorpay and fix
+    the vehicle if they disagree (paid -> success, expired/cancelled -> failed).
+    """
+    link = get_gateway().fetch_payment_link(link_id)
+    new_status, payment_id = link_transition(link)
+    if new_status is None:
+        return {"updated": False, "link_status": link.get('status')}
+
+    vehicle = Vehicle.objects.filter(id=vehicle_id, payment_link_id=link_id).first()
+    if vehicle is None:
+        raise PermanentError(f"Vehicle {vehicle_id} no longer has payment link {link_id}.")
+
+    payment_id = payment_id or vehicle.transaction_id
+    if new_status == 'failed' and vehicle.payment_status not in OPEN_STATUSES:
+        # Never undo a settled payment because the link expired afterwards
+        return {"updated": False, "link_status": link.get('status')}
+    if vehicle.payment_status == new_status and vehicle.transaction_id == payment_id:
+        return {"updated": False, "link_status": link.get('status')}
+
+    vehicle.payment_status = new_status
+    vehicle.transaction_id = payment_id
+    vehicle.save(update_fields=['payment_status', 'transaction_id'])
+    return {"updated": True, "link_status": link.get('status'), "transaction_id": payment_id}
+
+
+@task('reports.export_pdfs', max_attempts=2, timeout=60 * 60)
+def export_pdfs(export_id):
+    """Zip the PDF reports of many vehicles (CarPDI/exports.py)."""
+    return build_export(export_id)
@@ -1,3 +1,715 @@
-from django.test import TestCase
+import gzip
+import json
+import io
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from User.models import CustomUser
+from . import jobs, masterdata, pdf, search
+from .ingest import CUSTOM, SectionBatch
+from .management.commands.load_master_data import CSV_TABLES
+from .apiviews import _accepts_gzip
+from .orders import OrderInProgress, get_or_create_order
+from .payments import FakeGateway
+from .reconciliation import OPEN_STATUSES, Reconciler
+from .reports import REPORT_SECTIONS, load_vehicle_report
+from .models import *
+
+
+def make_inspector(email='inspector@example.com', **extra):
+    return CustomUser.objects.create_user(email=email, password='pass1234', is_staff=True, **extra)
+
+
+def make_vehicle(inspector, customer=None, vin='VIN0001', model='Swift', **extra):
+    if customer is None:
+        customer = Customer.objects.create(name='Ravi Kumar', phone='9812345678', email='ravi@example.com')
+    return Vehicle.objects.create(
+        image='cars/test.jpg', customer=customer, model=model, vin=vin,
+        fuel_type=VehicleFuelType.objects.get_or_create(name='Petrol')[0],
+        transmission=VehicleTransmission.objects.get_or_create(name='Manual')[0],
+        engine_type=VehicleEngineType.objects.get_or_create(name='Petrol')[0],
+        bhp='80', airbags='2', inspected_by=inspector, health_score=4.0, **extra
+    )
+
+
+# --- Background jobs (CarPDI/jobs.py) ---
+
+calls = []
+
+
+@jobs.task('tests.record', max_attempts=3, timeout=30, retry_delay=10)
+def record(value):
+    calls.append(value)
+    return {'value': value}
+
+
+@jobs.task('tests.fail', max_attempts=2, timeout=30, retry_delay=10)
+def fail(permanent=False):
+    if permanent:
+        raise jobs.PermanentError("bad input")
+    raise ValueError("temporary")
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_job_is_claimed_by_one_worker_only(self):
+        job = jobs.enqueue('tests.record', {'value': 1})
+        [claimed] = jobs.claim('w1')
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.locked_by, 'w1')
+        self.assertEqual(claimed.attempts, 1)
+        self.assertEqual(jobs.claim('w2'), [])
+
+    def test_run_pending_runs_and_records_result(self):
+        job = jobs.enqueue('tests.record', {'value': 7})
+        self.assertEqual(jobs.run_pending('w1'), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result, {'value': 7})
+        self.assertEqual(calls, [7])
+
+    def test_expired_lease_is_not_run_by_the_old_worker(self):
+        job = jobs.enqueue('tests.record', {'value': 1})
+        [stale] = jobs.claim('w1')
+        # w1 waited too long: the lease ran out and w2 took the job over
+        BackgroundJob.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        [current] = jobs.claim('w2')
+        self.assertEqual(current.attempts, 2)
+
+        with self.assertLogs('CarPDI.jobs', 'WARNING'):
+            self.assertEqual(jobs.run(stale), 0)
+        self.assertEqual(calls, [])
+        jobs.run(current)
+        self.assertEqual(calls, [1])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('succeeded', 'w2'))
+
+    def test_failure_is_retried_with_backoff_then_fails(self):
+        job = jobs.enqueue('tests.fail')
+        with self.assertLogs('CarPDI.jobs', 'ERROR'):
+            jobs.run_pending('w1')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('temporary', job.error)
+
+        # Not due yet
+        self.assertEqual(jobs.run_pending('w1'), 0)
+        BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('CarPDI.jobs', 'ERROR'):
+            jobs.run_pending('w1')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_permanent_error_is_not_retried(self):
+        job = jobs.enqueue('tests.fail', {'permanent': True})
+        with self.assertLogs('CarPDI.jobs', 'ERROR'):
+            jobs.run_pending('w1')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+
+    def test_idempotency_key_returns_the_same_job(self):
+        first = jobs.enqueue('tests.record', {'value': 1}, idempotency_key='k1')
+        second = jobs.enqueue('tests.record', {'value': 2}, idempotency_key='k1')
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+    def test_bank_verification_payload_holds_no_account_details(self):
+        user = make_inspector()
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post('/api/user/verify-bank/', {'account_number': '123456789', 'ifsc_code': 'abcd0123456'})
+        self.assertEqual(response.status_code, 202)
+        job = BackgroundJob.objects.get(id=response.data['data']['job_id'])
+        self.assertEqual(job.payload, {'user_id': user.pk})
+
+        bank_response = mock.Mock(status_code=200)
+        bank_response.json.return_value = {'verified': True}
+        with mock.patch('User.tasks.requests.post', return_value=bank_response) as post:
+            jobs.run_pending('w1')
+        self.assertEqual(post.call_args.kwargs['json'], {'account_number': '123456789', 'ifsc': 'ABCD0123456'})
+        job.refresh_from_db()
+        user.refresh_from_db()
+        self.assertEqual(job.result, {'verified': True})
+        self.assertTrue(user.is_bank_verified)
+
+
+# --- CustomUser.current_open_vehicle (CarPDI/signals.py) ---
+
+class OpenVehicleTests(TestCase):
+
+    def setUp(self):
+        self.inspector = make_inspector()
+        customer = Customer.objects.create(name='Ravi Kumar', phone='9812345678', email='ravi@example.com')
+        self.older = make_vehicle(self.inspector, customer, vin='VIN-OLD')
+        self.newer = make_vehicle(self.inspector, customer, vin='VIN-NEW')
+
+    def open_vehicle_id(self, user):
+        return CustomUser.objects.values_list('current_open_vehicle', flat=True).get(pk=user.pk)
+
+    def test_editing_an_older_open_vehicle_keeps_the_newest(self):
+        self.assertEqual(self.open_vehicle_id(self.inspector), self.newer.id)
+        self.older.health_score = 3.0
+        self.older.save()
+        self.assertEqual(self.open_vehicle_id(self.inspector), self.newer.id)
+        # Completed and reopened: still not newer than the open one
+        self.older.is_completed = True
+        self.older.save()
+        self.older.is_completed = False
+        self.older.save()
+        self.assertEqual(self.open_vehicle_id(self.inspector), self.newer.id)
+
+    def test_completing_the_open_vehicle_falls_back_to_the_next_one(self):
+        self.newer.is_completed = True
+        self.newer.save()
+        self.assertEqual(self.open_vehicle_id(self.inspector), self.older.id)
+        self.older.is_completed = True
+        self.older.save()
+        self.assertIsNone(self.open_vehicle_id(self.inspector))
+
+    def test_reassigning_a_vehicle_updates_both_inspectors(self):
+        other = make_inspector('other@example.com')
+        self.newer.inspected_by = other
+        self.newer.save()
+        self.assertEqual(self.open_vehicle_id(self.inspector), self.older.id)
+        self.assertEqual(self.open_vehicle_id(other), self.newer.id)
+
+
+# --- Payment reconciliation (CarPDI/reconciliation.py) ---
+
+class ReconciliationTests(TestCase):
+
+    def setUp(self):
+        self.gateway = FakeGateway('key', 'secret')
+        self.inspector = make_inspector()
+        customer = Customer.objects.create(name='Ravi Kumar', phone='9812345678', email='ravi@example.com')
+
+        # Order paid at the gateway, still 'pending' here
+        order = self.gateway.create_order({'amount': 50000})
+        self.payment = self.gateway.pay(order['id'])
+        self.paid = make_vehicle(self.inspector, customer, vin='VIN-PAID', transaction_id=order['id'])
+        self.order = PaymentOrder.objects.create(
+            vehicle=self.paid, order_id=order['id'], amount=50000, state='created', expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+        # Payment link expired at the gateway
+        link = self.gateway.create_payment_link({})
+        link['status'] = 'expired'
+        self.expired = make_vehicle(self.inspector, customer, vin='VIN-EXPIRED', payment_status='created', payment_link_id=link['id'])
+
+        # Order not paid yet, and a mock-mode order that can't be checked
+        self.open = make_vehicle(self.inspector, customer, vin='VIN-OPEN', transaction_id=self.gateway.create_order({'amount': 50000})['id'])
+        self.mock = make_vehicle(self.inspector, customer, vin='VIN-MOCK', transaction_id='order_mock_123')
+
+    def statuses(self):
+        return dict(Vehicle.objects.values_list('vin', 'payment_status'))
+
+    def test_dry_run_reports_without_writing(self):
+        before = self.statuses()
+        report = Reconciler(self.gateway, workers=2, rate=0, batch_size=2).run(dry_run=True)
+        self.assertEqual(self.statuses(), before)
+        self.assertEqual(report.summary(), {'pending -> success': 1, 'created -> failed': 1})
+        self.assertEqual((report.checked, report.unchanged, report.skipped, report.applied), (3, 1, 1, 0))
+
+    def test_run_applies_transitions(self):
+        report = Reconciler(self.gateway, workers=2, rate=0, batch_size=2).run()
+        self.assertEqual(report.applied, 2)
+        self.assertEqual(self.statuses(), {
+            'VIN-PAID': 'success', 'VIN-EXPIRED': 'failed', 'VIN-OPEN': 'pending', 'VIN-MOCK': 'pending',
+        })
+        self.paid.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(self.paid.transaction_id, self.payment['razorpay_payment_id'])
+        self.assertEqual((self.order.state, self.order.payment_id), ('paid', self.payment['razorpay_payment_id']))
+
+    def test_vehicle_changed_meanwhile_is_left_alone(self):
+        reconciler = Reconciler(self.gateway, workers=1, rate=0)
+        transitions = reconciler.run(dry_run=True).transitions
+        Vehicle.objects.filter(pk=self.paid.pk).update(payment_status='failed')
+        self.assertEqual(reconciler.apply(transitions), 1)
+        self.assertEqual(self.statuses()['VIN-PAID'], 'failed')
+
+
+# --- One live payment order per vehicle (CarPDI/orders.py) ---
+
+class PaymentOrderTests(TestCase):
+
+    def setUp(self):
+        self.gateway = FakeGateway('key', 'secret')
+        self.inspector = make_inspector()
+        self.vehicle = make_vehicle(self.inspector)
+
+    def test_live_order_is_reused(self):
+        create = mock.Mock(side_effect=self.gateway.create_order)
+        first, created = get_or_create_order(self.vehicle, create)
+        self.assertTrue(created)
+        again, created = get_or_create_order(self.vehicle, create)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(create.call_count, 1)
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.transaction_id, first.order_id)
+
+    def test_amount_change_supersedes_the_order(self):
+        first, _ = get_or_create_order(self.vehicle, self.gateway.create_order, amount=50000)
+        second, created = get_or_create_order(self.vehicle, self.gateway.create_order, amount=60000)
+        self.assertTrue(created)
+        first.refresh_from_db()
+        self.assertEqual(first.state, 'superseded')
+        self.assertEqual(self.vehicle.payment_orders.filter(state__in=['creating', 'created']).get().pk, second.pk)
+
+    def test_reused_order_after_a_failed_payment_is_pending_again(self):
+        order, _ = get_or_create_order(self.vehicle, self.gateway.create_order)
+        # payment_verify / VerifyPaymentAPI after a bad signature
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(payment_status='failed')
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.transaction_id, order.order_id)
+
+        again, created = get_or_create_order(self.vehicle, self.gateway.create_order)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, order.pk)
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.payment_status, 'pending')
+
+    def test_mock_order_is_not_reused_in_live_mode(self):
+        mock_order, _ = get_or_create_order(self.vehicle, lambda data: {"id": "order_mock_0123456789"}, live=False)
+        live_order, created = get_or_create_order(self.vehicle, self.gateway.create_order, live=True)
+        self.assertTrue(created)
+        self.assertTrue(live_order.live)
+        mock_order.refresh_from_db()
+        self.assertEqual((mock_order.live, mock_order.state), (False, 'superseded'))
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.transaction_id, live_order.order_id)
+
+    def test_constraint_allows_one_live_order(self):
+        get_or_create_order(self.vehicle, self.gateway.create_order)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PaymentOrder.objects.create(vehicle=self.vehicle, amount=50000, state='creating', expires_at=timezone.now())
+
+    def test_order_being_created_elsewhere_fails_fast(self):
+        # Another request holds the placeholder while it calls the gateway
+        PaymentOrder.objects.create(vehicle=self.vehicle, amount=50000, state='creating', expires_at=timezone.now() + timedelta(hours=1))
+        create = mock.Mock(side_effect=self.gateway.create_order)
+        with self.assertRaises(OrderInProgress):
+            get_or_create_order(self.vehicle, create)
+        create.assert_not_called()
+
+        client = APIClient()
+        client.force_authenticate(self.inspector)
+        response = client.post(f'/api/car/payment/create/{self.vehicle.id}/')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('Retry-After', response)
+
+
+# --- Batched inspection step writes (CarPDI/ingest.py) ---
+
+class SectionBatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vehicle = make_vehicle(make_inspector())
+        cls.ok = Status.objects.create(name='OK')
+        cls.systems = [System.objects.create(name=f'System {i}') for i in range(20)]
+
+    def save_checks(self, systems, custom='Needs Attention'):
+        batch = SectionBatch(SystemCheck, self.vehicle)
+        statuses = batch.lookup(Status, iexact=True)
+        for i, system in enumerate(systems):
+            # Every other row uses a custom status typed in by the technician
+            status = statuses.ref(CUSTOM, custom) if i % 2 else statuses.ref(str(self.ok.pk))
+            batch.add(system=system, status=status, number_of_issues=i)
+        with CaptureQueriesContext(connection) as queries:
+            rows = batch.save()
+        return rows, len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        # The first save also creates the custom status
+        self.save_checks(self.systems[:2])
+        _, few = self.save_checks(self.systems[:2])
+        rows, many = self.save_checks(self.systems)
+        self.assertEqual(few, many)
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(SystemCheck.objects.filter(vehicle=self.vehicle).count(), 24)
+
+    def test_custom_names_are_created_once(self):
+        self.save_checks(self.systems[:4], custom='needs attention')
+        self.save_checks(self.systems[:4], custom='Needs Attention ')
+        self.assertEqual(Status.objects.filter(name__iexact='needs attention').count(), 1)
+        self.assertEqual(SystemCheck.objects.filter(status__name__iexact='needs attention').count(), 4)
+
+    def test_unknown_lookup_saves_nothing(self):
+        batch = SectionBatch(SystemCheck, self.vehicle)
+        statuses = batch.lookup(Status)
+        batch.add(system=self.systems[0], status=statuses.ref(str(self.ok.pk)))
+        batch.add(system=self.systems[1], status=statuses.ref('999999'))
+        with self.assertRaises(Http404):
+            batch.save()
+        self.assertFalse(SystemCheck.objects.exists())
+
+        batch.skip_unresolved = True
+        self.assertEqual(len(batch.save()), 1)
+
+
+# --- load_master_data command ---
+
+class LoadMasterDataTests(TestCase):
+
+    def load(self, *args):
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('load_master_data', *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def counts(self):
+        return {model: model.objects.count() for model, _ in CSV_TABLES.values()}
+
+    def test_second_run_inserts_nothing(self):
+        self.assertIn('Inserted', self.load())
+        first = self.counts()
+        self.assertTrue(all(first.values()), first)
+        self.assertIn('Inserted 0 rows into 0 tables.', self.load())
+        self.assertEqual(self.counts(), first)
+        # The cp1252 file comes through with its en dashes
+        self.assertTrue(VoltageInference.objects.filter(voltage__contains='\u2013').exists())
+
+    def test_existing_rows_match_ignoring_case_and_spacing(self):
+        GlassArea.objects.create(name='rear windscreen')
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, 'glass_name.csv'), 'w') as csv_file:
+                csv_file.write('name\n  Rear WindScreen \nFront  Windscreen\nfront windscreen\n\n')
+            version = masterdata.get_version(GlassArea)
+            self.load('--dir', folder, '--dry-run')
+            self.assertEqual(GlassArea.objects.count(), 1)
+            self.load('--dir', folder)
+        self.assertEqual(sorted(GlassArea.objects.values_list('name', flat=True)), ['Front Windscreen', 'rear windscreen'])
+        # bulk_create sends no post_save - the command drops the cached table itself
+        self.assertNotEqual(masterdata.get_version(GlassArea), version)
+
+
+# --- Vehicle report loading (CarPDI/reports.py) ---
+
+class VehicleReportQueryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.inspector = make_inspector()
+        ok = Status.objects.create(name='OK')
+        system = System.objects.create(name='Brakes')
+        position = TyrePosition.objects.create(name='Front Left')
+        document = DocumentType.objects.create(name='RC')
+
+        cls.small = make_vehicle(cls.inspector, vin='VIN-SMALL')
+        cls.large = make_vehicle(cls.inspector, customer=cls.small.customer, vin='VIN-LARGE')
+        for vehicle, rows in ((cls.small, 1), (cls.large, 10)):
+            OBDReading.objects.create(vehicle=vehicle, avg_city_running_kms=10, pre_delivery_odo_kms=5,
+                                      current_odo_kms=15, obd_running_kms=15, obd_tampering=False)
+            for _ in range(rows):
+                SystemCheck.objects.create(vehicle=vehicle, system=system, status=ok)
+                TyreCondition.objects.create(vehicle=vehicle, position=position, brand='MRF', condition=ok, remaining_life_percent=90)
+                Documentation.objects.create(vehicle=vehicle, document=document, status=ok, remark='Verified')
+
+    def test_one_query_for_the_vehicle_and_one_per_section(self):
+        with self.assertNumQueries(1 + len(REPORT_SECTIONS)):
+            report = load_vehicle_report(self.large.id)
+            data = report.as_dict()
+        self.assertEqual(len(data['system_checks']), 10)
+        self.assertEqual(data['tyre_conditions'][0]['position_name'], 'Front Left')
+        self.assertEqual(data['documentations'][0]['status_name'], 'OK')
+        self.assertEqual(data['obd_readings'][0]['current_odo_kms'], 15)
+
+    def test_api_queries_do_not_grow_with_rows(self):
+        client = APIClient()
+        client.force_authenticate(self.inspector)
+        counts = []
+        for vehicle in (self.small, self.large):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(f'/api/user/vehicle/report/{vehicle.id}/')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+# --- Cached report PDFs (CarPDI/pdf.py) ---
+
+class ReportPDFCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(pdf, 'CACHE_DIR', self.cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+        self.vehicle = make_vehicle(make_inspector())
+
+    def test_new_version_replaces_only_stale_files(self):
+        old_path, old_version = pdf.get_report_pdf(self.vehicle.id)
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(model='Baleno')
+        new_path, new_version = pdf.get_report_pdf(self.vehicle.id)
+        self.assertNotEqual(old_version, new_version)
+        self.assertEqual(os.listdir(self.cache_dir.name), [os.path.basename(new_path)])
+        # Same content again: served from the cache, file kept
+        self.assertEqual(pdf.get_report_pdf(self.vehicle.id), (new_path, new_version))
+        self.assertTrue(os.path.exists(new_path))
+
+    def test_file_removed_before_open_is_rendered_again(self):
+        path, _ = pdf.get_report_pdf(self.vehicle.id)
+        real_get = pdf.get_report_pdf
+
+        def get_then_lose(vehicle_id):
+            # Another request swaps the file out between the check and open()
+            result = real_get(vehicle_id)
+            if get.call_count == 1:
+                os.remove(result[0])
+            return result
+
+        with mock.patch.object(pdf, 'get_report_pdf', side_effect=get_then_lose) as get:
+            pdf_file, _ = pdf.open_report_pdf(self.vehicle.id)
+        with pdf_file:
+            self.assertEqual(pdf_file.read(5), b'%PDF-')
+        self.assertEqual(get.call_count, 2)
+
+
+# --- Master data bundle (CarPDI/masterdata.py, MasterDataAPI) ---
+
+class MasterDataCacheTests(TestCase):
+
+    def test_rows_are_cached_until_the_table_changes(self):
+        masterdata.get_rows(Status)
+        with self.assertNumQueries(0):
+            masterdata.get_rows(Status)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Status.objects.create(name='Checked')
+        self.assertEqual(len(callbacks), 1)
+        with self.assertNumQueries(1):
+            self.assertIn('Checked', [row.name for row in masterdata.get_rows(Status)])
+
+    def test_copy_read_before_commit_is_dropped_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Status.objects.create(name='Pending')
+            # Another request caches the table while the write is still uncommitted
+            version = masterdata.get_version(Status)
+            masterdata.get_rows(Status)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(masterdata.get_version(Status), version)
+        with self.assertNumQueries(1):
+            masterdata.get_rows(Status)
+
+
+class MasterDataAPITests(TestCase):
+    url = '/api/car/master-data/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_inspector())
+        VehicleFuelType.objects.create(name='Diesel')
+
+    def test_etag_gives_304_until_the_data_changes(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('Diesel', [row['name'] for row in json.loads(response.content)['fuel_types']])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        VehicleFuelType.objects.create(name='CNG')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_gzip_only_when_the_client_accepts_it(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br, gzip;q=0.8')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        plain = self.client.get(self.url, HTTP_ACCEPT_ENCODING='identity')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_accept_encoding_q_values(self):
+        for header, accepted in {
+            'gzip': True,
+            'gzip, deflate, br': True,
+            'GZIP;q=0.5': True,
+            'x-gzip': True,
+            '*': True,
+            'gzip;q=0': False,
+            'gzip; q=0.000': False,
+            'br, *;q=0': False,
+            'gzip;q=0, *': False,
+            'identity': False,
+            '': False,
+        }.items():
+            with self.subTest(header):
+                self.assertIs(_accepts_gzip(header), accepted)
+
+
+# --- Search (CarPDI/search.py), run against both backends ---
+
+class SearchBackendTests:
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.inspector = make_inspector()
+        cls.ravi = Customer.objects.create(name='Ravi Kumar', phone='+91 98123-45678', email='ravi@example.com')
+        cls.anita = Customer.objects.create(name='Anita Sharma', phone='9988776655', email='anita@example.com')
+        cls.swift = make_vehicle(cls.inspector, customer=cls.ravi, vin='MA3FJEB1S00123456', model='Swift')
+        cls.baleno = make_vehicle(cls.inspector, customer=cls.anita, vin='MA3EWDE1S00654321', model='Baleno')
+
+    def found(self, query, kind=None):
+        return [(row['type'], row['id']) for row in search.search(query, kind=kind)]
+
+    def test_word_prefixes(self):
+        self.assertEqual(self.found('swi')[0], ('vehicle', self.swift.id))
+        self.assertEqual(self.found('MA3EW'), [('vehicle', self.baleno.id)])
+        self.assertEqual(self.found('ravi swift'), [('vehicle', self.swift.id)])
+        self.assertEqual(self.found('swift anita'), [])
+
+    def test_any_part_of_a_phone_number(self):
+        self.assertCountEqual(self.found('45678'), [('vehicle', self.swift.id), ('customer', self.ravi.id)])
+        self.assertCountEqual(self.found('8776', kind='customer'), [('customer', self.anita.id)])
+
+    def test_edits_and_deletes_are_searchable(self):
+        self.ravi.name, self.ravi.email = 'Rakesh Kumar', 'rakesh@example.com'
+        self.ravi.save()
+        self.assertIn(('vehicle', self.swift.id), self.found('rakesh'))
+        self.assertEqual(self.found('ravi'), [])
+
+        self.baleno.delete()
+        self.assertEqual(self.found('baleno'), [])
+
+    def test_api(self):
+        client = APIClient()
+        client.force_authenticate(self.inspector)
+        response = client.get('/api/car/search/', {'q': 'kumar', 'type': 'customer'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertEqual([row['name'] for row in response.json()['data']], ['Ravi Kumar'])
+        response = client.get('/api/car/search/', {'q': 'kumar', 'type': 'car'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['status'], 'error')
+
+
+@override_settings(SEARCH_BACKEND='fts5')
+class FTS5SearchTests(SearchBackendTests, TestCase):
+
+    def test_rebuild_indexes_rows_written_without_signals(self):
+        Vehicle.objects.filter(pk=self.swift.pk).update(model='Ertiga')
+        self.assertEqual(self.found('ertiga'), [])
+        self.assertEqual(search.get_backend().rebuild(), 4)
+        self.assertEqual(self.found('ertiga'), [('vehicle', self.swift.id)])
+
+
+@override_settings(SEARCH_BACKEND='basic')
+class BasicSearchTests(SearchBackendTests, TestCase):
+    pass
+
+
+# --- Hot queries are served by an index (EXPLAIN) ---
+
+class QueryPlanMixin:
+    """assertUsesIndex(queryset): fails if the database plans a full table scan for it."""
+
+    @staticmethod
+    def analyze():
+        # Fresh statistics, so the planner sees the seeded distribution
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def full_scans(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                details = [row[-1] for row in cursor.fetchall()]
+                # "SCAN <table>" without "USING [COVERING] INDEX" is a full table scan
+                return [d for d in details if d.startswith('SCAN ') and 'INDEX' not in d]
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN {sql}', params)
+                return [row[0].strip() for row in cursor.fetchall() if 'Seq Scan' in row[0]]
+        self.skipTest(f"Query plans can't be checked on {connection.vendor}.")
+
+    def assertUsesIndex(self, queryset):
+        scans = self.full_scans(queryset)
+        self.assertEqual(scans, [], f"Full table scan: {queryset.query}")
+
+
+class VehicleQueryPlanTests(QueryPlanMixin, TestCase):
+    VEHICLES = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        today = date.today()
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f"plan{i}@example.com", emp_id=f"#PLAN{i}") for i in range(20)
+        )
+        customers = Customer.objects.bulk_create(
+            Customer(name=f"Plan {i}", phone=f"{9000000000 + i}", email=f"plan{i}@customer.com")
+            for i in range(cls.VEHICLES // 5)
+        )
+        fuel = VehicleFuelType.objects.create(name="Plan")
+        transmission = VehicleTransmission.objects.create(name="Plan")
+        engine = VehicleEngineType.objects.create(name="Plan")
+        vehicles = []
+        for i in range(cls.VEHICLES):
+            status = rng.choices(['success', 'pending', 'created', 'failed'], weights=[85, 8, 4, 3])[0]
+            vehicles.append(Vehicle(
+                image='cars/plan.jpg', customer=rng.choice(customers), model=f"Model {i % 40}", vin=f"PLAN-{i}",
+                fuel_type=fuel, transmission=transmission, engine_type=engine, bhp='0', airbags='0',
+                inspected_by=rng.choice(users), health_score=rng.randrange(100),
+                is_completed=rng.random() < 0.97, payment_status=status,
+                transaction_id=f"order_{i}", payment_link_id=f"plink_{i}" if i % 3 == 0 else None,
+            ))
+        Vehicle.objects.bulk_create(vehicles, batch_size=2000)
+        # inspection_date is auto_now_add - spread it over ~3 years afterwards
+        for vehicle in vehicles:
+            vehicle.inspection_date = today - timedelta(days=rng.randrange(3 * 365))
+        Vehicle.objects.bulk_update(vehicles, ['inspection_date'], batch_size=2000)
+        cls.analyze()
+        cls.user, cls.customer, cls.day = users[0], customers[0], today - timedelta(days=14)
+
+    def test_vehicle_queries_use_an_index(self):
+        vehicles = Vehicle.objects.all()
+        queries = {
+            "vehicle feed (newest first)": vehicles.order_by('-inspection_date', '-id')[:20],
+            "vehicles on a date": vehicles.filter(inspection_date=self.day),
+            "vehicles of an inspector": vehicles.filter(inspected_by=self.user).order_by('-inspection_date')[:20],
+            "inspector's vehicles on a date": vehicles.filter(inspected_by=self.user, inspection_date=self.day),
+            "inspector's open vehicle": vehicles.filter(inspected_by=self.user, is_completed=False).order_by('-inspection_date', '-id')[:1],
+            "vehicle by payment link": vehicles.filter(payment_link_id='plink_check'),
+            "vehicle by transaction id": vehicles.filter(transaction_id='order_check'),
+        }
+        # Same shape as a Reconciler page (keyset on id, one status at a time)
+        for status in OPEN_STATUSES:
+            queries[f"'{status}' payments by id"] = vehicles.filter(payment_status=status, id__gt=0).order_by('id')[:200]
+        for label, queryset in queries.items():
+            with self.subTest(label):
+                self.assertUsesIndex(queryset)
+
+    def test_customer_lookups_use_an_index(self):
+        for label, queryset in {
+            "customer by phone": Customer.objects.filter(phone=self.customer.phone),
+            "customer by email": Customer.objects.filter(email=self.customer.email),
+        }.items():
+            with self.subTest(label):
+                self.assertUsesIndex(queryset)
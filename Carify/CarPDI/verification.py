@@ -0,0 +1,53 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+
+from . import jobs
+
+
+# --- Signatures (local HMAC-SHA256 with the key secret, no HTTP) ---
+
+def _sign(message, secret=None):
+    secret = secret if secret is not None else settings.RAZORPAY_KEY_SECRET
+    return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def _matches(message, signature, secret=None):
+    if not signature:
+        return False
+    # compare_digest: time taken doesn't depend on how much of the signature is right
+    return hmac.compare_digest(_sign(message, secret), str(signature))
+
+
+def order_signature(order_id, payment_id, secret=None):
+    """Signature Razorpay Checkout sends back for an order payment."""
+    return _sign(f'{order_id}|{payment_id}', secret)
+
+
+def verify_order_signature(order_id, payment_id, signature, secret=None):
+    """True if `signature` is the checkout signature for this order + payment."""
+    return _matches(f'{order_id}|{payment_id}', signature, secret)
+
+
+def payment_link_signature(link_id, reference_id, link_status, payment_id, secret=None):
+    """Signature Razorpay adds to the payment link callback URL."""
+    return _sign(f'{link_id}|{reference_id or ""}|{link_status}|{payment_id}', secret)
+
+
+def verify_payment_link_signature(link_id, reference_id, link_status, payment_id, signature, secret=None):
+    """True if the payment link callback params were signed by Razorpay."""
+    return _matches(f'{link_id}|{reference_id or ""}|{link_status}|{payment_id}', signature, secret)
+
+
+# --- Reconciliation with Razorpay (off the request path) ---
+
+def schedule_reconcile(vehicle_id, link_id, link_status=''):
+    """Queue a re-check of the payment link with Razorpay (CarPDI/tasks.py)."""
+    if not getattr(settings, 'IS_RAZORPAY_LIVE', False):
+        return None
+    return jobs.enqueue(
+        'payments.reconcile_payment_link',
+        {'vehicle_id': vehicle_id, 'link_id': link_id},
+        idempotency_key=f'reconcile-link:{link_id}:{link_status}',
+    )
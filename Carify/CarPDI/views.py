@@ -1,13 +1,16 @@
 # views/customer_view.py
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
 from django.views.decorators.csrf import csrf_exempt
 from .forms import *
 from .models import *
+from .ingest import SectionBatch
+from . import masterdata
+from .payments import get_gateway
+from .verification import verify_order_signature
+from .orders import RETRY_AFTER, OrderInProgress, get_or_create_order, mark_paid
 from django.utils import timezone
 from django.shortcuts import get_object_or_404, render, redirect
 from django.utils.html import escapejs
-import json
-import razorpay
 from django.conf import settings
 
 @csrf_exempt
@@ -17,22 +20,19 @@ def create_payment(request, vehicle_id):
     if vehicle.payment_status == 'success':
         return redirect('payment_success', vehicle_id=vehicle.id)
 
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-
-    amount_paise = int(vehicle.payment_amount * 100)
-    payment = client.order.create({
-        "amount": amount_paise,
-        "currency": "INR",
-        "payment_capture": '1'
-    })
-
-    vehicle.transaction_id = payment['id']
-    vehicle.payment_status = 'pending'
-    vehicle.save()
+    # Reuses the vehicle's live order if there is one (CarPDI/orders.py)
+    try:
+        order, _ = get_or_create_order(vehicle, get_gateway().create_order, user=request.user)
+    except OrderInProgress:
+        # A parallel request (double click) is creating it - reload in a moment
+        response = HttpResponse("Payment is being set up, please reload the page in a moment.", status=409)
+        response['Retry-After'] = str(RETRY_AFTER)
+        return response
+    amount_paise = order.amount
 
     return render(request, "payment/payment.html", {
         "razorpay_key": settings.RAZORPAY_KEY_ID,
-        "order_id": payment['id'],
+        "order_id": order.order_id,
         "amount": amount_paise,
         "vehicle": vehicle
     })
@@ -40,34 +40,23 @@ def create_payment(request, vehicle_id):
 @csrf_exempt
 def payment_verify(request):
     if request.method == "POST":
-        client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-        try:
-            order_id = request.POST.get('razorpay_order_id')
-            payment_id = request.POST.get('razorpay_payment_id')
-            signature = request.POST.get('razorpay_signature')
-            vehicle_id = request.POST.get("vehicle_id")
-
-            vehicle = get_object_or_404(Vehicle, id=vehicle_id)
-
-            params_dict = {
-                'razorpay_order_id': order_id,
-                'razorpay_payment_id': payment_id,
-                'razorpay_signature': signature
-            }
+        order_id = request.POST.get('razorpay_order_id')
+        payment_id = request.POST.get('razorpay_payment_id')
+        signature = request.POST.get('razorpay_signature')
 
-            client.utility.verify_payment_signature(params_dict)
+        vehicle = get_object_or_404(Vehicle, id=request.POST.get("vehicle_id"))
 
+        # Local HMAC check, no Razorpay client / HTTP needed
+        if verify_order_signature(order_id, payment_id, signature):
+            mark_paid(order_id, payment_id)
             vehicle.payment_status = 'success'
             vehicle.transaction_id = payment_id
             vehicle.save()
-
             return redirect('payment_success', vehicle_id=vehicle.id)
 
-        except razorpay.errors.SignatureVerificationError:
-            vehicle = get_object_or_404(Vehicle, id=request.POST.get("vehicle_id"))
-            vehicle.payment_status = 'failed'
-            vehicle.save()
-            return redirect('payment_failed', vehicle_id=vehicle.id)
+        vehicle.payment_status = 'failed'
+        vehicle.save()
+        return redirect('payment_failed', vehicle_id=vehicle.id)
 
 def payment_success(request, vehicle_id):
     vehicle = get_object_or_404(Vehicle, id=vehicle_id)
@@ -80,7 +69,7 @@ def payment_failed(request, vehicle_id):
 def send_payment_link(request, vehicle_id):
     vehicle = Vehicle.objects.get(id=vehicle_id)
     
-    client = razorpay.Client(auth=(settings.RAZORPAY_API_KEY, settings.RAZORPAY_API_SECRET))
+    gateway = get_gateway()
 
     amount_rupees = 500  # Replace with dynamic logic or field (₹500)
     amount_paise = amount_rupees * 100  # Razorpay uses paise
@@ -104,7 +93,7 @@ def send_payment_link(request, vehicle_id):
         "callback_method": "get"
     }
 
-    response = client.payment_link.create(payment_data)
+    response = gateway.create_payment_link(payment_data)
 
     # Optional: Save the link ID and status to your model
     vehicle.payment_link_id = response['id']
@@ -234,9 +223,9 @@ def vehicle_view(request):
         return render(request, 'car/form.html', {
             'form': form,
             'current_form': 'vehicle',
-            'fuel_types': VehicleFuelType.objects.all(),
-            'transmission_types': VehicleTransmission.objects.all(),
-            'engine_types': VehicleEngineType.objects.all(),
+            'fuel_types': masterdata.get_rows(VehicleFuelType),
+            'transmission_types': masterdata.get_rows(VehicleTransmission),
+            'engine_types': masterdata.get_rows(VehicleEngineType),
             'customer': customer,
             'vehcile':vehicle,
         })
@@ -292,7 +281,11 @@ def systemcheck_view(request):
     vehicle = get_object_or_404(Vehicle, id=vehicle_id)
 
     if request.method == 'POST':
-        systems_qs = System.objects.all()
+        # invalid status rows are skipped, same as before
+        batch = SectionBatch(SystemCheck, vehicle, skip_unresolved=True)
+        statuses = batch.lookup(Status, iexact=True)
+
+        systems_qs = masterdata.get_rows(System)
         for system in systems_qs:
             status_key = f'status_{system.id}'
             custom_status_key = f'custom_status_{system.id}'
@@ -305,42 +298,24 @@ def systemcheck_view(request):
             if not status_id and not custom_status:
                 continue  # skip if no data
 
-            # Handle custom status
-            if status_id == '__custom__' and custom_status.strip():
-                status_obj, _ = Status.objects.get_or_create(
-                    name__iexact=custom_status.strip(),
-                    defaults={'name': custom_status.strip()}
-                )
-            else:
-                try:
-                    status_obj = Status.objects.get(id=int(status_id))
-                except (ValueError, Status.DoesNotExist):
-                    continue  # skip invalid status
-
-            SystemCheck.objects.create(
-                vehicle=vehicle,
+            batch.add(
                 system=system,
-                status=status_obj,
+                status=statuses.ref(status_id, custom_status),
                 number_of_issues=int(number_of_issues or 0)
             )
 
+        batch.save()
         return redirect('form_networksystem')
 
 
-    # Querysets for dropdowns (HTML usage)
-    systems_qs = System.objects.all()
-    statuses_qs = Status.objects.all()
-
-    # JSON-safe data for JavaScript usage
-    systems = list(System.objects.values('id', 'name'))
-    statuses = list(Status.objects.values('id', 'name'))
+    # Cached rows for dropdowns (HTML usage) + pre-serialized JSON for JavaScript
     return render(request, 'car/form.html', {
     'current_form': 'systemcheck',
     'vehicle': vehicle,
-    'systems': systems_qs,       
-    'statuses': statuses_qs,
-    'systems_json': json.dumps(systems),
-    'statuses_json':json.dumps(statuses),
+    'systems': masterdata.get_rows(System),
+    'statuses': masterdata.get_rows(Status),
+    'systems_json': masterdata.get_json(System),
+    'statuses_json': masterdata.get_json(Status),
     })
 
 
@@ -357,40 +332,33 @@ def networksystem_view(request):
         custom_statuses = request.POST.getlist('custom_status')
         remarks = request.POST.getlist('remark')
 
-        areas_qs = list(NetworkArea.objects.all())  # Assumed order preserved
+        areas_qs = masterdata.get_rows(NetworkArea)  # Assumed order preserved
 
         if not (len(areas_qs) == len(statuses) == len(custom_statuses) == len(remarks)):
             return JsonResponse({'success': False, 'message': 'Mismatched row count'}, status=400)
 
-        for i, area in enumerate(areas_qs):
-            # Status
-            status_id = statuses[i]
-            if status_id == "__custom__" and custom_statuses[i].strip():
-                status, _ = Status.objects.get_or_create(name=custom_statuses[i].strip())
-            else:
-                status = get_object_or_404(Status, id=status_id)
-
-            remark = remarks[i]
+        batch = SectionBatch(NetworkSystem, vehicle)
+        status_lookup = batch.lookup(Status)
 
-            NetworkSystem.objects.create(
-                vehicle=vehicle,
+        for i, area in enumerate(areas_qs):
+            batch.add(
                 area=area,
-                status=status,
-                remark=remark
+                status=status_lookup.ref(statuses[i], custom_statuses[i]),
+                remark=remarks[i]
             )
 
+        batch.save()
         return redirect('form_liveparameters')
 
     # GET request
-    areas_qs = NetworkArea.objects.all()
-    statuses_qs = Status.objects.all()
+    areas_qs = masterdata.get_rows(NetworkArea)
     return render(request, 'car/form.html', {
             'current_form': 'networksystem',
             'vehicle': vehicle,
             'areas': areas_qs,
-            'statuses': Status.objects.all(),
-            'areas_json': json.dumps(list(areas_qs.values('id', 'name'))),
-            'statuses_json': json.dumps(list(Status.objects.values('id', 'name'))),
+            'statuses': masterdata.get_rows(Status),
+            'areas_json': masterdata.get_json(NetworkArea),
+            'statuses_json': masterdata.get_json(Status),
             'error': 'Something went wrong. Please ensure all fields are filled correctly.'
         })
 
@@ -416,59 +384,50 @@ def liveparameters_view(request):
             return render(request, 'car/form.html', {
                 'current_form': 'liveparameters',
                 'vehicle': vehicle,
-                'parameters': Parameters.objects.all(),
-                'inferences': VoltageInference.objects.all(),
-                'parameters_json': json.dumps(list(Parameters.objects.values('id', 'name'))),
-                'inferences_json': json.dumps(list(VoltageInference.objects.values('id', 'voltage'))),
+                'parameters': masterdata.get_rows(Parameters),
+                'inferences': masterdata.get_rows(VoltageInference),
+                'parameters_json': masterdata.get_json(Parameters),
+                'inferences_json': masterdata.get_json(VoltageInference, fields=('id', 'voltage')),
                 'error': 'Mismatched data rows. Please check and try again.'
             })
 
-        for i in range(len(systems)):
-            try:
-                # SYSTEM
-                if systems[i] == "__custom__" and custom_systems[i].strip():
-                    system, _ = Parameters.objects.get_or_create(name=custom_systems[i].strip())
-                else:
-                    system = get_object_or_404(Parameters, id=systems[i])
+        batch = SectionBatch(LiveParameters, vehicle)
+        parameter_lookup = batch.lookup(Parameters)
+        # Custom inference: `voltage` is used as its name
+        inference_lookup = batch.lookup(
+            VoltageInference, name_field='voltage',
+            defaults={'engine_state': '', 'interence': '', 'recommendation': ''}
+        )
 
-                # INFERENCE
-                if inferences[i] == "__custom__" and custom_inferences[i].strip():
-                    inference, _ = VoltageInference.objects.get_or_create(
-                        voltage=custom_inferences[i].strip(),  # Assuming `voltage` is used as name
-                        defaults={'engine_state': '', 'interence': '', 'recommendation': ''}
-                    )
-                else:
-                    inference = get_object_or_404(VoltageInference, id=inferences[i])
+        for i in range(len(systems)):
+            batch.add(
+                system=parameter_lookup.ref(systems[i], custom_systems[i]),
+                interence=inference_lookup.ref(inferences[i], custom_inferences[i])
+            )
 
-                LiveParameters.objects.create(
-                    vehicle=vehicle,
-                    system=system,
-                    interence=inference
-                )
-            except Exception as e:
-                return render(request, 'car/form.html', {
-                    'current_form': 'liveparameters',
-                    'vehicle': vehicle,
-                    'parameters': Parameters.objects.all(),
-                    'inferences': VoltageInference.objects.all(),
-                    'parameters_json': json.dumps(list(Parameters.objects.values('id', 'name'))),
-                    'inferences_json': json.dumps(list(VoltageInference.objects.values('id', 'voltage'))),
-                    'error': f"Error in row {i+1}: {str(e)}"
-                })
+        try:
+            batch.save()
+        except Exception as e:
+            return render(request, 'car/form.html', {
+                'current_form': 'liveparameters',
+                'vehicle': vehicle,
+                'parameters': masterdata.get_rows(Parameters),
+                'inferences': masterdata.get_rows(VoltageInference),
+                'parameters_json': masterdata.get_json(Parameters),
+                'inferences_json': masterdata.get_json(VoltageInference, fields=('id', 'voltage')),
+                'error': f"Error: {str(e)}"
+            })
 
         return redirect('form_performancecheck')
 
     # GET: return form
-    param_qs = list(Parameters.objects.values('id', 'name'))
-    inf_qs = list(VoltageInference.objects.values('id', 'voltage'))
-
     return render(request, 'car/form.html', {
         'current_form': 'liveparameters',
         'vehicle': vehicle,
-        'parameters': Parameters.objects.all(),
-        'inferences': VoltageInference.objects.all(),
-        'parameters_json': json.dumps(param_qs),
-        'inferences_json': json.dumps(inf_qs),
+        'parameters': masterdata.get_rows(Parameters),
+        'inferences': masterdata.get_rows(VoltageInference),
+        'parameters_json': masterdata.get_json(Parameters),
+        'inferences_json': masterdata.get_json(VoltageInference, fields=('id', 'voltage')),
     })
 
 @csrf_exempt
@@ -479,8 +438,8 @@ def performancecheck_view(request):
 
     vehicle = get_object_or_404(Vehicle, id=vehicle_id)
 
-    performance_systems = list(Performance.objects.all())
-    statuses = list(Status.objects.all())
+    performance_systems = masterdata.get_rows(Performance)
+    statuses = masterdata.get_rows(Status)
 
     if request.method == "POST":
         status_list = request.POST.getlist("status")
@@ -498,49 +457,44 @@ def performancecheck_view(request):
                 'vehicle': vehicle,
                 'performance_systems': performance_systems,
                 'statuses': statuses,
-                'performance_json': json.dumps([{'id': s.id, 'name': s.name} for s in performance_systems]),
-                'statuses_json': json.dumps([{'id': s.id, 'name': s.name} for s in statuses]),
+                'performance_json': masterdata.get_json(Performance),
+                'statuses_json': masterdata.get_json(Status),
                 'error': "Mismatch in row data. Ensure all inputs are filled correctly."
             })
 
-        for i in range(len(status_list)):
-            try:
+        batch = SectionBatch(PerformanceCheck, vehicle)
+        system_lookup = batch.lookup(Performance)
+        status_lookup = batch.lookup(Status)
+
+        try:
+            for i in range(len(status_list)):
                 # Handle system (static or dynamic)
                 if i < len(performance_systems):
                     system = performance_systems[i]
                 else:
-                    sys_id = system_list[i - len(performance_systems)]
-                    custom_name = custom_system_list[i - len(performance_systems)].strip()
-                    if sys_id == "__custom__" and custom_name:
-                        system, _ = Performance.objects.get_or_create(name=custom_name)
-                    else:
-                        system = get_object_or_404(Performance, id=sys_id)
-
-                # Handle status
-                status_id = status_list[i]
-                if status_id == "__custom__" and custom_status_list[i].strip():
-                    status, _ = Status.objects.get_or_create(name=custom_status_list[i].strip())
-                else:
-                    status = get_object_or_404(Status, id=status_id)
+                    system = system_lookup.ref(
+                        system_list[i - len(performance_systems)],
+                        custom_system_list[i - len(performance_systems)]
+                    )
 
-                # Save
-                PerformanceCheck.objects.create(
-                    vehicle=vehicle,
+                batch.add(
                     system=system,
-                    status=status,
+                    status=status_lookup.ref(status_list[i], custom_status_list[i]),
                     recommendation=recommendation_list[i].strip()
                 )
 
-            except Exception as e:
-                return render(request, "car/form.html", {
-                    'current_form': 'performancecheck',
-                    'vehicle': vehicle,
-                    'performance_systems': performance_systems,
-                    'statuses': statuses,
-                    'performance_json': json.dumps([{'id': s.id, 'name': s.name} for s in performance_systems]),
-                    'statuses_json': json.dumps([{'id': s.id, 'name': s.name} for s in statuses]),
-                    'error': f"Error at row {i+1}: {str(e)}"
-                })
+            batch.save()
+
+        except Exception as e:
+            return render(request, "car/form.html", {
+                'current_form': 'performancecheck',
+                'vehicle': vehicle,
+                'performance_systems': performance_systems,
+                'statuses': statuses,
+                'performance_json': masterdata.get_json(Performance),
+                'statuses_json': masterdata.get_json(Status),
+                'error': f"Error: {str(e)}"
+            })
 
         return redirect('form_fluidlevel')
 
@@ -550,8 +504,8 @@ def performancecheck_view(request):
         'vehicle': vehicle,
         'performance_systems': performance_systems,
         'statuses': statuses,
-        'performance_json': json.dumps([{'id': s.id, 'name': s.name} for s in performance_systems]),
-        'statuses_json': json.dumps([{'id': s.id, 'name': s.name} for s in statuses]),
+        'performance_json': masterdata.get_json(Performance),
+        'statuses_json': masterdata.get_json(Status),
     })
 
 @csrf_exempt
@@ -562,9 +516,9 @@ def fluidlevel_view(request):
 
     vehicle = get_object_or_404(Vehicle, id=vehicle_id)
 
-    fluid_areas = list(FluidArea.objects.all())
-    fluid_ranges = list(FluidRange.objects.all())
-    statuses = list(Status.objects.all())
+    fluid_areas = masterdata.get_rows(FluidArea)
+    fluid_ranges = masterdata.get_rows(FluidRange)
+    statuses = masterdata.get_rows(Status)
 
     if request.method == 'POST':
         try:
@@ -582,41 +536,29 @@ def fluidlevel_view(request):
             if not (len(range_ids) == len(custom_ranges) == len(contamination_ids) == len(custom_statuses) == total_rows):
                 raise ValueError("Input row lengths mismatch.")
 
+            batch = SectionBatch(FluidLevel, vehicle)
+            area_lookup = batch.lookup(FluidArea)
+            range_lookup = batch.lookup(FluidRange)
+            status_lookup = batch.lookup(Status)
+
             for i in range(total_rows):
                 # Area: from static loop or dynamic row
                 if i < len(fluid_areas):
                     area = fluid_areas[i]
                 else:
-                    area_id = area_ids[i - len(fluid_areas)]
-                    custom_area = custom_areas[i - len(fluid_areas)].strip()
-                    if area_id == '__custom__' and custom_area:
-                        area, _ = FluidArea.objects.get_or_create(name=custom_area)
-                    else:
-                        area = get_object_or_404(FluidArea, id=area_id)
-
-                # Range
-                range_id = range_ids[i]
-                if range_id == '__custom__' and custom_ranges[i].strip():
-                    in_range, _ = FluidRange.objects.get_or_create(name=custom_ranges[i].strip())
-                else:
-                    in_range = get_object_or_404(FluidRange, id=range_id)
-
-                # Contamination
-                status_id = contamination_ids[i]
-                if status_id == '__custom__' and custom_statuses[i].strip():
-                    contamination, _ = Status.objects.get_or_create(name=custom_statuses[i].strip())
-                else:
-                    contamination = get_object_or_404(Status, id=status_id)
+                    area = area_lookup.ref(
+                        area_ids[i - len(fluid_areas)],
+                        custom_areas[i - len(fluid_areas)]
+                    )
 
-                # Save
-                FluidLevel.objects.create(
-                    vehicle=vehicle,
+                batch.add(
                     area=area,
-                    in_range=in_range,
-                    contamination=contamination,
+                    in_range=range_lookup.ref(range_ids[i], custom_ranges[i]),
+                    contamination=status_lookup.ref(contamination_ids[i], custom_statuses[i]),
                     recommendation=recommendations[i].strip()
                 )
 
+            batch.save()
             return redirect('form_tyrecondition')
 
         except Exception as e:
@@ -626,10 +568,10 @@ def fluidlevel_view(request):
                 'fluid_areas': fluid_areas,
                 'fluid_ranges': fluid_ranges,
                 'statuses': statuses,
-                'fluid_areas_json': json.dumps([{'id': a.id, 'name': a.name} for a in fluid_areas]),
-                'fluid_ranges_json': json.dumps([{'id': r.id, 'name': r.name} for r in fluid_ranges]),
-                'statuses_json': json.dumps([{'id': s.id, 'name': s.name} for s in statuses]),
-                'error': f"⚠️ Error processing row {i + 1}: {str(e)}"
+                'fluid_areas_json': masterdata.get_json(FluidArea),
+                'fluid_ranges_json': masterdata.get_json(FluidRange),
+                'statuses_json': masterdata.get_json(Status),
+                'error': f"⚠️ Error: {str(e)}"
             })
 
     # GET request
@@ -639,9 +581,9 @@ def fluidlevel_view(request):
         'fluid_areas': fluid_areas,
         'fluid_ranges': fluid_ranges,
         'statuses': statuses,
-        'fluid_areas_json': json.dumps([{'id': a.id, 'name': a.name} for a in fluid_areas]),
-        'fluid_ranges_json': json.dumps([{'id': r.id, 'name': r.name} for r in fluid_ranges]),
-        'statuses_json': json.dumps([{'id': s.id, 'name': s.name} for s in statuses]),
+        'fluid_areas_json': masterdata.get_json(FluidArea),
+        'fluid_ranges_json': masterdata.get_json(FluidRange),
+        'statuses_json': masterdata.get_json(Status),
     })
 
 
@@ -662,35 +604,26 @@ def tyrecondition_view(request):
         lives = request.POST.getlist('remaining_life_percent')
         custom_conditions = request.POST.getlist('custom_condition')
 
-        for i in range(len(positions)):
-            # Get or create the TyrePosition (predefined)
-            pos_obj, _ = TyrePosition.objects.get_or_create(name=positions[i])
-
-            # Handle condition (may include custom)
-            if conditions[i] == '__custom__' and custom_conditions[i].strip():
-                cond_obj, _ = Status.objects.get_or_create(
-                    name__iexact=custom_conditions[i].strip(),
-                    defaults={'name': custom_conditions[i].strip()}
-                )
-            else:
-                cond_obj = get_object_or_404(Status, id=int(conditions[i]))
+        batch = SectionBatch(TyreCondition, vehicle)
+        position_lookup = batch.lookup(TyrePosition)
+        condition_lookup = batch.lookup(Status, iexact=True)
 
-            TyreCondition.objects.create(
-                vehicle=vehicle,
-                position=pos_obj,
+        for i in range(len(positions)):
+            batch.add(
+                position=position_lookup.named(positions[i]),  # predefined, created on first use
                 brand=brands[i],
-                condition=cond_obj,
+                condition=condition_lookup.ref(conditions[i], custom_conditions[i]),
                 remaining_life_percent=lives[i]
             )
 
+        batch.save()
         return redirect('form_paintfinish')
 
-    statuses_qs = list(Status.objects.values('id', 'name'))
     return render(request, 'car/form.html', {
         'current_form': 'tyrecondition',
         'vehicle': vehicle,
-        'statuses': Status.objects.all(),
-        'statuses_json': escapejs(json.dumps(statuses_qs)),
+        'statuses': masterdata.get_rows(Status),
+        'statuses_json': escapejs(masterdata.get_json(Status)),
     })
 @csrf_exempt
 def paintfinish_view(request):
@@ -703,8 +636,8 @@ def paintfinish_view(request):
         }, status=400)
 
     vehicle = get_object_or_404(Vehicle, id=vehicle_id)
-    paint_areas_qs = PaintArea.objects.all()
-    status_qs = Status.objects.all()
+    paint_areas_qs = masterdata.get_rows(PaintArea)
+    status_qs = masterdata.get_rows(Status)
 
     if request.method == 'POST':
         try:
@@ -719,25 +652,19 @@ def paintfinish_view(request):
             if not (len(conditions) == len(actions)):
                 raise ValueError("Mismatch in form row lengths.")
 
+            batch = SectionBatch(PaintFinish, vehicle)
+            area_lookup = batch.lookup(PaintArea)
+            condition_lookup = batch.lookup(Status)
+
             for i in range(total_rows):
                 # Area Handling (for static rows, we take from DB order; for dynamic, from POST)
                 if i < len(paint_areas_qs):
                     area_obj = paint_areas_qs[i]
                 else:
-                    area_id = areas[i - len(paint_areas_qs)]
-                    custom_area = custom_areas[i - len(paint_areas_qs)].strip()
-                    if area_id == '__custom__' and custom_area:
-                        area_obj, _ = PaintArea.objects.get_or_create(name=custom_area)
-                    else:
-                        area_obj = get_object_or_404(PaintArea, id=area_id)
-
-                # Condition Handling
-                cond_id = conditions[i]
-                custom_condition = custom_conditions[i].strip()
-                if cond_id == '__custom__' and custom_condition:
-                    condition_obj, _ = Status.objects.get_or_create(name=custom_condition)
-                else:
-                    condition_obj = get_object_or_404(Status, id=cond_id)
+                    area_obj = area_lookup.ref(
+                        areas[i - len(paint_areas_qs)],
+                        custom_areas[i - len(paint_areas_qs)]
+                    )
 
                 # Repainted Checkbox
                 repainted = request.POST.get(f'repainted_{i}', 'off') == 'on'
@@ -745,15 +672,14 @@ def paintfinish_view(request):
                 # Action
                 action = actions[i].strip() if i < len(actions) else 'NIL'
 
-                # Save
-                PaintFinish.objects.create(
-                    vehicle=vehicle,
+                batch.add(
                     area=area_obj,
                     repainted=repainted,
-                    condition=condition_obj,
+                    condition=condition_lookup.ref(conditions[i], custom_conditions[i]),
                     action=action if action else 'NIL'
                 )
 
+            batch.save()
             return redirect('form_flushgap')
 
         except Exception as e:
@@ -762,8 +688,8 @@ def paintfinish_view(request):
                 'vehicle': vehicle,
                 'paint_areas': paint_areas_qs,
                 'statuses': status_qs,
-                'paint_areas_json': json.dumps(list(paint_areas_qs.values('id', 'name'))),
-                'statuses_json': json.dumps(list(status_qs.values('id', 'name'))),
+                'paint_areas_json': masterdata.get_json(PaintArea),
+                'statuses_json': masterdata.get_json(Status),
                 'error': f"⚠️ Error: {str(e)}"
             })
 
@@ -773,8 +699,8 @@ def paintfinish_view(request):
         'vehicle': vehicle,
         'paint_areas': paint_areas_qs,
         'statuses': status_qs,
-        'paint_areas_json': json.dumps(list(paint_areas_qs.values('id', 'name'))),
-        'statuses_json': json.dumps(list(status_qs.values('id', 'name')))
+        'paint_areas_json': masterdata.get_json(PaintArea),
+        'statuses_json': masterdata.get_json(Status)
     })
 
 @csrf_exempt
@@ -784,8 +710,8 @@ def flushgap_view(request):
         return redirect('form_vehicle')
 
     vehicle = get_object_or_404(Vehicle, id=vehicle_id)
-    flush_areas_qs = FlushArea.objects.all()
-    operations_qs = Operations.objects.all()
+    flush_areas_qs = masterdata.get_rows(FlushArea)
+    operations_qs = masterdata.get_rows(Operations)
 
     if request.method == 'POST':
         try:
@@ -800,25 +726,19 @@ def flushgap_view(request):
             if not (len(operations) == len(actions) == total):
                 raise ValueError("Mismatch in form data rows.")
 
+            batch = SectionBatch(FlushGap, vehicle)
+            area_lookup = batch.lookup(FlushArea)
+            operation_lookup = batch.lookup(Operations)
+
             for i in range(total):
                 # Area - match static rows by index, dynamic by area input
                 if i < len(flush_areas_qs):
                     area_obj = flush_areas_qs[i]
                 else:
-                    area_id = areas[i - len(flush_areas_qs)]
-                    custom_area = custom_areas[i - len(flush_areas_qs)].strip()
-                    if area_id == '__custom__' and custom_area:
-                        area_obj, _ = FlushArea.objects.get_or_create(name=custom_area)
-                    else:
-                        area_obj = get_object_or_404(FlushArea, id=area_id)
-
-                # Operation
-                op_id = operations[i]
-                custom_op = custom_ops[i].strip()
-                if op_id == '__custom__' and custom_op:
-                    op_obj, _ = Operations.objects.get_or_create(name=custom_op)
-                else:
-                    op_obj = get_object_or_404(Operations, id=op_id)
+                    area_obj = area_lookup.ref(
+                        areas[i - len(flush_areas_qs)],
+                        custom_areas[i - len(flush_areas_qs)]
+                    )
 
                 # Observation (Yes/No)
                 observation = observations[i] if i < len(observations) else 'No'
@@ -826,15 +746,14 @@ def flushgap_view(request):
                 # Action
                 action = actions[i].strip() if i < len(actions) else 'NIL'
 
-                # Save
-                FlushGap.objects.create(
-                    vehicle=vehicle,
+                batch.add(
                     area=area_obj,
-                    operation=op_obj,
+                    operation=operation_lookup.ref(operations[i], custom_ops[i]),
                     observation_gap=observation,
                     action=action if action else 'NIL'
                 )
 
+            batch.save()
             return redirect('form_rubbercomponent')
 
         except Exception as e:
@@ -843,8 +762,8 @@ def flushgap_view(request):
                 'vehicle': vehicle,
                 'flush_areas': flush_areas_qs,
                 'operations': operations_qs,
-                'flush_areas_json': json.dumps(list(flush_areas_qs.values('id', 'name'))),
-                'operations_json': json.dumps(list(operations_qs.values('id', 'name'))),
+                'flush_areas_json': masterdata.get_json(FlushArea),
+                'operations_json': masterdata.get_json(Operations),
                 'error': f"⚠️ Error: {str(e)}"
             })
 
@@ -854,8 +773,8 @@ def flushgap_view(request):
         'vehicle': vehicle,
         'flush_areas': flush_areas_qs,
         'operations': operations_qs,
-        'flush_areas_json': json.dumps(list(flush_areas_qs.values('id', 'name'))),
-        'operations_json': json.dumps(list(operations_qs.values('id', 'name')))
+        'flush_areas_json': masterdata.get_json(FlushArea),
+        'operations_json': masterdata.get_json(Operations)
     })
 
 # views.py
@@ -870,8 +789,8 @@ def rubbercomponent_view(request):
         }, status=400)
 
     vehicle = get_object_or_404(Vehicle, id=vehicle_id)
-    rubber_areas_qs = RubberArea.objects.all()
-    statuses_qs = Status.objects.all()
+    rubber_areas_qs = masterdata.get_rows(RubberArea)
+    statuses_qs = masterdata.get_rows(Status)
 
     if request.method == 'POST':
         try:
@@ -888,37 +807,33 @@ def rubbercomponent_view(request):
             if not (len(conditions) == len(recommendations)):
                 raise ValueError("Mismatch in form input rows")
 
+            batch = SectionBatch(RubberComponent, vehicle)
+            area_lookup = batch.lookup(RubberArea)
+            condition_lookup = batch.lookup(Status)
+
             for i in range(total):
                 # Handle area (static or dynamic)
                 if i < len(rubber_areas_qs):
                     area_obj = rubber_areas_qs[i]
                 else:
-                    area_id = areas[i - len(rubber_areas_qs)]
-                    custom_area = custom_areas[i - len(rubber_areas_qs)].strip()
-                    if area_id == '__custom__' and custom_area:
-                        area_obj, _ = RubberArea.objects.get_or_create(name=custom_area)
-                    else:
-                        area_obj = get_object_or_404(RubberArea, id=area_id)
+                    area_obj = area_lookup.ref(
+                        areas[i - len(rubber_areas_qs)],
+                        custom_areas[i - len(rubber_areas_qs)]
+                    )
 
                 # Handle condition (standard or custom)
-                condition_id = conditions[i]
-                custom_cond = custom_conditions[i].strip() if i < len(custom_conditions) else ''
-                if condition_id == '__custom__' and custom_cond:
-                    condition_obj, _ = Status.objects.get_or_create(name=custom_cond)
-                else:
-                    condition_obj = get_object_or_404(Status, id=condition_id)
+                custom_cond = custom_conditions[i] if i < len(custom_conditions) else ''
 
                 # Recommendation
                 rec = recommendations[i].strip() if i < len(recommendations) else 'NIL'
 
-                # Save
-                RubberComponent.objects.create(
-                    vehicle=vehicle,
+                batch.add(
                     area=area_obj,
-                    condition=condition_obj,
+                    condition=condition_lookup.ref(conditions[i], custom_cond),
                     recommendation=rec
                 )
 
+            batch.save()
             return redirect('form_glasscomponent')
 
         except Exception as e:
@@ -927,8 +842,8 @@ def rubbercomponent_view(request):
                 'vehicle': vehicle,
                 'rubber_areas': rubber_areas_qs,
                 'statuses': statuses_qs,
-                'rubber_areas_json': json.dumps(list(rubber_areas_qs.values('id', 'name'))),
-                'statuses_json': json.dumps(list(statuses_qs.values('id', 'name'))),
+                'rubber_areas_json': masterdata.get_json(RubberArea),
+                'statuses_json': masterdata.get_json(Status),
                 'error': f"⚠️ Error: {str(e)}"
             })
 
@@ -938,8 +853,8 @@ def rubbercomponent_view(request):
         'vehicle': vehicle,
         'rubber_areas': rubber_areas_qs,
         'statuses': statuses_qs,
-        'rubber_areas_json': json.dumps(list(rubber_areas_qs.values('id', 'name'))),
-        'statuses_json': json.dumps(list(statuses_qs.values('id', 'name')))
+        'rubber_areas_json': masterdata.get_json(RubberArea),
+        'statuses_json': masterdata.get_json(Status)
     })
 
 @csrf_exempt
@@ -953,8 +868,8 @@ def glasscomponent_view(request):
         }, status=400)
 
     vehicle = get_object_or_404(Vehicle, id=vehicle_id)
-    glass_areas_qs = GlassArea.objects.all()
-    statuses_qs = Status.objects.all()
+    glass_areas_qs = masterdata.get_rows(GlassArea)
+    statuses_qs = masterdata.get_rows(Status)
 
     if request.method == 'POST':
         try:
@@ -970,35 +885,28 @@ def glasscomponent_view(request):
             if not (len(brands) == len(conditions) == len(recommendations)):
                 raise ValueError("Mismatch in number of rows submitted")
 
+            batch = SectionBatch(GlassComponent, vehicle)
+            area_lookup = batch.lookup(GlassArea)
+            condition_lookup = batch.lookup(Status)
+
             for i in range(total):
                 # Handle Area (static or dynamic)
                 if i < len(glass_areas_qs):
                     area_obj = glass_areas_qs[i]
                 else:
-                    area_id = areas[i - len(glass_areas_qs)]
-                    custom_area = custom_areas[i - len(glass_areas_qs)].strip()
-                    if area_id == '__custom__' and custom_area:
-                        area_obj, _ = GlassArea.objects.get_or_create(name=custom_area)
-                    else:
-                        area_obj = get_object_or_404(GlassArea, id=area_id)
-
-                # Handle Condition
-                condition_id = conditions[i]
-                custom_cond = custom_conditions[i].strip()
-                if condition_id == '__custom__' and custom_cond:
-                    condition_obj, _ = Status.objects.get_or_create(name=custom_cond)
-                else:
-                    condition_obj = get_object_or_404(Status, id=condition_id)
+                    area_obj = area_lookup.ref(
+                        areas[i - len(glass_areas_qs)],
+                        custom_areas[i - len(glass_areas_qs)]
+                    )
 
-                # Create GlassComponent record
-                GlassComponent.objects.create(
-                    vehicle=vehicle,
+                batch.add(
                     area=area_obj,
                     brand=brands[i].strip(),
-                    condition=condition_obj,
+                    condition=condition_lookup.ref(conditions[i], custom_conditions[i]),
                     recommendation=recommendations[i].strip()
                 )
 
+            batch.save()
             return redirect('form_interiorcomponent')
 
         except Exception as e:
@@ -1007,8 +915,8 @@ def glasscomponent_view(request):
                 'vehicle': vehicle,
                 'glass_areas': glass_areas_qs,
                 'statuses': statuses_qs,
-                'glass_areas_json': json.dumps(list(glass_areas_qs.values('id', 'name'))),
-                'statuses_json': json.dumps(list(statuses_qs.values('id', 'name'))),
+                'glass_areas_json': masterdata.get_json(GlassArea),
+                'statuses_json': masterdata.get_json(Status),
                 'error': f"⚠️ Error: {str(e)}"
             })
 
@@ -1018,8 +926,8 @@ def glasscomponent_view(request):
         'vehicle': vehicle,
         'glass_areas': glass_areas_qs,
         'statuses': statuses_qs,
-        'glass_areas_json': json.dumps(list(glass_areas_qs.values('id', 'name'))),
-        'statuses_json': json.dumps(list(statuses_qs.values('id', 'name')))
+        'glass_areas_json': masterdata.get_json(GlassArea),
+        'statuses_json': masterdata.get_json(Status)
     })
 
 @csrf_exempt
@@ -1039,50 +947,27 @@ def interiorcomponent_view(request):
         custom_conditions = request.POST.getlist('custom_condition')
         recommendations = request.POST.getlist('recommendation')
 
-        for i in range(len(categories)):
-            # Category
-            if categories[i] == '__custom__' and custom_categories[i].strip():
-                category_obj, _ = InteriorCategory.objects.get_or_create(
-                    name__iexact=custom_categories[i].strip(),
-                    defaults={'name': custom_categories[i].strip()}
-                )
-            else:
-                category_obj = get_object_or_404(InteriorCategory, id=int(categories[i]))
-
-            # Area
-            if areas[i] == '__custom__' and custom_areas[i].strip():
-                area_obj, _ = InteriorArea.objects.get_or_create(
-                    name__iexact=custom_areas[i].strip(),
-                    defaults={'name': custom_areas[i].strip()}
-                )
-            else:
-                area_obj = get_object_or_404(InteriorArea, id=int(areas[i]))
-
-            # Condition
-            if conditions[i] == '__custom__' and custom_conditions[i].strip():
-                condition_obj, _ = Status.objects.get_or_create(
-                    name__iexact=custom_conditions[i].strip(),
-                    defaults={'name': custom_conditions[i].strip()}
-                )
-            else:
-                condition_obj = get_object_or_404(Status, id=int(conditions[i]))
+        batch = SectionBatch(InteriorComponent, vehicle)
+        category_lookup = batch.lookup(InteriorCategory, iexact=True)
+        area_lookup = batch.lookup(InteriorArea, iexact=True)
+        condition_lookup = batch.lookup(Status, iexact=True)
 
+        for i in range(len(categories)):
             # Recommendation
             recommendation = recommendations[i].strip() if i < len(recommendations) else 'NIL'
 
-            # Save
-            InteriorComponent.objects.create(
-                vehicle=vehicle,
-                category=category_obj,
-                area=area_obj,
-                condition=condition_obj,
+            batch.add(
+                category=category_lookup.ref(categories[i], custom_categories[i]),
+                area=area_lookup.ref(areas[i], custom_areas[i]),
+                condition=condition_lookup.ref(conditions[i], custom_conditions[i]),
                 recommendation=recommendation
             )
 
-        return redirect('form_documentation') 
-    categories = InteriorCategory.objects.all()
-    areas = InteriorArea.objects.all()
-    statuses = Status.objects.all()
+        batch.save()
+        return redirect('form_documentation')
+    categories = masterdata.get_rows(InteriorCategory)
+    areas = masterdata.get_rows(InteriorArea)
+    statuses = masterdata.get_rows(Status)
 
     return render(request, 'car/form.html', {
         'current_form': 'interiorcomponent',
@@ -1090,9 +975,9 @@ def interiorcomponent_view(request):
         'categories': categories,
         'areas': areas,
         'statuses': statuses,
-        'categories_json': json.dumps(list(categories.values('id', 'name'))),
-        'areas_json': json.dumps(list(areas.values('id', 'name'))),
-        'statuses_json': json.dumps(list(statuses.values('id', 'name')))
+        'categories_json': masterdata.get_json(InteriorCategory),
+        'areas_json': masterdata.get_json(InteriorArea),
+        'statuses_json': masterdata.get_json(Status)
     })
 
 @csrf_exempt
@@ -1102,32 +987,26 @@ def documentation_view(request):
         return redirect('form_vehicle')
 
     vehicle = get_object_or_404(Vehicle, id=vehicle_id)
-    document_types = list(DocumentType.objects.all())
-    statuses = list(Status.objects.all())
+    document_types = masterdata.get_rows(DocumentType)
+    statuses = masterdata.get_rows(Status)
 
     if request.method == 'POST':
+        batch = SectionBatch(Documentation, vehicle)
+        status_lookup = batch.lookup(Status, iexact=True)
+
         for i, doc in enumerate(document_types):
-            doc_id = request.POST.get(f'document_{i}')
             status_val = request.POST.get(f'status_{i}')
-            custom_status_val = request.POST.get(f'custom_status_{i}', '').strip()
+            custom_status_val = request.POST.get(f'custom_status_{i}', '')
             remark = request.POST.get(f'remark_{i}', '')
 
-            # Determine status object
-            if status_val == '__custom__' and custom_status_val:
-                status_obj, _ = Status.objects.get_or_create(
-                    name__iexact=custom_status_val,
-                    defaults={'name': custom_status_val}
-                )
-            else:
-                status_obj = get_object_or_404(Status, id=int(status_val))
-
-            Documentation.objects.create(
-                vehicle=vehicle,
+            batch.add(
                 document=doc,
-                status=status_obj,
+                status=status_lookup.ref(status_val, custom_status_val),
                 remark=remark
             )
 
+        batch.save()
+
         # ✅ Redirect after successful POST
         return redirect('admin_dashboard')  # or 'admin_dashboard' if you want to go back
 
@@ -1136,6 +1015,6 @@ def documentation_view(request):
         'vehicle': vehicle,
         'document_types': document_types,
         'statuses': statuses,
-        'document_types_json': json.dumps(list(DocumentType.objects.values('id', 'name'))),
-        'statuses_json': json.dumps(list(Status.objects.values('id', 'name')))
+        'document_types_json': masterdata.get_json(DocumentType),
+        'statuses_json': masterdata.get_json(Status)
     })
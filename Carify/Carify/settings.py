@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,6 +47,7 @@ INSTALLED_APPS = [
     'drf_yasg',                
     'rest_framework',
     'rest_framework.authtoken',
+    'channels',
 ]
 AUTH_USER_MODEL = "User.CustomUser"
 
@@ -82,6 +85,49 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Carify.wsgi.application'
+ASGI_APPLICATION = 'Carify.asgi.application'
+
+# Websocket push (payment status). Pushes come from WSGI views, run_jobs and
+# reconcile_payments - other processes than the ASGI consumers - so production
+# needs a shared layer: set CHANNEL_REDIS_URL (e.g. redis://localhost:6379/1).
+# The in-memory layer only reaches consumers in the same process (dev / tests).
+CHANNEL_REDIS_URL = os.environ.get('CHANNEL_REDIS_URL')
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [CHANNEL_REDIS_URL],
+            },
+        },
+    }
+elif DEBUG:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+else:
+    raise ImproperlyConfigured("Set CHANNEL_REDIS_URL: the in-memory channel layer doesn't work across processes.")
+
+# Cache. The token auth cache and the role cache (User/authentication.py,
+# User/permission.py) are invalidated through it, which only reaches other
+# workers if it is shared: set CACHE_REDIS_URL (e.g. redis://localhost:6379/2).
+# With the per-process LocMemCache those two caches are bypassed.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
 
 
 # Database
@@ -158,12 +204,16 @@ RAZORPAY_KEY_ID = 'rzp_test_7qXPzrfaQAo1KQ'
 RAZORPAY_KEY_SECRET = '6yzRK7bK6Jx1p9WVVnE5di4T'
 IS_RAZORPAY_LIVE = False
 
+# CarPDI/payments.py - 'razorpay' (pooled client) or 'fake' (in-memory, for tests)
+PAYMENT_GATEWAY = 'razorpay'
+PAYMENT_GATEWAY_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
 
 # Carify/settings.py
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'User.authentication.CachedTokenAuthentication',  # TokenAuthentication + active-user tracking + token cache
         'rest_framework.authentication.SessionAuthentication',  # Optional: Admin panel ke liye
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -82,8 +82,8 @@ class UserRoleAdmin(admin.ModelAdmin):
 
 @admin.register(UserSession)
 class UserSessionAdmin(admin.ModelAdmin):
-    list_display = ("user", "login_time", "logout_time", "session_duration")
-    list_filter = ("user",)
+    list_display = ("user", "source", "login_time", "logout_time", "expires_at", "session_duration")
+    list_filter = ("source", "user")
     search_fields = ("user__email",)
 
     def session_duration(self, obj):
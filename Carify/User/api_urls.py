@@ -9,6 +9,8 @@ urlpatterns = [
     path('logout/', api_views.LogoutAPIView.as_view(), name='api_logout'), 
     path('register/', api_views.RegisterAPIView.as_view(), name='api_register'),
     path('dashboard/', api_views.AdminDashboardAPIView.as_view(), name='api_admin_dashboard'),
+    path('dashboard/stats/', api_views.DashboardStatsAPIView.as_view(), name='api_admin_dashboard_stats'),
+    path('dashboard/vehicles/', api_views.DashboardVehicleFeedAPIView.as_view(), name='api_admin_dashboard_vehicles'),
 
     # User Management Dashboard
     path('user-management/', api_views.UserManagementDashboardAPIView.as_view(), name='api_user_management'),
@@ -48,9 +50,15 @@ urlpatterns = [
     
     # Sabhi Vehicles ki History
     path('vehicles/all/', AllInspectedVehiclesAPI.as_view(), name='api-all-vehicles'),
+    path('vehicles/all/export/', ReportExportAPI.as_view(), name='api-report-exports'),
+    path('vehicles/exports/<uuid:export_id>/', ReportExportDetailAPI.as_view(), name='api-report-export'),
+    path('vehicles/exports/<uuid:export_id>/download/', ReportExportDownloadAPI.as_view(), name='api-report-export-download'),
+    path('vehicles/export/<str:fmt>/', VehicleStreamExportAPI.as_view(), name='api-vehicle-stream-export'),
+    path('vehicles/export/sections/<str:section>/<str:fmt>/', SectionStreamExportAPI.as_view(), name='api-section-stream-export'),
 
     # Print Report API (GET)
     path('vehicle/report/<int:vehicle_id>/', VehicleReportAPI.as_view(), name='api-vehicle-report'),
+    path('vehicle/report/<int:vehicle_id>/pdf/', VehicleReportPDFAPI.as_view(), name='api-vehicle-report-pdf'),
     
     # Delete API (DELETE)
     path('vehicle/delete/<int:pk>/', DeleteVehicleAPI.as_view(), name='api-vehicle-delete'),
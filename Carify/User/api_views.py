@@ -5,19 +5,32 @@ from rest_framework.permissions import AllowAny
 from rest_framework.authtoken.models import Token
 from .serializers import *
 from django.contrib.auth import login
+from django.contrib.auth.signals import user_logged_in, user_logged_out
 from rest_framework.permissions import IsAuthenticated , IsAdminUser
 from django.db.models import Avg
 from django.utils import timezone
 from datetime import timedelta
-from django.contrib.sessions.models import Session
 from rest_framework import generics
 from .models import *
 from CarPDI.models import *
-from CarPDI.serializers import VehicleSerializer
+from CarPDI.serializers import VehicleSerializer, DashboardVehicleSerializer, ReportExportSerializer
+from CarPDI.reports import load_vehicle_report
+from CarPDI.pdf import report_pdf_response
+from CarPDI.exports import MAX_VEHICLES, export_vehicles, too_many_vehicles_message
+from CarPDI import streaming
+from CarPDI.permissions import IsStaffOrManager
+from CarPDI.pagination import VehicleKeysetPagination, page_data
+from CarPDI import jobs
+from CarPDI.apiviews import job_accepted_response
+from .dashboard import dashboard_stats, dashboard_vehicle_queryset
+from .metrics import annotate_today_activity, annotate_totals, annotate_status
 from django.db.models import Count, Sum, F, ExpressionWrapper, DurationField
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.http import FileResponse, Http404
+from django.utils.dateparse import parse_date
+import os
 import logging
-import requests
 from rest_framework.pagination import PageNumberPagination
 
 class LoginAPIView(APIView):
@@ -35,6 +48,8 @@ class LoginAPIView(APIView):
             
             # Token Generate 
             token, created = Token.objects.get_or_create(user=user)
+            # Presence + last_login, same as a web login
+            user_logged_in.send(sender=user.__class__, request=request, user=user, source='token')
             
             if user.is_superuser or user.is_staff or user.is_verified_by_admin:
                 destination = 'admin_dashboard'
@@ -67,6 +82,7 @@ class LogoutAPIView(APIView):
         try:
             # delete present User token 
             request.user.auth_token.delete()
+            user_logged_out.send(sender=request.user.__class__, request=request, user=request.user, source='token')
             
             return Response({
                 "message": "Successfully logged out.",
@@ -91,64 +107,62 @@ class RegisterAPIView(generics.CreateAPIView):
     permission_classes = [AllowAny]
 
 
+class DashboardVehicleCursorPagination(VehicleKeysetPagination):
+    """Newest inspections first. Keyset on (inspection_date, id), so deep pages cost the same as page 1."""
+    page_size = 20
+
+
 class AdminDashboardAPIView(APIView):
     """
-    Retrieves aggregated dashboard statistics (users, vehicles, health scores) and vehicle records.
+    Retrieves aggregated dashboard statistics (users, vehicles, health scores)
+    and the first page of the vehicle feed.
+    Use `next` / `dashboard/vehicles/` for further pages.
     Restricted to Admin/Staff users.
     """
     permission_classes = [IsAuthenticated, IsAdminUser]
 
     def get(self, request):
-        # ---  Aggregations (Counts & Averages) ---
-        total_vehicles = Vehicle.objects.count()
-        total_customers = Customer.objects.count()
-        
-        # Avg Health Score calculation
-        avg_score_data = Vehicle.objects.aggregate(avg=Avg('health_score'))
-        avg_health_score = avg_score_data['avg'] if avg_score_data['avg'] else 0
-        
-        # Recent Inspections (Last 7 days)
-        last_week = timezone.now() - timedelta(days=7)
-        recent_inspections = Vehicle.objects.filter(inspection_date__gte=last_week).count()
-
-        # ---  User Stats ---
-        users = CustomUser.objects.all()
-        total_users = users.count()
-        verified_users = users.filter(is_verified_by_admin=True).count()
-        
-        # Active Users Logic (Session based)
-        active_sessions = Session.objects.filter(expire_date__gte=timezone.now())
-        active_user_ids = []
-        for session in active_sessions:
-            data = session.get_decoded()
-            user_id = data.get('_auth_user_id')
-            if user_id:
-                active_user_ids.append(user_id)
-        
-        # Unique active users count
-        active_users_count = users.filter(id__in=set(active_user_ids)).count()
-        inactive_users = total_users - active_users_count
-
-        # ---  Vehicle List ---
-        # fetch all vehicles (Latest first)
-        vehicles_qs = Vehicle.objects.select_related('customer').all().order_by('-inspection_date')
-        vehicle_serializer = VehicleSerializer(vehicles_qs, many=True)
+        paginator = DashboardVehicleCursorPagination()
+        page = paginator.paginate_queryset(dashboard_vehicle_queryset(), request, view=self)
+        # Next pages come from the feed endpoint, not from here (stats dobara nahi chahiye)
+        paginator.base_url = request.build_absolute_uri(reverse('api_admin_dashboard_vehicles'))
+        vehicle_serializer = DashboardVehicleSerializer(page, many=True, context={'request': request})
 
         # ---  Final JSON Response ---
         return Response({
-            "stats": {
-                "total_users": total_users,
-                "active_users": active_users_count,
-                "inactive_users": inactive_users,
-                "verified_users": verified_users,
-                "total_customers": total_customers,
-                "total_vehicles": total_vehicles,
-                "avg_health_score": round(avg_health_score, 1), # Round to 1 decimal
-                "recent_inspections_count": recent_inspections
-            },
-            "vehicles": vehicle_serializer.data
+            "stats": dashboard_stats(),
+            "vehicles": vehicle_serializer.data,
+            "next": paginator.get_next_link(),
         })
-    
+
+
+class DashboardStatsAPIView(APIView):
+    """
+    Only the dashboard statistics (users, vehicles, health scores) - no vehicle rows.
+    Restricted to Admin/Staff users.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({"stats": dashboard_stats()})
+
+
+class DashboardVehicleFeedAPIView(generics.ListAPIView):
+    """
+    Cursor-paginated vehicle feed for the admin dashboard (latest inspection first).
+
+    **Query Parameters:**
+    * `cursor` (optional): Opaque cursor from the previous page's `next` / `previous` link.
+    * `page_size` (optional): Rows per page (default 20, max 100).
+
+    Restricted to Admin/Staff users.
+    """
+    serializer_class = DashboardVehicleSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = DashboardVehicleCursorPagination
+
+    def get_queryset(self):
+        return dashboard_vehicle_queryset()
 
 
 class UserManagementDashboardAPIView(generics.ListAPIView):
@@ -171,18 +185,8 @@ class UserManagementDashboardAPIView(generics.ListAPIView):
         if search_query:
             users_qs = users_qs.filter(email__icontains=search_query)
 
-        # Annotations ( On Heavy lifting database)
-        users = users_qs.annotate(
-            vehicle_count=Count('inspected_vehicles', distinct=True),
-            total_login_duration=Sum(
-                ExpressionWrapper(
-                    F('sessions__logout_time') - F('sessions__login_time'),
-                    output_field=DurationField()
-                ),
-                distinct=True
-            )
-        )
-        return users
+        # Annotations ( On Heavy lifting database) - one subquery per metric, no joins
+        return annotate_status(annotate_today_activity(annotate_totals(users_qs)))
 
 
 class UserActionAPIView(APIView):
@@ -255,7 +259,7 @@ class EngineerListAPIView(generics.ListAPIView):
         if search_query:
             engineers = engineers.filter(email__icontains=search_query)
 
-        return engineers.annotate(vehicle_count=Count('inspected_vehicles'))
+        return annotate_status(annotate_today_activity(annotate_totals(engineers)))
     
 
 
@@ -365,67 +369,18 @@ class VerifyBankDetailsAPI(APIView):
                 "errors": serializer.errors
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Validated data extract 
-        account_number = serializer.validated_data['account_number']
-        ifsc_code = serializer.validated_data['ifsc_code']
-
-        # 2. External API Configuration
-        api_url = getattr(settings, 'BANK_API_URL', "https://api.example.com/bank/verify")
-        api_key = getattr(settings, 'BANK_VERIFICATION_API_KEY', "dummy_key")
+        # 2. Keep the details as pending - the verified ones on the profile stay
+        # until the bank confirms the new ones (a typo mustn't wipe them)
+        user = request.user
+        user.pending_bank_account_number = serializer.validated_data['account_number']
+        user.pending_ifsc_code = serializer.validated_data['ifsc_code']
+        user.save(update_fields=['pending_bank_account_number', 'pending_ifsc_code'])
 
-        headers = {
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json',
-        }
-        payload = {
-            'account_number': account_number,
-            'ifsc': ifsc_code,
-        }
-
-        # 3. Third-Party API Call with Error Handling
-        try:
-            response = requests.post(api_url, json=payload, headers=headers, timeout=10)
-            
-            # if api return  500 or 404 error 
-            response.raise_for_status() 
-            
-            result = response.json()
-
-            # 4. Success Logic
-            if result.get('verified'):
-                return Response({
-                    "status": "success",
-                    "message": "Bank account verified successfully!",
-                    "data": result 
-                }, status=status.HTTP_200_OK)
-            else:
-                return Response({
-                    "status": "fail",
-                    "message": "Bank verification failed. Details did not match.",
-                    "data": result
-                }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
-
-        except requests.exceptions.Timeout:
-            logger.error(f"Bank API Timeout for Account: {account_number}")
-            return Response({
-                "status": "error",
-                "message": "Bank verification service timed out. Please try again later."
-            }, status=status.HTTP_504_GATEWAY_TIMEOUT)
-
-        except requests.exceptions.RequestException as e:
-            # Network error or connection error 
-            logger.error(f"Bank API Error: {str(e)}")
-            return Response({
-                "status": "error",
-                "message": "Unable to connect to verification service."
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-        except Exception as e:
-            logger.exception("Unexpected error in VerifyBankDetailsAPI")
-            return Response({
-                "status": "error",
-                "message": "An internal server error occurred."
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # 3. Hand the bank API call to the job worker (User/tasks.py) - it can take
+        # up to 10s and must not hold this request. Poll the status URL for the result.
+        # Only the user id goes in the job payload; the task reads the pending details itself.
+        job = jobs.enqueue('bank.verify_details', {'user_id': user.pk}, priority=5, user=user)
+        return job_accepted_response(request, job, "Bank verification started.")
 
 
 
@@ -623,11 +578,29 @@ class UserLoginReportAPI(APIView):
         }, status=status.HTTP_200_OK)
 
 
+def _date_error(value):
+    """400 response for a `date` filter that isn't YYYY-MM-DD, else None."""
+    if not value:
+        return None
+    try:
+        valid = parse_date(str(value)) is not None
+    except ValueError:
+        # Well formed but impossible, e.g. 2026-02-30
+        valid = False
+    if not valid:
+        return Response({
+            "status": "error",
+            "message": "Invalid date. Use YYYY-MM-DD."
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
 # ---  Get Vehicles by Specific User (Filtered & Paginated) ---
 class UserInspectedVehiclesAPI(APIView):
     """
     Retrieve paginated list of vehicles inspected by a specific user.
     Supports filtering by 'model' and 'date'.
+    `?pagination=cursor` switches to keyset pages (see VehicleKeysetPagination).
     """
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
@@ -637,32 +610,28 @@ class UserInspectedVehiclesAPI(APIView):
         user = get_object_or_404(CustomUser, id=user_id)
         
         # 2. Base Query
-        vehicles = Vehicle.objects.filter(inspected_by=user).order_by('-inspection_date')
+        vehicles = Vehicle.objects.filter(inspected_by=user).order_by('-inspection_date', '-id')
 
         # 3. Apply Filters (Query Params)
-        model_query = request.query_params.get('model')
-        date_query = request.query_params.get('date')
-
-        if model_query:
-            vehicles = vehicles.filter(model__icontains=model_query)
-        
-        if date_query:
-            vehicles = vehicles.filter(inspection_date=date_query)
+        # A bad date would only fail once the query runs (500) - reject it here
+        error = _date_error(request.query_params.get('date'))
+        if error:
+            return error
+        vehicles = vehicles.matching(
+            model=request.query_params.get('model'),
+            date=request.query_params.get('date'),
+        )
 
         # 4. Pagination
-        paginator = self.pagination_class()
+        # Page numbers by default (existing clients); keyset cursors on request
+        paginator = VehicleKeysetPagination() if VehicleKeysetPagination.requested(request) else self.pagination_class()
         result_page = paginator.paginate_queryset(vehicles, request)
         serializer = VehicleSerializer(result_page, many=True)
 
         return Response({
             "status": "success",
             "message": f"Vehicles inspected by {user.email}",
-            "data": {
-                "count": paginator.page.paginator.count,
-                "next": paginator.get_next_link(),
-                "previous": paginator.get_previous_link(),
-                "results": serializer.data
-            }
+            "data": page_data(paginator, serializer.data)
         }, status=status.HTTP_200_OK)
 
 
@@ -671,42 +640,168 @@ class AllInspectedVehiclesAPI(APIView):
     """
     Retrieve paginated list of ALL inspected vehicles.
     Supports filtering by 'model' and 'date'.
+    `?pagination=cursor` switches to keyset pages (see VehicleKeysetPagination).
     """
     permission_classes = [IsAuthenticated] # Agar sirf Admin ke liye chahiye to IsAdminUser laga dena
     pagination_class = StandardResultsSetPagination
 
     def get(self, request):
         # 1. Base Query
-        vehicles = Vehicle.objects.all().order_by('-inspection_date')
+        vehicles = Vehicle.objects.all().order_by('-inspection_date', '-id')
 
         # 2. Apply Filters
-        model_query = request.query_params.get('model')
-        date_query = request.query_params.get('date')
-
-        if model_query:
-            vehicles = vehicles.filter(model__icontains=model_query)
-        
-        if date_query:
-            vehicles = vehicles.filter(inspection_date=date_query)
+        error = _date_error(request.query_params.get('date'))
+        if error:
+            return error
+        vehicles = vehicles.matching(
+            model=request.query_params.get('model'),
+            date=request.query_params.get('date'),
+        )
 
         # 3. Pagination
-        paginator = self.pagination_class()
+        # Page numbers by default (existing clients); keyset cursors on request
+        paginator = VehicleKeysetPagination() if VehicleKeysetPagination.requested(request) else self.pagination_class()
         result_page = paginator.paginate_queryset(vehicles, request)
         serializer = VehicleSerializer(result_page, many=True)
 
         return Response({
             "status": "success",
             "message": "All inspected vehicles fetched successfully",
+            "data": page_data(paginator, serializer.data)
+        }, status=status.HTTP_200_OK)
+    
+
+
+
+class ReportExportAPI(APIView):
+    """
+    Starts a bulk PDF export (zip) of the vehicles matching the same
+    'model' / 'date' filters as AllInspectedVehiclesAPI.
+    Runs on the job worker; poll the returned status URL for progress.
+    More than REPORT_EXPORT_MAX_VEHICLES matches is a 400 - narrow the filters.
+    """
+    permission_classes = [IsAuthenticated, IsStaffOrManager]
+
+    def post(self, request):
+        filters = {
+            'model': request.data.get('model') or request.query_params.get('model'),
+            'date': request.data.get('date') or request.query_params.get('date'),
+        }
+        filters = {key: value for key, value in filters.items() if value}
+
+        error = _date_error(filters.get('date'))
+        if error:
+            return error
+
+        count = export_vehicles(filters).count()
+        if not count:
+            return Response({
+                "status": "error",
+                "message": "No vehicles match these filters."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if count > MAX_VEHICLES:
+            return Response({
+                "status": "error",
+                "message": too_many_vehicles_message(count),
+                "data": {"matched": count, "max_vehicles": MAX_VEHICLES}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        export = ReportExport.objects.create(filters=filters, total=count, created_by=request.user)
+        jobs.enqueue('reports.export_pdfs', {'export_id': str(export.id)}, priority=-5, user=request.user)
+
+        status_url = request.build_absolute_uri(reverse('api-report-export', args=[export.id]))
+        return Response({
+            "status": "accepted",
+            "message": f"Export of {export.total} reports started.",
             "data": {
-                "count": paginator.page.paginator.count,
-                "next": paginator.get_next_link(),
-                "previous": paginator.get_previous_link(),
-                "results": serializer.data
+                "export_id": str(export.id),
+                "status_url": status_url,
             }
+        }, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
+
+
+class ReportExportDetailAPI(APIView):
+    """Progress of a bulk PDF export, with the download link once it is done."""
+    permission_classes = [IsAuthenticated, IsStaffOrManager]
+
+    def get(self, request, export_id):
+        export = get_object_or_404(ReportExport, id=export_id)
+        return Response({
+            "status": "success",
+            "data": ReportExportSerializer(export, context={'request': request}).data
         }, status=status.HTTP_200_OK)
-    
 
 
+class ReportExportDownloadAPI(APIView):
+    """Streams the finished export zip."""
+    permission_classes = [IsAuthenticated, IsStaffOrManager]
+
+    def get(self, request, export_id):
+        export = get_object_or_404(ReportExport, id=export_id, status='done')
+        if not os.path.exists(export.file_path):
+            raise Http404("Export file no longer exists.")
+        return FileResponse(
+            open(export.file_path, 'rb'),
+            content_type='application/zip',
+            as_attachment=True,
+            filename=f'inspection-reports-{export.created_at:%Y-%m-%d}-{str(export.id)[:8]}.zip',
+        )
+
+
+def _stream_filters(request, fmt):
+    """(filters, error response) for the streaming exports: same 'model' / 'date' as AllInspectedVehiclesAPI."""
+    if fmt not in streaming.FORMATS:
+        return None, Response({
+            "status": "error",
+            "message": f"Unknown format. Use one of: {', '.join(streaming.FORMATS)}."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    filters = {
+        'model': request.query_params.get('model'),
+        'date': request.query_params.get('date'),
+    }
+    # Checked up front - once streaming has started, an error can't become a 400 any more
+    error = _date_error(filters['date'])
+    if error:
+        return None, error
+    return filters, None
+
+
+class VehicleStreamExportAPI(APIView):
+    """
+    All vehicles matching 'model' / 'date' (as AllInspectedVehiclesAPI) as
+    a CSV or JSON Lines download, streamed while it is read from the DB.
+    """
+    permission_classes = [IsAuthenticated, IsStaffOrManager]
+
+    def get(self, request, fmt):
+        filters, error = _stream_filters(request, fmt)
+        if error:
+            return error
+        columns, rows = streaming.vehicle_rows(filters)
+        return streaming.stream_response(columns, rows, fmt, 'vehicles')
+
+
+class SectionStreamExportAPI(APIView):
+    """
+    One inspection section table (system_checks, fluid_levels, ...) for the
+    vehicles matching 'model' / 'date', streamed as CSV or JSON Lines.
+    """
+    permission_classes = [IsAuthenticated, IsStaffOrManager]
+
+    def get(self, request, section, fmt):
+        if section not in streaming.SECTIONS:
+            return Response({
+                "status": "error",
+                "message": f"Unknown section. Use one of: {', '.join(streaming.SECTIONS)}."
+            }, status=status.HTTP_404_NOT_FOUND)
+        filters, error = _stream_filters(request, fmt)
+        if error:
+            return error
+        columns, rows = streaming.section_rows(section, filters)
+        return streaming.stream_response(columns, rows, fmt, section.replace('_', '-'))
+
 
 # User/api_views.py
 
@@ -717,37 +812,9 @@ class VehicleReportAPI(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, vehicle_id):
-        # Vehicle fetch karo
-        vehicle = get_object_or_404(Vehicle, id=vehicle_id)
-        
-        # Helper function: Safe .values() retrieval
-        def get_data(model_class):
-            return list(model_class.objects.filter(vehicle=vehicle).values())
-
-        # Response Data construct karte waqt 'getattr' use karenge safety ke liye
-        response_data = {
-            "vehicle_details": {
-                "id": vehicle.id,
-                "model": getattr(vehicle, 'model', 'Unknown Model'), # Safe access
-                "inspection_date": getattr(vehicle, 'inspection_date', None),
-                # "status": vehicle.status,  <-- YE LINE ERROR DE RAHI THI, HATA DI
-                "vin": getattr(vehicle, 'vin', None),
-            },
-            # Related Data Sections
-            "obd_readings": list(OBDReading.objects.filter(vehicle=vehicle).values()),
-            "system_checks": get_data(SystemCheck),
-            "network_systems": get_data(NetworkSystem),
-            "fluid_levels": get_data(FluidLevel),
-            "live_parameters": get_data(LiveParameters),
-            "performance_checks": get_data(PerformanceCheck),
-            "paint_finishes": get_data(PaintFinish),
-            "tyre_conditions": get_data(TyreCondition),
-            "flush_gaps": get_data(FlushGap),
-            "rubber_components": get_data(RubberComponent),
-            "glass_components": get_data(GlassComponent),
-            "interior_components": get_data(InteriorComponent),
-            "documentations": get_data(Documentation),
-        }
+        # Vehicle + all 13 sections in a fixed number of queries
+        report = load_vehicle_report(vehicle_id)
+        response_data = report.as_dict()
 
         return Response({
             "status": "success",
@@ -756,6 +823,17 @@ class VehicleReportAPI(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class VehicleReportPDFAPI(APIView):
+    """
+    The vehicle report as a PDF (rendered once per report version, then served from disk).
+    Add ?download=1 to get it as an attachment.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, vehicle_id):
+        return report_pdf_response(request, vehicle_id)
+
+
 # ---  Delete Vehicle API ---
 class DeleteVehicleAPI(APIView):
     """
@@ -7,4 +7,5 @@ class UserConfig(AppConfig):
 
     def ready(self):
         import User.signals
+        import User.tasks
 
@@ -0,0 +1,150 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.authentication import TokenAuthentication
+
+from . import presence
+
+
+def cache_is_shared():
+    """
+    True if the default cache is seen by every worker. Per-process caches
+    (LocMem, dummy) can't carry an invalidation from one worker to another.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+class PresenceTokenAuthentication(TokenAuthentication):
+    """
+    DRF TokenAuthentication that also keeps the user's presence (UserSession)
+    up to date, so API-only users show up as active on the dashboards.
+    """
+
+    def authenticate_credentials(self, key):
+        user, token = super().authenticate_credentials(key)
+        presence.touch(user, 'token')
+        return user, token
+
+
+class TokenCache:
+    """
+    Bounded LRU of validated token -> (user, token) snapshots, each valid for
+    `ttl` seconds. Entries also carry the user's auth version from the shared
+    Django cache, so a logout or user change in one worker invalidates the
+    entry in every worker (one cache read per hit, no DB query).
+    """
+
+    def __init__(self, max_size=1024, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _version_key(user_id):
+        return f'authtoken:user:{user_id}:version'
+
+    def user_version(self, user_id):
+        key = self._version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            user, token, version, expires = entry
+            if expires > time.monotonic() and version == self.user_version(user.pk):
+                self.hits += 1
+                return user, token
+            self.discard(key)
+        self.misses += 1
+        return None
+
+    def set(self, key, user, token, version):
+        with self._lock:
+            self._entries[key] = (user, token, version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        """Every cached token of this user, in every worker."""
+        cache.set(self._version_key(user_id), uuid.uuid4().hex, None)
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[0].pk == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60),
+)
+
+
+def _snapshot(user):
+    # Own __dict__ and related-object cache, so per-request attributes
+    # (role memo, loaded relations) never leak between requests
+    clone = copy.copy(user)
+    clone._state = copy.copy(user._state)
+    clone._state.fields_cache = {}
+    clone.__dict__.pop('_access_memo', None)
+    return clone
+
+
+class CachedTokenAuthentication(PresenceTokenAuthentication):
+    """
+    PresenceTokenAuthentication with validated tokens kept in `token_cache`,
+    so repeated calls with the same token (e.g. payment status polling)
+    skip the Token + CustomUser query. Invalidated from User/signals.py when
+    the token is deleted or the user is saved/deleted - through the Django
+    cache, so the token cache is only used when that cache is shared.
+    """
+
+    def authenticate_credentials(self, key):
+        if not cache_is_shared():
+            # A logout in another worker would go unnoticed here for `ttl` seconds
+            return super().authenticate_credentials(key)
+
+        cached = token_cache.get(key)
+        if cached is not None:
+            user, token = cached
+            presence.touch(user, 'token')
+            return _snapshot(user), token
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, _snapshot(user), token, token_cache.user_version(user.pk))
+        return _snapshot(user), token
@@ -0,0 +1,31 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from rest_framework.exceptions import AuthenticationFailed
+
+from .authentication import CachedTokenAuthentication
+
+
+@database_sync_to_async
+def _user_for_token(key):
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(key)
+        return user
+    except AuthenticationFailed:
+        return None
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    Websocket auth for API clients: `?token=<key>` sets scope['user'].
+    Goes inside AuthMiddlewareStack, so browser sessions keep working.
+    """
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+        if token:
+            user = await _user_for_token(token[0])
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,37 @@
+from django.db.models import Count, Q
+
+from CarPDI.models import Vehicle
+from CarPDI.rollups import dashboard_totals
+from .models import CustomUser
+from . import presence
+
+
+def dashboard_stats():
+    """
+    Headline numbers for the admin dashboard. Vehicle/customer numbers come
+    from the DashboardDailyStat rollup, so this never scans the vehicles table.
+    """
+    totals = dashboard_totals()
+    user_stats = CustomUser.objects.aggregate(
+        total=Count('id'),
+        verified=Count('id', filter=Q(is_verified_by_admin=True)),
+    )
+    active_users = presence.active_user_count()
+
+    return {
+        "total_users": user_stats['total'],
+        "active_users": active_users,
+        "inactive_users": user_stats['total'] - active_users,
+        "verified_users": user_stats['verified'],
+        "total_customers": totals['total_customers'],
+        "total_vehicles": totals['total_vehicles'],
+        "avg_health_score": round(totals['avg_health_score'], 1),  # Round to 1 decimal
+        "recent_inspections_count": totals['recent_inspections'],
+    }
+
+
+def dashboard_vehicle_queryset():
+    """Vehicles for the dashboard feed, with every FK the list serializer touches joined in."""
+    return Vehicle.objects.select_related(
+        'customer', 'fuel_type', 'transmission', 'engine_type', 'inspected_by'
+    )
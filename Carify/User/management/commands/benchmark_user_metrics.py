@@ -0,0 +1,97 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from CarPDI.models import Customer, Vehicle, VehicleEngineType, VehicleFuelType, VehicleTransmission
+from User.metrics import annotate_totals
+from User.models import CustomUser, UserSession
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the user-management metrics (vehicle_count, total_login_duration) "
+        "on generated data. Everything runs inside a transaction that is rolled back. "
+        "Correctness is covered by User/tests.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=300)
+        parser.add_argument('--sessions', type=int, default=1_000_000)
+        parser.add_argument('--vehicles', type=int, default=30_000)
+        parser.add_argument('--legacy', action='store_true',
+                            help="Also time the old joined Count/Sum(distinct) query (very slow at full size).")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Generated data rolled back.")
+
+    def _timed(self, label, queryset):
+        start = time.perf_counter()
+        rows = len(list(queryset))
+        self.stdout.write(f"{label}: {rows} users in {time.perf_counter() - start:.3f}s")
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        now = timezone.now().replace(microsecond=0)
+        run_id = rng.randrange(10 ** 6)
+
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f"bench{run_id}-{i}@example.com", emp_id=f"#BENCH{run_id}-{i}")
+            for i in range(options['users'])
+        )
+        user_ids = [user.pk for user in users]
+
+        self.stdout.write(f"Creating {options['sessions']} sessions ...")
+        sessions = []
+        for _ in range(options['sessions']):
+            user_id = rng.choice(user_ids)
+            login = now - timedelta(minutes=rng.randrange(1, 60 * 24 * 365))
+            # Whole minutes, so plenty of sessions share the same length
+            length = timedelta(minutes=rng.randrange(1, 600))
+            sessions.append(UserSession(user_id=user_id, login_time=login, logout_time=login + length, source='web'))
+            if len(sessions) >= 10_000:
+                UserSession.objects.bulk_create(sessions)
+                sessions = []
+        UserSession.objects.bulk_create(sessions)
+
+        self.stdout.write(f"Creating {options['vehicles']} vehicles ...")
+        customer = Customer.objects.create(name="Bench", phone="0000000000", email="bench@example.com")
+        fuel = VehicleFuelType.objects.create(name="Bench")
+        transmission = VehicleTransmission.objects.create(name="Bench")
+        engine = VehicleEngineType.objects.create(name="Bench")
+        vehicles = []
+        for i in range(options['vehicles']):
+            user_id = rng.choice(user_ids)
+            vehicles.append(Vehicle(
+                image='cars/bench.jpg', customer=customer, model="Bench", vin=f"BENCH{run_id}-{i}",
+                fuel_type=fuel, transmission=transmission, engine_type=engine,
+                bhp='0', airbags='0', inspected_by_id=user_id, health_score=0,
+            ))
+        Vehicle.objects.bulk_create(vehicles, batch_size=5_000)
+
+        users_qs = CustomUser.objects.filter(pk__in=user_ids)
+        self._timed("subquery annotations", annotate_totals(users_qs))
+
+        if options['legacy']:
+            legacy = users_qs.annotate(
+                vehicle_count=Count('inspected_vehicles', distinct=True),
+                total_login_duration=Sum(
+                    ExpressionWrapper(F('sessions__logout_time') - F('sessions__login_time'), output_field=DurationField()),
+                    distinct=True,
+                ),
+            )
+            self._timed("legacy join", legacy)
@@ -0,0 +1,84 @@
+from django.db.models import Count, DateTimeField, DurationField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from CarPDI.models import Vehicle
+from .models import UserSession
+
+
+def _per_user(queryset, user_field, **aggregate):
+    """Correlated subquery: aggregate the rows of `queryset` belonging to the outer user."""
+    (name, expression), = aggregate.items()
+    return Subquery(
+        queryset.filter(**{user_field: OuterRef('pk')})
+        .order_by()
+        .values(user_field)
+        .annotate(**{name: expression})
+        .values(name)[:1]
+    )
+
+
+def annotate_today_activity(users, today=None):
+    """
+    Adds today's numbers to a CustomUser queryset, one subquery each, so the
+    whole list is a single query however many users there are:
+
+    * today_login_duration - timedelta, open sessions counted up to now
+    * live_session_start   - login_time of the open session started today (or None)
+    * today_vehicle_count  - vehicles inspected today
+    """
+    today = today or timezone.localdate()
+    now = timezone.now()
+    today_sessions = UserSession.objects.filter(login_time__date=today)
+
+    return users.annotate(
+        today_login_duration=_per_user(
+            today_sessions, 'user',
+            total=Sum(ExpressionWrapper(
+                Coalesce('logout_time', Value(now, output_field=DateTimeField())) - F('login_time'),
+                output_field=DurationField(),
+            )),
+        ),
+        live_session_start=Subquery(
+            today_sessions.filter(user=OuterRef('pk'), logout_time__isnull=True)
+            .order_by('-login_time')
+            .values('login_time')[:1]
+        ),
+        today_vehicle_count=Coalesce(
+            _per_user(Vehicle.objects.filter(inspection_date=today), 'inspected_by', total=Count('id')),
+            0,
+            output_field=IntegerField(),
+        ),
+    )
+
+
+def annotate_totals(users):
+    """
+    Adds all-time numbers to a CustomUser queryset:
+
+    * vehicle_count        - vehicles inspected
+    * total_login_duration - timedelta, sum of closed sessions (None if there are none)
+
+    Each is its own subquery. Joining sessions and vehicles in one query
+    multiplies the rows (sessions x vehicles per user), and Sum(distinct=True)
+    then drops sessions that happen to have the same length.
+    """
+    return users.annotate(
+        vehicle_count=Coalesce(
+            _per_user(Vehicle.objects.all(), 'inspected_by', total=Count('id')),
+            0,
+            output_field=IntegerField(),
+        ),
+        total_login_duration=_per_user(
+            UserSession.objects.filter(logout_time__isnull=False), 'user',
+            total=Sum(ExpressionWrapper(F('logout_time') - F('login_time'), output_field=DurationField())),
+        ),
+    )
+
+
+def annotate_status(users):
+    """
+    Lets `user.status` be computed without queries for every user in the list
+    (joins the current open vehicle for its inspection date).
+    """
+    return users.annotate(open_vehicle_date=F('current_open_vehicle__inspection_date'))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User', '0016_remove_userrole_description_roles_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersession',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usersession',
+            name='source',
+            field=models.CharField(choices=[('web', 'Web'), ('token', 'API Token')], default='web', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(condition=models.Q(('logout_time__isnull', True)), fields=['expires_at', 'user'], name='usersession_open_idx'),
+        ),
+    ]
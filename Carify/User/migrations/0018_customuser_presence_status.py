@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 06:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_presence_fields(apps, schema_editor):
+    CustomUser = apps.get_model('User', 'CustomUser')
+    UserSession = apps.get_model('User', 'UserSession')
+    Vehicle = apps.get_model('CarPDI', 'Vehicle')
+    latest_session = UserSession.objects.filter(user=OuterRef('pk')).order_by('-login_time')
+    latest_open = Vehicle.objects.filter(inspected_by=OuterRef('pk'), is_completed=False).order_by('-inspection_date', '-id')
+    CustomUser.objects.update(
+        last_login_at=Subquery(latest_session.values('login_time')[:1]),
+        last_logout_at=Subquery(latest_session.values('logout_time')[:1]),
+        current_open_vehicle=Subquery(latest_open.values('id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarPDI', '0016_dashboarddailystat'),
+        ('User', '0017_usersession_presence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='current_open_vehicle',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='CarPDI.vehicle'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='last_login_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='last_logout_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_presence_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User', '0018_customuser_presence_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['user', 'start_date'], name='leave_user_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['user', 'login_time'], name='usersession_user_login_idx'),
+        ),
+    ]
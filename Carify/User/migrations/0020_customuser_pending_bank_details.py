@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 06:57
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def keep_unverified_details_pending(apps, schema_editor):
+    # Details saved before this change but never confirmed: queued
+    # bank.verify_details jobs now read the pending pair
+    CustomUser = apps.get_model('User', 'CustomUser')
+    CustomUser.objects.filter(is_bank_verified=False).exclude(bank_account_number='').exclude(ifsc_code='').update(
+        pending_bank_account_number=F('bank_account_number'),
+        pending_ifsc_code=F('ifsc_code'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User', '0019_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='pending_bank_account_number',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='pending_ifsc_code',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.RunPython(keep_unverified_details_pending, migrations.RunPython.noop),
+    ]
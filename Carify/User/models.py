@@ -6,6 +6,30 @@ import uuid
 from django.utils import timezone
 from django.conf import settings
 
+def compute_status(last_login_at, last_logout_at, open_vehicle_date):
+    today = timezone.now().date()
+
+    # No session ever → non-active
+    if not last_login_at:
+        return 'non-active'
+
+    # If session not from today → non-active
+    if last_login_at.date() != today:
+        return 'non-active'
+
+    # If session ended quickly → non-active
+    if last_logout_at:
+        duration = last_logout_at - last_login_at
+        if duration.total_seconds() < 60:
+            return 'non-active'
+
+    # Filling a vehicle form today and hasn't logged out → engaged
+    if open_vehicle_date == today and last_logout_at is None:
+        return 'engaged'
+
+    return 'active'
+
+
 class Permissions(models.Model):
     code = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100, unique=True)
@@ -60,6 +84,14 @@ class CustomUser(AbstractUser):
     ifsc_code = models.CharField(max_length=20, blank=True)
     bank_name = models.CharField(max_length=100, blank=True)
     is_bank_verified = models.BooleanField(default=False)
+    # Submitted through VerifyBankDetailsAPI, copied over the fields above once the bank confirms them
+    pending_bank_account_number = models.CharField(max_length=50, blank=True)
+    pending_ifsc_code = models.CharField(max_length=20, blank=True)
+
+    # ✅ Presence (denormalized for `status`, kept up to date by User/presence.py and Vehicle saves)
+    last_login_at = models.DateTimeField(null=True, blank=True)
+    last_logout_at = models.DateTimeField(null=True, blank=True)
+    current_open_vehicle = models.ForeignKey('CarPDI.Vehicle', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
 
     USERNAME_FIELD ="email"
     REQUIRED_FIELDS = []
@@ -89,39 +121,43 @@ class CustomUser(AbstractUser):
     
     @property
     def status(self):
-        today = timezone.now().date()
-
-        latest_session = self.sessions.order_by('-login_time').first()
-
-        # No session ever → non-active
-        if not latest_session:
-            return 'non-active'
-
-        # If session not from today → non-active
-        if latest_session.login_time.date() != today:
-            return 'non-active'
-
-        # If session ended quickly → non-active
-        if latest_session.logout_time:
-            duration = latest_session.logout_time - latest_session.login_time
-            if duration.total_seconds() < 60:
-                return 'non-active'
-
-        # Check if user is currently filling a vehicle form and hasn't logged out
-        latest_vehicle = self.inspected_vehicles.filter(
-            is_completed=False, inspection_date=today
-        ).order_by('-inspection_date').first()
-
-        if latest_vehicle and latest_session.logout_time is None:
-            return 'engaged'
-
-        return 'active'
+        """
+        'non-active', 'active' or 'engaged'. No queries when the user comes
+        from User.metrics.annotate_status(); otherwise at most one.
+        """
+        if 'open_vehicle_date' in self.__dict__:
+            open_vehicle_date = self.open_vehicle_date
+        elif self.current_open_vehicle_id and self.last_logout_at is None:
+            open_vehicle_date = self.current_open_vehicle.inspection_date
+        else:
+            open_vehicle_date = None
+        return compute_status(self.last_login_at, self.last_logout_at, open_vehicle_date)
 
 
 class UserSession(models.Model):
+    SOURCE_CHOICES = [
+        ('web', 'Web'),
+        ('token', 'API Token'),
+    ]
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="sessions")
     login_time = models.DateTimeField(default=timezone.now)
     logout_time = models.DateTimeField(null=True, blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='web')
+    # Web: Django session expiry. Token: pushed forward on API activity (see User/presence.py)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Open sessions only - "active users" is a range scan on this
+            models.Index(
+                fields=['expires_at', 'user'],
+                condition=models.Q(logout_time__isnull=True),
+                name='usersession_open_idx',
+            ),
+            # Session history of a user, newest first
+            models.Index(fields=['user', 'login_time'], name='usersession_user_login_idx'),
+        ]
 
     @property
     def session_duration(self):
@@ -146,6 +182,12 @@ class Leave(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(default=timezone.now)  # ✅ Correct usage
 
+    class Meta:
+        indexes = [
+            # Leave calendar / history of a user
+            models.Index(fields=['user', 'start_date'], name='leave_user_start_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.email} | {self.start_date} to {self.end_date} | {self.status}"
       
@@ -1,5 +1,16 @@
 from .models import CustomUser, Roles, Permissions, UserRole
 from django.core.exceptions import ObjectDoesNotExist
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .authentication import cache_is_shared
+import uuid
+
+
+# Roles that count as staff in the payment views
+STAFF_ROLES = frozenset({'Admin', 'Manager', 'Staff'})
+
+ACCESS_CACHE_TTL = getattr(settings, 'ROLE_CACHE_TTL', 300)
 
 
 def assign_role_to_user(user: CustomUser, role_name: str):
@@ -40,12 +51,89 @@ def remove_permission_from_role(role_name: str, permission_name: str):
     role.permissions.remove(permission)
 
 
+# ========== Effective roles / permissions cache ==========
+# Per request: memo on the user object. Across requests: Django cache, keyed by
+# a global version (bumped when roles or their permissions change) and the user
+# (deleted when that user's UserRole rows change). See User/signals.py.
+# The cross-request layer is only used with a shared cache (CACHE_REDIS_URL):
+# with LocMem a revoked role would stay cached in the other workers.
+
+class UserAccess:
+    __slots__ = ('roles', 'permissions')
+
+    def __init__(self, roles, permissions):
+        self.roles = frozenset(roles)
+        self.permissions = frozenset(permissions)
+
+
+def _access_version():
+    version = cache.get('access:version')
+    if version is None:
+        cache.add('access:version', uuid.uuid4().hex, None)
+        version = cache.get('access:version')
+    return version
+
+
+def _access_key(user_id):
+    return f'access:{_access_version()}:{user_id}'
+
+
+def _load_access(user_id):
+    roles, permissions = set(), set()
+    # One query: user's roles LEFT JOIN their permissions
+    rows = UserRole.objects.filter(user_id=user_id).values_list('role__name', 'role__permissions__name')
+    for role_name, permission_name in rows:
+        roles.add(role_name)
+        if permission_name:
+            permissions.add(permission_name)
+    return UserAccess(roles, permissions)
+
+
+def get_user_access(user: CustomUser):
+    access = getattr(user, '_access_memo', None)
+    if access is None and not cache_is_shared():
+        access = user._access_memo = _load_access(user.pk)
+    if access is None:
+        key = _access_key(user.pk)
+        cached = cache.get(key)
+        if cached is None:
+            access = _load_access(user.pk)
+            cache.set(key, (tuple(access.roles), tuple(access.permissions)), ACCESS_CACHE_TTL)
+        else:
+            access = UserAccess(*cached)
+        user._access_memo = access
+    return access
+
+
+def invalidate_user_access(user_id):
+    cache.delete(_access_key(user_id))
+
+
+def invalidate_all_access():
+    cache.set('access:version', uuid.uuid4().hex, None)
+
+
+def invalidate_on_commit(func, *args):
+    # Again after commit, so nobody caches what they read before the commit
+    func(*args)
+    transaction.on_commit(lambda: func(*args))
+
+
+def has_any_role(user: CustomUser, role_names):
+    if not user or not user.is_authenticated:
+        return False
+    return not get_user_access(user).roles.isdisjoint(role_names)
+
+
+def user_is_staff_or_admin(user: CustomUser):
+    """Django staff/superuser, or holds one of STAFF_ROLES."""
+    if not user or not user.is_authenticated:
+        return False
+    return user.is_staff or user.is_superuser or has_any_role(user, STAFF_ROLES)
+
+
 def get_user_permissions(user: CustomUser):
-    user_roles = UserRole.objects.select_related('role').filter(user=user)
-    permissions = set()
-    for user_role in user_roles:
-        permissions.update(user_role.role.permissions.values_list('name', flat=True))
-    return permissions
+    return set(get_user_access(user).permissions)
 
 
 def user_has_permission(user: CustomUser, permission_name: str):
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import CustomUser, UserSession
+
+
+# Token logins have no expiry of their own: a token session counts as
+# active until it has been idle this long.
+TOKEN_IDLE_TIMEOUT = getattr(settings, 'PRESENCE_TOKEN_IDLE_TIMEOUT', timedelta(minutes=30))
+
+# At most one presence write per user per interval, however many API calls they make
+TOUCH_INTERVAL = getattr(settings, 'PRESENCE_TOUCH_INTERVAL', 60)
+
+
+def _latest_open(user, source):
+    return UserSession.objects.filter(user=user, source=source, logout_time__isnull=True).order_by('-login_time').first()
+
+
+def open_session(user, source='web', expires_at=None):
+    now = timezone.now()
+    if expires_at is None and source == 'token':
+        expires_at = now + TOKEN_IDLE_TIMEOUT
+    session = UserSession.objects.create(user=user, login_time=now, source=source, expires_at=expires_at)
+    # Denormalized copy of the latest session, used by CustomUser.status
+    CustomUser.objects.filter(pk=user.pk).update(last_login_at=now, last_logout_at=None)
+    user.last_login_at, user.last_logout_at = now, None
+    return session
+
+
+def close_session(user, source='web'):
+    """Close the user's latest open session of this source, if any."""
+    session = _latest_open(user, source)
+    if session is not None:
+        session.logout_time = timezone.now()
+        session.save(update_fields=['logout_time'])
+        # Only if it is still the user's latest session
+        if CustomUser.objects.filter(pk=user.pk, last_login_at=session.login_time).update(last_logout_at=session.logout_time):
+            user.last_logout_at = session.logout_time
+    cache.delete(_touch_key(user, source))
+    return session
+
+
+def sync_web_session(request):
+    """Copy the Django session expiry (e.g. after set_expiry) onto the open web session."""
+    session = _latest_open(request.user, 'web')
+    if session is not None:
+        session.expires_at = request.session.get_expiry_date()
+        session.save(update_fields=['expires_at'])
+
+
+def _touch_key(user, source):
+    return f'presence:touch:{source}:{user.pk}'
+
+
+def touch(user, source='token'):
+    """
+    Record API activity. Throttled through the cache, so a burst of requests
+    costs one UPDATE. Opens a session if the user has none yet (e.g. a token
+    issued before presence tracking existed).
+    """
+    if not cache.add(_touch_key(user, source), 1, TOUCH_INTERVAL):
+        return
+    expires_at = timezone.now() + TOKEN_IDLE_TIMEOUT
+    session = _latest_open(user, source)
+    if session is None:
+        open_session(user, source, expires_at)
+    else:
+        UserSession.objects.filter(pk=session.pk).update(expires_at=expires_at)
+
+
+def active_sessions():
+    return UserSession.objects.filter(logout_time__isnull=True, expires_at__gte=timezone.now())
+
+
+def active_user_ids():
+    return active_sessions().values_list('user_id', flat=True).distinct()
+
+
+def active_user_count():
+    """Logged-in users (web or API) - one COUNT on the open-session index."""
+    return active_user_ids().count()
@@ -69,6 +69,8 @@ class UserManagementSerializer(serializers.ModelSerializer):
     vehicle_count = serializers.IntegerField(read_only=True)
     total_login_duration = serializers.SerializerMethodField()
     today_login_duration = serializers.SerializerMethodField()
+    live_session_start = serializers.DateTimeField(read_only=True)
+    today_vehicle_count = serializers.IntegerField(read_only=True)
     status = serializers.SerializerMethodField()
 
     class Meta:
@@ -76,7 +78,8 @@ class UserManagementSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'emp_id', 'first_name', 'last_name', 'email', 
             'is_verified_by_admin', 'is_active', 
-            'vehicle_count', 'total_login_duration', 'today_login_duration', 'status'
+            'vehicle_count', 'total_login_duration', 'today_login_duration',
+            'live_session_start', 'today_vehicle_count', 'status'
         ]
 
     # --- Helper: Format Duration (e.g. "02:30:00") ---
@@ -94,14 +97,8 @@ class UserManagementSerializer(serializers.ModelSerializer):
         return self.format_duration(duration)
 
     def get_today_login_duration(self, obj):
-        # Today's sessions calculation
-        today = localdate()
-        today_sessions = obj.sessions.filter(login_time__date=today)
-        total_seconds = 0
-        for session in today_sessions:
-            logout_time = session.logout_time or now()
-            total_seconds += (logout_time - session.login_time).total_seconds()
-        return self.format_duration(timedelta(seconds=total_seconds))
+        # Annotated by User.metrics.annotate_today_activity
+        return self.format_duration(getattr(obj, 'today_login_duration', None))
 
     def get_status(self, obj):
         return obj.status
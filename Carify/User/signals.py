@@ -1,17 +1,49 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from django.utils.timezone import now
-from .models import UserSession
+from . import presence
+from rest_framework.authtoken.models import Token
+from .models import CustomUser, Roles, Permissions, UserRole
+from .authentication import token_cache
+from .permission import invalidate_on_commit, invalidate_user_access, invalidate_all_access
+
+# LoginAPIView / LogoutAPIView send these signals with source='token'
 
 @receiver(user_logged_in)
-def handle_user_logged_in(sender, request, user, **kwargs):
-    UserSession.objects.create(user=user, login_time=now())
+def handle_user_logged_in(sender, request, user, source='web', **kwargs):
+    expires_at = None
+    if source == 'web' and hasattr(request, 'session'):
+        expires_at = request.session.get_expiry_date()
+    presence.open_session(user, source, expires_at)
 
 @receiver(user_logged_out)
-def handle_user_logged_out(sender, request, user, **kwargs):
-    try:
-        last_session = UserSession.objects.filter(user=user, logout_time__isnull=True).latest('login_time')
-        last_session.logout_time = now()
-        last_session.save()
-    except UserSession.DoesNotExist:
-        pass  # No open session found
+def handle_user_logged_out(sender, request, user, source='web', **kwargs):
+    if user is not None:
+        presence.close_session(user, source)
+
+
+# --- Role / permission cache (User/permission.py) ---
+
+@receiver([post_save, post_delete], sender=UserRole)
+def handle_user_role_changed(sender, instance, **kwargs):
+    invalidate_on_commit(invalidate_user_access, instance.user_id)
+
+@receiver([post_save, post_delete], sender=Roles)
+@receiver([post_save, post_delete], sender=Permissions)
+@receiver(m2m_changed, sender=Roles.permissions.through)
+def handle_roles_changed(sender, **kwargs):
+    # A role's name or permissions changed - affects every user holding it
+    invalidate_on_commit(invalidate_all_access)
+
+
+# --- Token auth cache (User/authentication.py) ---
+# Immediately and again on commit (same as the role cache)
+
+@receiver(post_delete, sender=Token)
+def handle_token_deleted(sender, instance, **kwargs):
+    invalidate_on_commit(token_cache.invalidate_user, instance.user_id)
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def handle_user_changed(sender, instance, **kwargs):
+    # e.g. deactivated / unverified in UserActionAPIView
+    invalidate_on_commit(token_cache.invalidate_user, instance.pk)
@@ -0,0 +1,52 @@
+import requests
+from django.conf import settings
+
+from CarPDI.jobs import PermanentError, task
+from .models import CustomUser
+
+
+@task('bank.verify_details', max_attempts=3, timeout=30, retry_delay=15)
+def verify_bank_details(user_id):
+    """
+    Ask the bank verification API whether the user's pending account number
+    matches the pending IFSC. Confirmed details replace the saved ones; the
+    saved ones are left alone otherwise. The details are read here, so they
+    never sit in the job payload.
+    """
+    user = CustomUser.objects.filter(pk=user_id).only('id', 'pending_bank_account_number', 'pending_ifsc_code').first()
+    if user is None or not user.pending_bank_account_number or not user.pending_ifsc_code:
+        raise PermanentError("No bank details to verify.")
+    account_number, ifsc_code = user.pending_bank_account_number, user.pending_ifsc_code
+
+    api_url = getattr(settings, 'BANK_API_URL', "https://api.example.com/bank/verify")
+    api_key = getattr(settings, 'BANK_VERIFICATION_API_KEY', "dummy_key")
+
+    headers = {
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+    }
+    payload = {
+        'account_number': account_number,
+        'ifsc': ifsc_code,
+    }
+
+    # Timeouts / connection errors are raised as-is, so the job is retried
+    response = requests.post(api_url, json=payload, headers=headers, timeout=10)
+
+    # 4xx: the request itself is wrong, retrying won't help
+    if 400 <= response.status_code < 500:
+        raise PermanentError(f"Bank API returned {response.status_code}.")
+    response.raise_for_status()
+
+    verified = bool(response.json().get('verified'))
+    # Only if the same details are still pending (not resubmitted while the call was running)
+    pending = CustomUser.objects.filter(pk=user.pk, pending_bank_account_number=account_number, pending_ifsc_code=ifsc_code)
+    if verified:
+        pending.update(
+            bank_account_number=account_number, ifsc_code=ifsc_code, is_bank_verified=True,
+            pending_bank_account_number='', pending_ifsc_code='',
+        )
+    else:
+        pending.update(pending_bank_account_number='', pending_ifsc_code='')
+    # Kept in BackgroundJob.result - no account details in here either
+    return {"verified": verified}
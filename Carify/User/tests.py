@@ -1,3 +1,409 @@
+import random
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from CarPDI import exports, jobs
+from CarPDI.jobs import PermanentError
+from CarPDI.models import BackgroundJob, ReportExport, Vehicle
+from CarPDI.tests import QueryPlanMixin, make_inspector, make_vehicle
+from . import permission, presence
+from .authentication import CachedTokenAuthentication, token_cache
+from .metrics import annotate_status, annotate_today_activity, annotate_totals
+from .models import CustomUser, Leave, Roles, UserRole, UserSession
+
+
+# --- Hot queries are served by an index (EXPLAIN) ---
+
+class PresenceQueryPlanTests(QueryPlanMixin, TestCase):
+    ROWS = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        today = date.today()
+        now = timezone.now()
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f"plan{i}@example.com", emp_id=f"#PLAN{i}") for i in range(50)
+        )
+        UserSession.objects.bulk_create(
+            UserSession(user=rng.choice(users), login_time=now - timedelta(minutes=rng.randrange(1, 60 * 24 * 365)),
+                        logout_time=now, source='web')
+            for _ in range(cls.ROWS)
+        )
+        Leave.objects.bulk_create(
+            Leave(user=rng.choice(users), start_date=today - timedelta(days=rng.randrange(365)),
+                  end_date=today, reason="Plan")
+            for _ in range(cls.ROWS // 10)
+        )
+        cls.analyze()
+        cls.user, cls.day = users[0], today - timedelta(days=14)
+
+    def test_session_and_leave_queries_use_an_index(self):
+        for label, queryset in {
+            "sessions of a user": UserSession.objects.filter(user=self.user).order_by('-login_time')[:20],
+            "leaves of a user": Leave.objects.filter(user=self.user, start_date__gte=self.day),
+        }.items():
+            with self.subTest(label):
+                self.assertUsesIndex(queryset)
+
+
+# --- Presence of token (API) users (User/presence.py) ---
+
+class TokenPresenceTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = make_inspector()
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/user/login/', {'email': self.user.email, 'password': 'pass1234'})
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.json()['token']}")
+
+    def test_logout_closes_the_session_and_the_token_stops_working(self):
+        self.login()
+        self.assertEqual(self.client.get('/api/user/vehicles/all/').status_code, 200)
+        session = UserSession.objects.get(user=self.user, source='token')
+        self.assertIsNone(session.logout_time)
+        self.assertEqual(presence.active_user_count(), 1)
+
+        self.assertEqual(self.client.post('/api/user/logout/').status_code, 200)
+        session.refresh_from_db()
+        self.assertIsNotNone(session.logout_time)
+        self.assertEqual(presence.active_user_count(), 0)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_logout_at, session.logout_time)
+
+        # Logout deletes the token
+        self.assertEqual(self.client.get('/api/user/vehicles/all/').status_code, 401)
+
+    def test_idle_token_session_stops_counting_as_active(self):
+        self.login()
+        UserSession.objects.filter(user=self.user).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(presence.active_user_count(), 0)
+        # Next API call after the throttle window renews it
+        cache.clear()
+        self.assertEqual(self.client.get('/api/user/vehicles/all/').status_code, 200)
+        self.assertEqual(presence.active_user_count(), 1)
+
+
+# --- Token auth cache (User/authentication.py) ---
+
+class TokenCacheTests(TestCase):
+    url = '/api/user/vehicles/all/'
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = make_inspector()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_local_cache_never_serves_a_deleted_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.token.delete()
+        # What this worker's LRU would still hold if another worker had deleted the token
+        token_cache.set(self.token.key, self.user, self.token, token_cache.user_version(self.user.pk))
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_shared_cache_entries_die_with_the_token(self):
+        with mock.patch('User.authentication.cache_is_shared', return_value=True):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            with self.assertNumQueries(0):
+                user, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+            self.assertEqual(user.pk, self.user.pk)
+
+            self.token.delete()
+            self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+# --- Role / permission cache (User/permission.py) ---
+
+class UserAccessCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='manager@example.com', password='pass1234')
+        Roles.objects.create(name='Manager')
+        permission.assign_role_to_user(self.user, 'Manager')
+
+    def fresh_user(self):
+        # A new request: no per-request memo yet
+        return CustomUser.objects.get(pk=self.user.pk)
+
+    def test_local_cache_never_serves_a_revoked_role(self):
+        self.assertTrue(permission.user_is_staff_or_admin(self.fresh_user()))
+        UserRole.objects.filter(user=self.user).delete()
+        # What another worker's LocMemCache would still hold after the revoke
+        cache.set(permission._access_key(self.user.pk), (('Manager',), ()), permission.ACCESS_CACHE_TTL)
+        self.assertFalse(permission.user_is_staff_or_admin(self.fresh_user()))
+
+    def test_shared_cache_is_used_across_requests_until_a_change(self):
+        with mock.patch('User.permission.cache_is_shared', return_value=True):
+            self.assertTrue(permission.user_is_staff_or_admin(self.fresh_user()))
+            user = self.fresh_user()
+            with self.assertNumQueries(0):
+                self.assertTrue(permission.has_any_role(user, {'Manager'}))
+
+            permission.remove_role_from_user(self.user, 'Manager')
+            self.assertFalse(permission.user_is_staff_or_admin(self.fresh_user()))
+
+
+# --- Bank verification (VerifyBankDetailsAPI, User/tasks.py) ---
+
+class BankVerificationTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='payee@example.com', password='pass1234',
+            bank_account_number='111122223333', ifsc_code='SBIN0000001', is_bank_verified=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def submit(self, verified):
+        response = self.client.post('/api/user/verify-bank/', {'account_number': '999988887777', 'ifsc_code': 'hdfc0000002'})
+        self.assertEqual(response.status_code, 202)
+        job = BackgroundJob.objects.get(name='bank.verify_details')
+        self.assertEqual(job.payload, {'user_id': self.user.pk})
+        self.user.refresh_from_db()
+        # Nothing replaced before the bank has answered
+        self.assertEqual((self.user.bank_account_number, self.user.is_bank_verified), ('111122223333', True))
+        self.assertEqual(self.user.pending_bank_account_number, '999988887777')
+
+        bank_reply = mock.Mock(status_code=200, json=lambda: {'verified': verified})
+        with mock.patch('User.tasks.requests.post', return_value=bank_reply) as post:
+            self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(post.call_args.kwargs['json'], {'account_number': '999988887777', 'ifsc': 'HDFC0000002'})
+        self.user.refresh_from_db()
+
+    def test_confirmed_details_replace_the_saved_ones(self):
+        self.submit(verified=True)
+        self.assertEqual((self.user.bank_account_number, self.user.ifsc_code), ('999988887777', 'HDFC0000002'))
+        self.assertTrue(self.user.is_bank_verified)
+        self.assertEqual(self.user.pending_bank_account_number, '')
+
+    def test_rejected_details_keep_the_verified_ones(self):
+        self.submit(verified=False)
+        self.assertEqual((self.user.bank_account_number, self.user.ifsc_code), ('111122223333', 'SBIN0000001'))
+        self.assertTrue(self.user.is_bank_verified)
+        self.assertEqual((self.user.pending_bank_account_number, self.user.pending_ifsc_code), ('', ''))
+
+
+# --- Bulk PDF export size limit (ReportExportAPI, CarPDI/exports.py) ---
+
+@mock.patch.object(exports, 'MAX_VEHICLES', 2)
+class ReportExportLimitTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = make_inspector()
+        customer = make_vehicle(cls.manager, vin='VIN-1').customer
+        for vin in ('VIN-2', 'VIN-3'):
+            make_vehicle(cls.manager, customer=customer, vin=vin)
+
+    def post(self, **filters):
+        client = APIClient()
+        client.force_authenticate(self.manager)
+        with mock.patch('User.api_views.MAX_VEHICLES', 2):
+            return client.post('/api/user/vehicles/all/export/', filters)
+
+    def test_too_many_vehicles_is_refused_not_cut_short(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['data'], {'matched': 3, 'max_vehicles': 2})
+        self.assertIn('Narrow the filters', response.json()['message'])
+        self.assertFalse(ReportExport.objects.exists())
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_total_is_the_full_match(self):
+        Vehicle.objects.filter(vin='VIN-3').update(model='Baleno')
+        response = self.post(model='swift')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ReportExport.objects.get().total, 2)
+
+    def test_export_that_grew_past_the_limit_fails(self):
+        export = ReportExport.objects.create(filters={})
+        with self.assertRaises(PermanentError):
+            exports.build_export(export.id)
+        export.refresh_from_db()
+        self.assertEqual(export.status, 'failed')
+        self.assertIn('3 vehicles match', export.error)
+
+
+# --- User list metrics (User/metrics.py) ---
+
+class UserMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.base = timezone.now() - timedelta(minutes=10)
+        # The day the sessions fall on, passed explicitly so a run just after midnight works too
+        cls.today = timezone.localdate(cls.base)
+
+        cls.busy = CustomUser.objects.create_user(email='busy@example.com', password='pass1234')
+        cls.idle = CustomUser.objects.create_user(email='idle@example.com', password='pass1234')
+
+        # Two closed sessions of the same length today, an older one, and one still open
+        UserSession.objects.bulk_create([
+            UserSession(user=cls.busy, login_time=cls.base, logout_time=cls.base + timedelta(minutes=2)),
+            UserSession(user=cls.busy, login_time=cls.base + timedelta(minutes=3), logout_time=cls.base + timedelta(minutes=5)),
+            UserSession(user=cls.busy, login_time=cls.base - timedelta(days=3), logout_time=cls.base - timedelta(days=3) + timedelta(minutes=30)),
+            UserSession(user=cls.busy, login_time=cls.base + timedelta(minutes=6)),
+        ])
+        for vin in ('VIN-A', 'VIN-B'):
+            make_vehicle(cls.busy, vin=vin)
+        Vehicle.objects.update(inspection_date=cls.today)
+        CustomUser.objects.filter(pk=cls.busy.pk).update(last_login_at=cls.base + timedelta(minutes=6), last_logout_at=None)
+
+    def test_totals_count_equal_length_sessions_once_each(self):
+        with self.assertNumQueries(1):
+            users = {user.email: user for user in annotate_totals(CustomUser.objects.all())}
+        busy, idle = users['busy@example.com'], users['idle@example.com']
+        # 2 + 2 + 30 minutes; the open session isn't counted
+        self.assertEqual(busy.total_login_duration, timedelta(minutes=34))
+        self.assertEqual(busy.vehicle_count, 2)
+        self.assertIsNone(idle.total_login_duration)
+        self.assertEqual(idle.vehicle_count, 0)
+
+    def test_today_activity_counts_the_open_session_up_to_now(self):
+        with self.assertNumQueries(1):
+            users = {user.email: user for user in annotate_today_activity(annotate_totals(CustomUser.objects.all()), today=self.today)}
+        busy, idle = users['busy@example.com'], users['idle@example.com']
+        open_for = timezone.now() - (self.base + timedelta(minutes=6))
+        self.assertGreaterEqual(busy.today_login_duration, timedelta(minutes=4) + open_for - timedelta(seconds=5))
+        self.assertLessEqual(busy.today_login_duration, timedelta(minutes=4) + open_for)
+        self.assertEqual(busy.live_session_start, self.base + timedelta(minutes=6))
+        self.assertEqual(busy.today_vehicle_count, 2)
+        # Totals stay right when combined with today's subqueries
+        self.assertEqual(busy.total_login_duration, timedelta(minutes=34))
+
+        self.assertIsNone(idle.today_login_duration)
+        self.assertIsNone(idle.live_session_start)
+        self.assertEqual(idle.today_vehicle_count, 0)
+
+    def test_status_needs_no_query_per_user(self):
+        if self.today != timezone.now().date():
+            self.skipTest("status compares against the current date")
+        with self.assertNumQueries(1):
+            statuses = {user.email: user.status for user in annotate_status(CustomUser.objects.all())}
+        self.assertEqual(statuses, {'busy@example.com': 'engaged', 'idle@example.com': 'non-active'})
+
+
+# --- Keyset pages of the vehicle lists (CarPDI/pagination.py) ---
+
+class VehicleCursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.inspector = make_inspector()
+        customer = make_vehicle(cls.inspector, vin='VIN-0').customer
+        for i in range(1, 7):
+            make_vehicle(cls.inspector, customer=customer, vin=f'VIN-{i}')
+        # Three days, two of them shared by several vehicles
+        today = date.today()
+        for i, vehicle in enumerate(Vehicle.objects.order_by('id')):
+            Vehicle.objects.filter(pk=vehicle.pk).update(inspection_date=today - timedelta(days=i // 3))
+        cls.expected = list(Vehicle.objects.order_by('-inspection_date', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.inspector)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['data']
+
+    def test_next_links_walk_every_vehicle_once(self):
+        seen, pages = [], []
+        data = self.get('/api/user/vehicles/all/', pagination='cursor', page_size=3)
+        while True:
+            pages.append(data)
+            seen += [row['id'] for row in data['results']]
+            if not data['next']:
+                break
+            data = self.get(data['next'])
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+        self.assertIsNone(pages[0]['count'])
+
+        # Back from the last page gives the middle one again
+        back = self.get(pages[-1]['previous'])
+        self.assertEqual([row['id'] for row in back['results']], self.expected[3:6])
+
+    def test_user_list_and_exact_count(self):
+        data = self.get(f'/api/user/vehicles/user/{self.inspector.pk}/', pagination='cursor', page_size=4, count='exact')
+        self.assertEqual(data['count'], 7)
+        self.assertEqual([row['id'] for row in data['results']], self.expected[:4])
+
+    def test_page_numbers_stay_the_default(self):
+        data = self.get('/api/user/vehicles/all/')
+        self.assertEqual(data['count'], 7)
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get('/api/user/vehicles/all/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_bad_date_is_400(self):
+        for url in ('/api/user/vehicles/all/', f'/api/user/vehicles/user/{self.inspector.pk}/'):
+            for params in ({'date': '2026-13-40'}, {'date': 'yesterday', 'pagination': 'cursor'}):
+                with self.subTest(url=url, **params):
+                    response = self.client.get(url, params)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json()['status'], 'error')
+
+
+class UserTotalsOnGeneratedDataTests(TestCase):
+    """Smaller version of the benchmark_user_metrics data, checked user by user."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        now = timezone.now().replace(microsecond=0)
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f"gen{i}@example.com", emp_id=f"#GEN{i}") for i in range(20)
+        )
+        cls.expected = {user.pk: [0, timedelta()] for user in users}
+
+        sessions = []
+        for _ in range(3000):
+            user = rng.choice(users)
+            login = now - timedelta(minutes=rng.randrange(1, 60 * 24 * 365))
+            # Whole minutes, so plenty of sessions share the same length
+            length = timedelta(minutes=rng.randrange(1, 600))
+            sessions.append(UserSession(user=user, login_time=login, logout_time=login + length, source='web'))
+            cls.expected[user.pk][1] += length
+        UserSession.objects.bulk_create(sessions)
+
+        template = make_vehicle(users[0], vin='GEN-0')
+        cls.expected[users[0].pk][0] += 1
+        vehicles = []
+        for i in range(1, 300):
+            user = rng.choice(users)
+            vehicles.append(Vehicle(
+                image=template.image, customer=template.customer, model='Swift', vin=f'GEN-{i}',
+                fuel_type=template.fuel_type, transmission=template.transmission, engine_type=template.engine_type,
+                bhp='80', airbags='2', inspected_by=user, health_score=4.0,
+            ))
+            cls.expected[user.pk][0] += 1
+        Vehicle.objects.bulk_create(vehicles)
 
-# Create your tests here.
+    def test_every_users_totals_match(self):
+        with self.assertNumQueries(1):
+            rows = {
+                user.pk: [user.vehicle_count, user.total_login_duration]
+                for user in annotate_totals(CustomUser.objects.filter(pk__in=self.expected))
+            }
+        self.assertEqual(rows, self.expected)
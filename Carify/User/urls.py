@@ -29,6 +29,7 @@ urlpatterns = [
     path('vehicles/inspected/', views.vehicles_inspected, name='vehicles_inspected'),
 
     path('vehicle/<int:vehicle_id>/print/', views.print_view, name='print_vehicle_report'),
+    path('vehicle/<int:vehicle_id>/print/pdf/', views.print_pdf_view, name='print_vehicle_report_pdf'),
     path('vehicle/delete/<int:pk>/', views.delete_vehicle, name='delete_vehicle'),
 
     path('roles-dashboard/', views.roles_dashboard, name='roles_dashboard'),
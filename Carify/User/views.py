@@ -5,7 +5,6 @@ from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.http import HttpResponse, JsonResponse
 from django.contrib import messages
-from django.contrib.sessions.models import Session
 from django.utils import timezone 
 from django.utils.timezone import now
 from django.db import models
@@ -25,6 +24,11 @@ from CarPDI.models import Vehicle, Customer
 from .models import CustomUser, Roles, Permissions, UserRole, Leave
 from .forms import *
 from CarPDI.models import *
+from CarPDI.reports import load_vehicle_report
+from CarPDI.pdf import report_pdf_response
+from . import presence
+from .dashboard import dashboard_stats
+from .metrics import annotate_today_activity, annotate_totals, annotate_status
 # Role management utilities
 from .permission import assign_role_to_user, assign_permission_to_role, user_has_permission
 from django.contrib import messages
@@ -94,6 +98,7 @@ def login_view(request):
                 login(request, user)
                 if not remember_me:
                     request.session.set_expiry(6000)
+                    presence.sync_web_session(request)
 
                 if user.is_superuser or user.is_staff or user.is_verified_by_admin:
                     messages.success(request, f'Welcome {user.get_full_name() or user.email}!')
@@ -115,19 +120,18 @@ def logout_view(request):
 
 @login_required
 def admin_dashboard(request):
-    total_vehicles = Vehicle.objects.count()
-    total_customers = Customer.objects.count()
-    avg_health_score = Vehicle.objects.aggregate(avg=Avg('health_score'))['avg'] or 0
-    recent_inspections = Vehicle.objects.filter(inspection_date__gte=datetime.today() - timedelta(days=7)).count()
+    stats = dashboard_stats()
+    total_vehicles = stats['total_vehicles']
+    total_customers = stats['total_customers']
+    avg_health_score = stats['avg_health_score']
+    recent_inspections = stats['recent_inspections_count']
 
     vehicles = Vehicle.objects.select_related('customer').all()
-    users = CustomUser.objects.all()
-    
-    total_users = users.count()
-    active_user_ids = get_active_user_ids()
-    active_users = users.filter(id__in=active_user_ids).count()
-    inactive_users = total_users - active_users
-    verified_users = users.filter(is_verified_by_admin=True).count()
+
+    total_users = stats['total_users']
+    active_users = stats['active_users']
+    inactive_users = stats['inactive_users']
+    verified_users = stats['verified_users']
 
     dashboard_cards = [
         {
@@ -192,27 +196,13 @@ def admin_dashboard(request):
 # ========== Vehicle Views ==========
 
 def print_view(request, vehicle_id):
-    vehicle = get_object_or_404(Vehicle, id=vehicle_id)
+    report = load_vehicle_report(vehicle_id)
+    return render(request, 'car/print.html', report.as_context())
 
-    context = {
-        'vehicle': vehicle,
-        'customer': vehicle.customer,
-        'obd': OBDReading.objects.filter(vehicle=vehicle).first(),
-        'system_checks': SystemCheck.objects.filter(vehicle=vehicle),
-        'network_systems': NetworkSystem.objects.filter(vehicle=vehicle),
-        'fluid_levels': FluidLevel.objects.filter(vehicle=vehicle),
-        'live_parameters': LiveParameters.objects.filter(vehicle=vehicle),
-        'performance_checks': PerformanceCheck.objects.filter(vehicle=vehicle),
-        'paint_finishes': PaintFinish.objects.filter(vehicle=vehicle),
-        'tyre_conditions': TyreCondition.objects.filter(vehicle=vehicle),
-        'flush_gaps': FlushGap.objects.filter(vehicle=vehicle),
-        'rubber_components': RubberComponent.objects.filter(vehicle=vehicle),
-        'glass_components': GlassComponent.objects.filter(vehicle=vehicle),
-        'interior_components': InteriorComponent.objects.filter(vehicle=vehicle),
-        'documentations': Documentation.objects.filter(vehicle=vehicle),
-    }
 
-    return render(request, 'car/print.html', context)
+def print_pdf_view(request, vehicle_id):
+    # Server-side PDF of the same report (cached on disk, see CarPDI/pdf.py)
+    return report_pdf_response(request, vehicle_id)
 
 
 def delete_vehicle(request, pk):
@@ -294,43 +284,12 @@ def user_dashboard(request):
     if search_query:
         users_qs = users_qs.filter(email__icontains=search_query)
 
-    users = users_qs.annotate(
-        vehicle_count=Count('inspected_vehicles', distinct=True),
-        total_login_duration=Sum(
-            ExpressionWrapper(
-                F('sessions__logout_time') - F('sessions__login_time'),
-                output_field=DurationField()
-            ),
-            distinct=True
-        )
-    )
+    users = annotate_today_activity(annotate_totals(users_qs), today)
 
+    # Today's numbers come from annotate_today_activity - no queries in this loop
     for user in users:
-        # Format total login duration
         user.total_login_duration_str = format_duration(user.total_login_duration)
-
-        # Get today's sessions
-        today_sessions = user.sessions.filter(login_time__date=today)
-
-        total_seconds_today = 0
-        active_session_start = None
-
-        for session in today_sessions:
-            login_time = session.login_time
-            logout_time = session.logout_time or now()
-
-            if session.logout_time is None:
-                active_session_start = login_time
-
-            total_seconds_today += (logout_time - login_time).total_seconds()
-
-        user.today_login_duration_str = format_duration(timedelta(seconds=int(total_seconds_today)))
-        user.live_session_start = active_session_start
-
-        # Count of vehicles inspected today
-        today_vehicles_qs = user.inspected_vehicles.filter(inspection_date=today).distinct()
-        user.today_vehicles = today_vehicles_qs
-        user.today_vehicle_count = today_vehicles_qs.count()
+        user.today_login_duration_str = format_duration(user.today_login_duration)
 
     return render(request, 'user/user_dashboard.html', {
         'users': users,
@@ -339,17 +298,6 @@ def user_dashboard(request):
         'search_query': search_query,
     })
 
-def get_active_user_ids():
-    active_sessions = Session.objects.filter(expire_date__gte=timezone.now())
-    user_ids = []
-    for session in active_sessions:
-        data = session.get_decoded()
-        user_id = data.get('_auth_user_id')
-        if user_id:
-            user_ids.append(user_id)
-    return user_ids
-
-
 @login_required
 def verify_user_view(request, user_id):
     user = get_object_or_404(CustomUser, id=user_id)
@@ -523,7 +471,7 @@ def engineer_view(request):
         engineers = engineers.filter(email__icontains=search_query)
 
     # Annotate with vehicle count
-    engineers = engineers.annotate(vehicle_count=Count('inspected_vehicles'))
+    engineers = annotate_status(engineers.annotate(vehicle_count=Count('inspected_vehicles')))
 
     return render(request, 'user/staff.html', {
         'engineers': engineers,